@@ -0,0 +1,77 @@
+import logging
+import os
+import threading
+from datetime import datetime
+
+
+def append_alert_lines(folder, lines):
+    """Append lines to today's stock alert file"""
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"alert_{datetime.now().strftime('%Y%m%d')}.txt")
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(line + "\n" for line in lines)
+    return path
+
+
+class StockAlertDispatcher:
+    """Fans newly raised low-stock alerts out to notifications and the alert file
+
+    Alerts are raised in the database as sales land (see the stock_alerts
+    table). wake() after a sale lets a background thread pick them up at
+    once; otherwise it checks every poll_interval seconds. Each round sends
+    one digest email through NotificationService and appends the alerts to
+    the day's alert file, so nothing is rescanned or rewritten.
+    """
+
+    def __init__(self, db, notification, recipient="inventory@wecare.com",
+                 folder="stock_alerts", poll_interval=30.0):
+        self.db = db
+        self.notification = notification
+        self.recipient = recipient
+        self.folder = folder
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._worker = None
+
+    def start(self):
+        if self._worker is None:
+            self._stopping.clear()
+            self._worker = threading.Thread(target=self._run, name="stock-alerts", daemon=True)
+            self._worker.start()
+
+    def wake(self):
+        """Dispatch alerts raised by a sale that just committed"""
+        self.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            try:
+                while self.dispatch():
+                    pass
+            except Exception as e:
+                logging.error(f"Stock alert dispatch failed: {e}")
+            self._wakeup.wait(self.poll_interval)
+
+    def dispatch(self):
+        """Send one digest of pending alerts; returns how many were sent"""
+        alerts = self.db.claim_stock_alerts()
+        if not alerts:
+            return 0
+        lines = [f"{raised_at} ⚠️ {name or product_id} ({brand or '-'}) - "
+                 f"Only {quantity} left (threshold {threshold:.0f})"
+                 for _, product_id, name, brand, quantity, threshold, raised_at in alerts]
+        append_alert_lines(self.folder, lines)
+        subject = f"Low stock: {len(alerts)} product{'s' if len(alerts) != 1 else ''}"
+        self.notification.send_email(self.recipient, subject, "\n".join(lines))
+        logging.info(f"Dispatched {len(alerts)} stock alerts")
+        return len(alerts)
+
+    def close(self, timeout=5):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
@@ -0,0 +1,272 @@
+import os
+import logging
+from itertools import islice
+
+import numpy
+
+# Purchase lines are pulled from SQLite in chunks straight into structured
+# arrays; dates arrive as day numbers so no datetime objects are created
+LOAD_SQL = """
+    SELECT rowid,
+           CAST(julianday(substr(purchase_date, 1, 10)) - 2440587.5 AS INTEGER),
+           product_id, COALESCE(sale_id, ''), quantity, total
+    FROM purchases
+    WHERE rowid > ?
+    ORDER BY rowid
+"""
+
+ROW_DTYPE = numpy.dtype([("rowid", "<i8"), ("day", "<i4"), ("product_id", "U32"),
+                         ("sale_id", "U36"), ("quantity", "<i4"), ("total", "<f8")])
+
+COLUMNS = ("day", "product", "quantity", "free_quantity", "revenue", "basket")
+
+PERIODS = {"day": "datetime64[D]", "month": "datetime64[M]", "year": "datetime64[Y]"}
+
+
+def group_sum(codes, size, *weights):
+    """Per-code counts followed by per-code sums of each weight array"""
+    return [numpy.bincount(codes, minlength=size)] + \
+           [numpy.bincount(codes, weights=w, minlength=size) for w in weights]
+
+
+def basket_numbers(sale_ids, previous_sale="", previous_basket=-1):
+    """Number consecutive lines of one sale with the same basket number
+
+    Lines of a checkout are written together, so a basket starts wherever
+    the sale id changes. Lines without a sale id (sold before baskets were
+    recorded) are baskets of their own.
+    """
+    blank = sale_ids.dtype.type()
+    starts = numpy.empty(len(sale_ids), dtype=bool)
+    if len(sale_ids):
+        starts[0] = sale_ids[0] == blank or sale_ids[0] != previous_sale
+        starts[1:] = (sale_ids[1:] == blank) | (sale_ids[1:] != sale_ids[:-1])
+    return previous_basket + numpy.cumsum(starts, dtype=numpy.int64)
+
+
+class PurchaseHistory:
+    """Purchase lines as NumPy column arrays
+
+    Every column has one entry per sold line: day (days since 1970-01-01),
+    product (index into product_ids), quantity, free_quantity, revenue and
+    basket (lines sold together share a number). Cost and margin figures use
+    each product's current cost_price, as purchases do not record the cost
+    at the time of sale.
+    """
+
+    def __init__(self, columns, product_ids, cost_price, names=None):
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+        self.product_ids = product_ids
+        self.cost_price = cost_price
+        self.names = names if names is not None else product_ids
+
+    def __len__(self):
+        return len(self.day)
+
+    @classmethod
+    def from_database(cls, db, cache_path=None, chunk_size=250000):
+        """Load purchases from SQLite, reusing and extending a column cache
+
+        The cache (an .npz file) remembers the last purchase rowid it holds,
+        so only purchases made since the previous load are read from SQLite.
+        """
+        columns, product_ids, state = cls._read_cache(cache_path)
+        chunks = [(columns, product_ids)]
+        fresh = 0
+        with db.reader() as conn:
+            # Purchases are append-only; if cached rows have since been removed
+            # (a restore, for example) the cache is rebuilt from scratch
+            held = conn.execute("SELECT COUNT(*) FROM purchases WHERE rowid <= ?",
+                                (state["rowid"],)).fetchone()[0]
+            if held != len(columns["day"]):
+                columns, product_ids, state = cls._read_cache(None)
+                chunks = []
+            cursor = conn.execute(LOAD_SQL, (state["rowid"],))
+            while True:
+                rows = numpy.fromiter(islice(cursor, chunk_size), dtype=ROW_DTYPE)
+                if not len(rows):
+                    break
+                fresh += len(rows)
+                chunks.append(cls._encode(rows, state))
+            products = {pid: (name, cost) for pid, name, cost in
+                        conn.execute("SELECT product_id, name, cost_price FROM products")}
+        if fresh:
+            columns, product_ids = cls._concatenate(chunks)
+
+        if cache_path and fresh:
+            numpy.savez(cache_path, product_ids=product_ids,
+                        state=numpy.array([state["rowid"], state["basket"]]),
+                        last_sale=numpy.array(state["sale"]), **columns)
+        logging.info(f"Loaded {len(columns['day'])} purchase lines ({fresh} new)")
+        return cls.with_products(columns, product_ids, products)
+
+    @classmethod
+    def from_ledger(cls, ledger, catalog):
+        """Load the console sales ledger; catalog supplies names and cost prices"""
+        records = ledger.load()
+        product_ids, codes = numpy.unique(records["product_id"], return_inverse=True)
+        product_ids = numpy.char.decode(product_ids, "utf-8")
+        columns = {
+            "day": (records["timestamp"] // 86400).astype(numpy.int32),
+            "product": codes.astype(numpy.int32),
+            "quantity": records["quantity"].astype(numpy.int32),
+            "free_quantity": records["free_quantity"].astype(numpy.int32),
+            "revenue": numpy.asarray(records["amount"], dtype=numpy.float64),
+            "basket": basket_numbers(numpy.asarray(records["sale_id"])),
+        }
+        products = {pid: (p["name"], p["cost_price"]) for pid, p in
+                    ((pid, catalog[pid]) for pid in product_ids if pid in catalog)}
+        return cls.with_products(columns, product_ids, products)
+
+    @classmethod
+    def with_products(cls, columns, product_ids, products):
+        names = numpy.array([products.get(pid, (pid, 0.0))[0] for pid in product_ids], dtype=object)
+        cost = numpy.array([products.get(pid, (pid, 0.0))[1] for pid in product_ids], dtype=numpy.float64)
+        return cls(columns, product_ids, cost, names)
+
+    @staticmethod
+    def _read_cache(cache_path):
+        columns = {"day": numpy.zeros(0, numpy.int32), "product": numpy.zeros(0, numpy.int32),
+                   "quantity": numpy.zeros(0, numpy.int32), "free_quantity": numpy.zeros(0, numpy.int32),
+                   "revenue": numpy.zeros(0, numpy.float64), "basket": numpy.zeros(0, numpy.int64)}
+        product_ids = numpy.zeros(0, dtype="U32")
+        state = {"rowid": 0, "basket": -1, "sale": ""}
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with numpy.load(cache_path) as cache:
+                    columns = {name: cache[name] for name in COLUMNS}
+                    product_ids = cache["product_ids"]
+                    rowid, basket = cache["state"].tolist()
+                    state = {"rowid": rowid, "basket": basket, "sale": str(cache["last_sale"])}
+            except (OSError, KeyError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable analytics cache {cache_path}: {e}")
+        return columns, product_ids, state
+
+    @staticmethod
+    def _encode(rows, state):
+        """Encode a chunk of purchase rows as columns plus its own product vocabulary"""
+        product_ids, codes = numpy.unique(rows["product_id"], return_inverse=True)
+        quantity = rows["quantity"]
+        columns = {
+            "day": rows["day"],
+            "product": codes.astype(numpy.int32),
+            "quantity": quantity,
+            "free_quantity": quantity // 3,
+            "revenue": rows["total"],
+            "basket": basket_numbers(rows["sale_id"], state["sale"], state["basket"]),
+        }
+        state.update(rowid=int(rows["rowid"][-1]), basket=int(columns["basket"][-1]),
+                     sale=str(rows["sale_id"][-1]))
+        return columns, product_ids
+
+    @staticmethod
+    def _concatenate(chunks):
+        """Join encoded chunks, renumbering their product codes into one sorted vocabulary"""
+        vocabulary = numpy.unique(numpy.concatenate([ids for _, ids in chunks]))
+        for columns, product_ids in chunks:
+            remap = numpy.searchsorted(vocabulary, product_ids).astype(numpy.int32)
+            columns["product"] = remap[columns["product"]]
+        return {name: numpy.concatenate([columns[name] for columns, _ in chunks])
+                for name in COLUMNS}, vocabulary
+
+    def between(self, start=None, end=None):
+        """Lines sold in an inclusive range of 'YYYY-MM-DD' dates"""
+        mask = numpy.ones(len(self), dtype=bool)
+        if start:
+            mask &= self.day >= numpy.datetime64(start, "D").astype(numpy.int64)
+        if end:
+            mask &= self.day <= numpy.datetime64(end, "D").astype(numpy.int64)
+        columns = {name: getattr(self, name)[mask] for name in COLUMNS}
+        return PurchaseHistory(columns, self.product_ids, self.cost_price, self.names)
+
+    def line_cost(self):
+        """Cost of the goods that left the shelf on each line, free units included"""
+        return (self.quantity + self.free_quantity) * self.cost_price[self.product]
+
+    def revenue_by_period(self, period="month"):
+        """(period label, sale lines, revenue) in date order; period is day, month or year"""
+        periods = self.day.astype("datetime64[D]").astype(PERIODS[period])
+        labels, codes = numpy.unique(periods, return_inverse=True)
+        lines, revenue = group_sum(codes, len(labels), self.revenue)
+        return [(str(label), int(n), float(r)) for label, n, r in zip(labels, lines, revenue)]
+
+    def product_totals(self):
+        """Per-product arrays of units sold, free units, revenue and cost"""
+        size = len(self.product_ids)
+        _, units, free, revenue, cost = group_sum(self.product, size, self.quantity,
+                                                  self.free_quantity, self.revenue, self.line_cost())
+        return units, free, revenue, cost
+
+    def top_products(self, n=10, by="revenue"):
+        """(product_id, name, units, free units, revenue, margin), best first by revenue, units or margin"""
+        units, free, revenue, cost = self.product_totals()
+        margin = revenue - cost
+        key = {"revenue": revenue, "units": units, "margin": margin}[by]
+        n = min(n, numpy.count_nonzero(units + free))
+        top = numpy.argpartition(-key, n - 1)[:n] if n else numpy.zeros(0, dtype=int)
+        top = top[numpy.argsort(-key[top], kind="stable")]
+        return [(str(self.product_ids[i]), self.names[i], int(units[i]), int(free[i]),
+                 float(revenue[i]), float(margin[i])) for i in top]
+
+    def basket_sizes(self):
+        """Distribution of baskets by number of lines and by units: two lists of (size, baskets)"""
+        if not len(self):
+            return [], []
+        # Re-number the baskets present so the counts stay compact after filtering
+        _, baskets = numpy.unique(self.basket, return_inverse=True)
+        lines = numpy.bincount(baskets)
+        units = numpy.bincount(baskets, weights=self.quantity + self.free_quantity).astype(numpy.int64)
+        return [[(int(size), int(count)) for size, count in enumerate(numpy.bincount(sizes)) if count]
+                for sizes in (lines, units)]
+
+    def free_item_cost(self):
+        """(free units given away, their cost) under Buy 3 Get 1 Free"""
+        free = self.free_quantity
+        return int(free.sum()), float(numpy.dot(free, self.cost_price[self.product]))
+
+    def margin(self):
+        """(revenue, cost of goods including free units, margin, margin percent)"""
+        revenue = float(self.revenue.sum())
+        cost = float(self.line_cost().sum())
+        margin = revenue - cost
+        return revenue, cost, margin, (margin / revenue * 100 if revenue else 0.0)
+
+
+def format_summary(history, top=10):
+    revenue, cost, margin, percent = history.margin()
+    free_units, free_cost = history.free_item_cost()
+    lines = [f"Sale lines: {len(history):,}",
+             f"Revenue: Rs. {revenue:,.2f}",
+             f"Cost of goods: Rs. {cost:,.2f}",
+             f"Margin: Rs. {margin:,.2f} ({percent:.1f}%)",
+             f"Free items (Buy 3 Get 1): {free_units:,} units costing Rs. {free_cost:,.2f}",
+             "", "Revenue by month:"]
+    lines += [f"  {label}: {count:,} lines, Rs. {total:,.2f}"
+              for label, count, total in history.revenue_by_period("month")]
+    lines += ["", f"Top {top} products by revenue:"]
+    lines += [f"  {pid} {name}: {units:,} sold (+{free:,} free), Rs. {total:,.2f}, margin Rs. {gain:,.2f}"
+              for pid, name, units, free, total, gain in history.top_products(top)]
+    by_lines, _ = history.basket_sizes()
+    lines += ["", "Basket sizes (lines per sale):"]
+    lines += [f"  {size}: {count:,} sales" for size, count in by_lines]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="WeCare sales analytics")
+    parser.add_argument("--db", default="wecare.db")
+    parser.add_argument("--cache", help="column cache file reused between runs")
+    parser.add_argument("--start", help="first day, YYYY-MM-DD")
+    parser.add_argument("--end", help="last day, YYYY-MM-DD")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    from database import DatabaseManager
+
+    db = DatabaseManager(args.db)
+    history = PurchaseHistory.from_database(db, args.cache).between(args.start, args.end)
+    print(format_summary(history, args.top))
+    db.close()
@@ -0,0 +1,194 @@
+"""Online backups of the live database
+
+Backups are taken with SQLite's backup API a few pages at a time from a
+connection holding one read transaction. The copy is therefore a consistent
+snapshot of the moment the backup began, and in WAL mode tills keep
+committing while the pages are copied. Each copy is checked with
+PRAGMA integrity_check before it replaces anything, optionally gzipped, and
+old backups are pruned to an hourly/daily/weekly retention policy.
+"""
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+
+BACKUP_PAGES = 1024  # pages copied per step
+BACKUP_SLEEP = 0.01  # seconds between steps, leaving the disk to the tills
+BACKUP_NAME = "backup_%Y%m%d_%H%M%S"
+BACKUP_SUFFIXES = (".db", ".db.gz")
+# The newest backup in each of the last n hours, days and ISO weeks that have one is kept
+RETENTION = {"hourly": 24, "daily": 7, "weekly": 4}
+PERIODS = {
+    "hourly": lambda moment: (moment.date(), moment.hour),
+    "daily": lambda moment: moment.date(),
+    "weekly": lambda moment: moment.isocalendar()[:2],
+}
+
+
+class BackupCancelled(Exception):
+    """The backup was stopped before it finished"""
+
+
+def online_backup(db_name, target, pages=BACKUP_PAGES, sleep=BACKUP_SLEEP, cancel=None):
+    """Copy db_name into target page by page without blocking writers
+
+    Setting the cancel event stops the copy after the current step.
+    """
+    def progress(status, remaining, total):
+        if cancel is not None and cancel.is_set():
+            raise BackupCancelled(f"Backup of {db_name} cancelled")
+
+    source = sqlite3.connect(db_name, timeout=30)
+    try:
+        # Pin one snapshot; otherwise every commit from a till restarts the copy
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        dest = sqlite3.connect(target)
+        try:
+            source.backup(dest, pages=pages, sleep=sleep, progress=progress)
+        finally:
+            dest.close()
+        source.rollback()
+    finally:
+        source.close()
+
+
+def verify_backup(path):
+    """True when PRAGMA integrity_check passes on the copy at path"""
+    conn = sqlite3.connect(path)
+    try:
+        problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+    if problems != ["ok"]:
+        logging.error(f"Backup {path} failed integrity check: {'; '.join(problems[:5])}")
+        return False
+    return True
+
+
+def compress_file(path):
+    """Gzip path to path.gz and remove the original; returns the new path"""
+    target = path + ".gz"
+    try:
+        with open(path, "rb") as src, gzip.open(target, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+    except BaseException:
+        if os.path.exists(target):
+            os.remove(target)
+        raise
+    os.remove(path)
+    return target
+
+
+def backup_time(name):
+    """When the backup file name was taken, or None if it is not a backup"""
+    for suffix in BACKUP_SUFFIXES:
+        if name.endswith(suffix):
+            try:
+                return datetime.strptime(name[:-len(suffix)], BACKUP_NAME)
+            except ValueError:
+                return None
+    return None
+
+
+def list_backups(folder):
+    """(taken at, path) for every backup in folder, newest first"""
+    if not os.path.isdir(folder):
+        return []
+    backups = []
+    for name in os.listdir(folder):
+        moment = backup_time(name)
+        if moment is not None:
+            backups.append((moment, os.path.join(folder, name)))
+    backups.sort(reverse=True)
+    return backups
+
+
+def prune_backups(folder, retention=RETENTION):
+    """Delete backups the retention policy no longer keeps; returns their paths
+
+    The newest backup is always kept.
+    """
+    backups = list_backups(folder)
+    keep = {path for _, path in backups[:1]}
+    for period, count in retention.items():
+        seen = set()
+        for moment, path in backups:
+            bucket = PERIODS[period](moment)
+            if bucket not in seen and len(seen) < count:
+                seen.add(bucket)
+                keep.add(path)
+    removed = []
+    for _, path in backups:
+        if path not in keep:
+            try:
+                os.remove(path)
+                removed.append(path)
+            except OSError as e:
+                logging.error(f"Removing old backup {path} failed: {e}")
+    return removed
+
+
+def take_backup(db_name, folder, compress=False, retention=RETENTION, cancel=None):
+    """Back db_name up into folder, verify it and prune old backups; returns the backup path
+
+    The copy is written under a .part name and only renamed once it has
+    passed the integrity check, so a failed or interrupted backup never
+    shows up as one.
+    """
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, datetime.now().strftime(BACKUP_NAME) + ".db")
+    part = path + ".part"
+    try:
+        online_backup(db_name, part, cancel=cancel)
+        if not verify_backup(part):
+            raise sqlite3.DatabaseError(f"Backup of {db_name} is corrupt")
+        if compress:
+            part = compress_file(part)
+            path += ".gz"
+        os.replace(part, path)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    logging.info(f"Database backed up to {path}")
+    if retention:
+        for old in prune_backups(folder, retention):
+            logging.info(f"Removed old backup {old}")
+    return path
+
+
+class BackupScheduler:
+    """Backs the database up on a background thread every interval seconds
+
+    The first backup is taken as soon as start() is called. close() stops a
+    backup in progress after its current step.
+    """
+
+    def __init__(self, db, interval=3600.0, compress=False, retention=RETENTION):
+        self.db = db
+        self.interval = interval
+        self.compress = compress
+        self.retention = retention
+        self._stopping = threading.Event()
+        self._worker = None
+
+    def start(self):
+        if self._worker is None:
+            self._stopping.clear()
+            self._worker = threading.Thread(target=self._run, name="backups", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self.db.backup_database(self.compress, self.retention, cancel=self._stopping)
+            self._stopping.wait(self.interval)
+
+    def close(self, timeout=30):
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
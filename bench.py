@@ -0,0 +1,372 @@
+"""Benchmarks for the store's hot paths on synthetic data
+
+Generates a catalog, users and a purchase history, loads them into the
+flat-file console store (Skincare.py) and the SQLite store (database.py),
+then times the operations tills run all day. Latency percentiles and
+throughput are printed and saved as JSON, and a saved run can be compared
+against to catch regressions:
+
+    python bench.py --products 1000,100000 --sales 50000 --out bench.json
+    python bench.py --products 1000,100000 --sales 50000 --compare bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from catalog import Product, ProductCatalog
+from database import DatabaseManager
+from ledger import RECORD, encode, to_timestamp
+import bulk
+import reports
+from Skincare import WeCareSystem
+
+BRANDS = ["Garnier", "Cetaphil", "Aqualogica", "Neutrogena", "Olay", "Nivea", "Mamaearth",
+          "Minimalist", "CeraVe", "Plum", "Lakme", "Biotique", "Himalaya", "Dermaco"]
+PRODUCT_WORDS = ["Vitamin", "Serum", "Cleanser", "Sunscreen", "Moisturizer", "Toner", "Retinol",
+                 "Niacinamide", "Hyaluronic", "Gel", "Cream", "Lotion", "Mask", "Scrub", "Oil",
+                 "Balm", "Foam", "Mist", "Exfoliant", "Essence"]
+CATEGORIES = {"Skin": ["Face", "Body", "Sun"], "Hair": ["Shampoo", "Conditioner", "Oil"],
+              "Makeup": ["Lips", "Eyes", "Base"]}
+ORIGINS = ["India", "France", "Switzerland", "Korea", "Japan", "USA", "Germany", "UK"]
+PAYMENT_METHODS = ["Cash", "Credit Card", "UPI"]
+
+# A run slower than the baseline p50 by more than this fraction is a regression
+TOLERANCE = 0.25
+
+
+# Synthetic data
+
+def synthetic_products(count, seed=0):
+    """Product rows in products table order"""
+    rng = random.Random(seed)
+    for i in range(count):
+        category = rng.choice(list(CATEGORIES))
+        name = " ".join(rng.sample(PRODUCT_WORDS, rng.randint(1, 3)))
+        yield (f"P{i:07d}", name, rng.choice(BRANDS), category,
+               rng.choice(CATEGORIES[category]), rng.randint(5, 5000),
+               float(rng.randint(50, 5000)), rng.choice(ORIGINS))
+
+
+def synthetic_users(count, seed=0):
+    """(username, password, email, full_name, phone) rows"""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield (f"staff{i:04d}", f"Passw0rd{i:04d}", f"staff{i:04d}@wecare.com",
+               f"Staff Member {i}", f"98{rng.randint(10000000, 99999999)}")
+
+
+def synthetic_sales(products, users, count, days=90, seed=0):
+    """Basket lines (moment, sale_id, staff, customer, payment_method, product_id, qty,
+    free_qty, amount), oldest first
+
+    Demand is skewed so a few products sell far more than the rest, as in a
+    real store.
+    """
+    rng = random.Random(seed)
+    costs = {row[0]: row[6] for row in products}
+    pids = list(costs)
+    start = datetime.now().replace(microsecond=0) - timedelta(days=days)
+    step = days * 86400 / max(count, 1)
+    lines = []
+    for n in range(count):
+        moment = start + timedelta(seconds=n * step)
+        sale_id = str(uuid.uuid4())
+        staff = rng.choice(users)[0]
+        customer = f"Customer {rng.randint(1, 5000)}"
+        payment_method = rng.choice(PAYMENT_METHODS)
+        for _ in range(rng.choice((1, 1, 1, 2, 3))):
+            pid = pids[min(int(rng.paretovariate(1.2)) - 1, len(pids) - 1)
+                       if rng.random() < 0.5 else rng.randrange(len(pids))]
+            qty = rng.randint(1, 4)
+            lines.append((moment, sale_id, staff, customer, payment_method, pid, qty, qty // 3,
+                          qty * costs[pid] * 2))
+    return lines
+
+
+# Measurement
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(samples):
+    """Latency percentiles in milliseconds and throughput in operations per second"""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "count": len(ordered),
+        "mean_ms": total / len(ordered) * 1000,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p90_ms": percentile(ordered, 0.90) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "ops_per_sec": len(ordered) / total if total else 0.0,
+    }
+
+
+def measure(operation, repeat):
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        operation(i)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+# Back ends
+
+class FlatFileBench:
+    """The console store: products.txt plus the product journal and sales ledger"""
+    name = "flat"
+
+    def __init__(self, folder, products, users, sales):
+        self.system = WeCareSystem(base_folder=folder)
+        self.system.write_products(ProductCatalog(Product.from_row(row) for row in products), 0)
+        self.system.write_users([dict(zip(("username", "password", "email", "full_name", "phone"), u))
+                                 for u in users])
+        with open(self.system.LEDGER_FILE, "wb") as file:
+            for moment, sale_id, staff, _, _, pid, qty, free_qty, amount in sales:
+                file.write(RECORD.pack(to_timestamp(moment), uuid.UUID(sale_id).bytes,
+                                       encode(staff), encode(pid), qty, free_qty, amount))
+        self.days = sorted({line[0].date() for line in sales})
+
+    def run(self, repeat, heavy_repeat, keywords, rng):
+        # The console prints alerts as it goes; keep them out of the results
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self._run(repeat, heavy_repeat, keywords, rng)
+
+    def _run(self, repeat, heavy_repeat, keywords, rng):
+        system = self.system
+        catalog = system.load_catalog()
+        pids = list(catalog)
+        results = {}
+        results["read_products"] = measure(lambda i: system.read_products(), heavy_repeat)
+        results["write_products"] = measure(lambda i: system.write_products(catalog, 0), heavy_repeat)
+        results["search_products"] = measure(
+            lambda i: system.search_index.search(keywords[i % len(keywords)], k=20), repeat)
+
+        def sell(i):
+            pid = rng.choice(pids)
+            product = catalog[pid]
+            if system.take_stock(catalog, pid, 1):
+                system.update_sales_report([(pid, product['name'], product['brand'], 1, 0,
+                                             product['cost_price'] * 2)],
+                                           product['cost_price'] * 2, "bench")
+        results["sell_product"] = measure(sell, repeat)
+        system.save_products(catalog)
+
+        results["stock_alert"] = measure(lambda i: system.stock_alert(catalog), repeat)
+        if self.days:
+            results["view_sales_report"] = measure(
+                lambda i: system.ledger.render_day(rng.choice(self.days), catalog), repeat)
+        # The console store has no backup routine
+        return results
+
+    def close(self):
+        pass
+
+
+class SQLiteBench:
+    """The GUI store: one SQLite database"""
+    name = "sqlite"
+
+    def __init__(self, folder, products, users, sales):
+        self.folder = folder
+        self.db = DatabaseManager(os.path.join(folder, "bench.db"))
+        self.db.backup_folder = os.path.join(folder, "backups")
+        for chunk in bulk.chunked(products, 5000):
+            with self.db.writer() as conn:
+                conn.executemany(bulk.UPSERT_SQL, chunk)
+        with self.db.writer() as conn:
+            conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?, ?)", users)
+            customers = {}
+            for line in sales:
+                customers.setdefault(line[3], str(uuid.uuid4()))
+            conn.executemany("INSERT INTO customers (customer_id, name) VALUES (?, ?)",
+                             [(cid, name) for name, cid in customers.items()])
+        for chunk in bulk.chunked(sales, 20000):
+            with self.db.writer() as conn:
+                conn.executemany("""
+                    INSERT INTO purchases (purchase_id, customer_id, product_id, quantity, total,
+                                           payment_method, purchase_date, sale_id, staff)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(str(uuid.uuid4()), customers[customer], pid, qty, amount,
+                       payment_method, moment.isoformat(), sale_id, staff)
+                      for moment, sale_id, staff, customer, payment_method, pid, qty, _, amount in chunk])
+        self.db.rebuild_forecasts()
+        self.manifest = os.path.join(folder, "manifest.csv")
+        bulk.export_products(((row[0], "", "", "", "", 1, row[6], "") for row in products),
+                             self.manifest)
+        self.days = sorted({line[0].date().isoformat() for line in sales})
+
+    def run(self, repeat, heavy_repeat, keywords, rng):
+        db = self.db
+        with db.reader() as conn:
+            pids = [row[0] for row in conn.execute("SELECT product_id FROM products")]
+
+        def read_products(i):
+            with db.reader() as conn:
+                ProductCatalog.from_database(conn)
+
+        results = {}
+        results["read_products"] = measure(read_products, heavy_repeat)
+        results["write_products"] = measure(
+            lambda i: bulk.import_into_database(db, self.manifest).close(), heavy_repeat)
+        results["search_products"] = measure(
+            lambda i: db.search_products(keywords[i % len(keywords)]), repeat)
+
+        def sell(i):
+            try:
+                db.checkout("Bench Customer", [(rng.choice(pids), 1)], "Cash", staff="bench")
+            except ValueError:
+                pass
+        results["sell_product"] = measure(sell, repeat)
+        results["stock_alert"] = measure(lambda i: db.reorder_alerts(), repeat)
+        if self.days:
+            def view_sales_report(i):
+                day = rng.choice(self.days)
+                reports.write_sales_report(db, io.StringIO(), day, day)
+            results["view_sales_report"] = measure(view_sales_report, repeat)
+        results["backup_database"] = measure(lambda i: db.backup_database(), heavy_repeat)
+        return results
+
+    def close(self):
+        self.db.close()
+
+
+BACKENDS = {"flat": FlatFileBench, "sqlite": SQLiteBench}
+
+
+def search_keywords(rng, count=50):
+    """Whole words, prefixes and one-letter typos of catalog vocabulary"""
+    words = PRODUCT_WORDS + BRANDS + ORIGINS
+    keywords = []
+    for _ in range(count):
+        word = rng.choice(words).lower()
+        kind = rng.random()
+        if kind < 0.3:
+            word = word[:max(2, len(word) // 2)]
+        elif kind < 0.5 and len(word) > 4:
+            i = rng.randrange(1, len(word) - 1)
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+        keywords.append(word)
+    return keywords
+
+
+def run_benchmarks(sizes, backends, users=50, sales=20000, days=90, repeat=50,
+                   heavy_repeat=5, seed=0, folder=None):
+    """{"<backend>/<products>": {operation: stats}}"""
+    results = {}
+    for size in sizes:
+        products = list(synthetic_products(size, seed))
+        user_rows = list(synthetic_users(users, seed))
+        sale_lines = synthetic_sales(products, user_rows, sales, days, seed)
+        for name in backends:
+            work = tempfile.mkdtemp(prefix=f"wecare_bench_{name}_", dir=folder)
+            try:
+                started = time.perf_counter()
+                bench = BACKENDS[name](work, products, user_rows, sale_lines)
+                print(f"{name:<7} {size:>9,} products: loaded in {time.perf_counter() - started:.1f}s",
+                      file=sys.stderr)
+                try:
+                    # Heavy operations at a million products take seconds each
+                    heavy = max(1, min(heavy_repeat, heavy_repeat * 100000 // size))
+                    results[f"{name}/{size}"] = bench.run(repeat, heavy, search_keywords(random.Random(seed)),
+                                                          random.Random(seed))
+                finally:
+                    bench.close()
+            finally:
+                shutil.rmtree(work, ignore_errors=True)
+    return results
+
+
+def format_results(results):
+    lines = [f"{'run':<16} {'operation':<18} {'n':>5} {'p50 ms':>10} {'p90 ms':>10} "
+             f"{'p99 ms':>10} {'ops/s':>10}"]
+    for run, operations in results.items():
+        for operation, stats in operations.items():
+            lines.append(f"{run:<16} {operation:<18} {stats['count']:>5} {stats['p50_ms']:>10.3f} "
+                         f"{stats['p90_ms']:>10.3f} {stats['p99_ms']:>10.3f} {stats['ops_per_sec']:>10.1f}")
+    return "\n".join(lines)
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Report p50 changes against a saved run; returns the regressions"""
+    regressions = []
+    for run, operations in results.items():
+        for operation, stats in operations.items():
+            before = baseline.get(run, {}).get(operation)
+            if not before or not before["p50_ms"]:
+                continue
+            ratio = stats["p50_ms"] / before["p50_ms"]
+            flag = ""
+            if ratio > 1 + tolerance:
+                flag = "  REGRESSION"
+                regressions.append((run, operation, ratio))
+            elif ratio < 1 - tolerance:
+                flag = "  faster"
+            print(f"{run:<16} {operation:<18} {before['p50_ms']:>10.3f} -> {stats['p50_ms']:>10.3f} ms "
+                  f"({ratio:.2f}x){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the WeCare store's hot paths")
+    parser.add_argument("--products", default="1000,10000,100000",
+                        help="comma separated catalog sizes, e.g. 1000,1000000")
+    parser.add_argument("--backend", default="flat,sqlite")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--sales", type=int, default=20000, help="sales in the purchase history")
+    parser.add_argument("--days", type=int, default=90, help="days the purchase history spans")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--heavy-repeat", type=int, default=5,
+                        help="repeats of whole-catalog operations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dir", help="folder for the generated stores (default: system temp)")
+    parser.add_argument("--out", help="save results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    sizes = [int(size) for size in args.products.split(",")]
+    backends = [name for name in args.backend.split(",") if name]
+    for name in backends:
+        if name not in BACKENDS:
+            parser.error(f"unknown backend {name}")
+
+    results = run_benchmarks(sizes, backends, args.users, args.sales, args.days, args.repeat,
+                             args.heavy_repeat, args.seed, args.dir)
+    print(format_results(results))
+
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump({"meta": {"created": datetime.now().isoformat(timespec="seconds"),
+                                "python": platform.python_version(),
+                                "sqlite": sqlite3.sqlite_version,
+                                "platform": platform.platform(),
+                                "args": vars(args)},
+                       "results": results}, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import csv
+import json
+import logging
+import tempfile
+from itertools import islice
+
+from ledger import check_product_id
+
+# Column order shared by manifests, exports and the products table
+FIELDS = ("product_id", "name", "brand", "category", "subcategory", "quantity", "cost_price", "origin")
+
+UPSERT_SQL = """
+    INSERT INTO products (product_id, name, brand, category, subcategory, quantity, cost_price, origin)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(product_id) DO UPDATE SET
+        quantity = quantity + excluded.quantity,
+        cost_price = excluded.cost_price,
+        name = COALESCE(NULLIF(excluded.name, ''), name),
+        brand = COALESCE(NULLIF(excluded.brand, ''), brand),
+        category = COALESCE(NULLIF(excluded.category, ''), category),
+        subcategory = COALESCE(NULLIF(excluded.subcategory, ''), subcategory),
+        origin = COALESCE(NULLIF(excluded.origin, ''), origin)
+"""
+
+MAX_REPORTED_ERRORS = 100
+
+
+def is_jsonl(path):
+    return path.lower().endswith((".jsonl", ".ndjson"))
+
+
+class ImportResult:
+    """Counts, rejected rows and the spooled supplier invoice lines of one import"""
+
+    def __init__(self):
+        self.imported = 0
+        self.total_cost = 0.0
+        self.error_count = 0
+        self.errors = []
+        # Invoice lines are spooled to disk so memory stays flat for large manifests
+        self.spool = tempfile.TemporaryFile("w+", encoding="utf-8")
+
+    def error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, message))
+        logging.warning(f"Manifest line {line_number} rejected: {message}")
+
+    def record(self, rows):
+        """Account for an imported chunk and spool its invoice lines"""
+        for pid, name, brand, category, subcategory, qty, cost, origin in rows:
+            subtotal = qty * cost
+            self.imported += 1
+            self.total_cost += subtotal
+            self.spool.write(f"{name or pid} ({brand}):\n"
+                             f"  - Quantity: {qty}\n"
+                             f"  - Cost: Rs. {cost:,.2f} each\n"
+                             f"  - Subtotal: Rs. {subtotal:,.2f}\n"
+                             "\n")
+
+    def invoice_lines(self):
+        self.spool.seek(0)
+        for line in self.spool:
+            yield line.rstrip("\n")
+
+    def close(self):
+        self.spool.close()
+
+
+def read_manifest(path):
+    """Yield (line number, row dict) from a CSV or JSONL supplier manifest"""
+    if is_jsonl(path):
+        with open(path, encoding="utf-8") as file:
+            for number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except ValueError as e:
+                    yield number, e
+    else:
+        with open(path, newline="", encoding="utf-8") as file:
+            for number, row in enumerate(csv.DictReader(file), 2):
+                yield number, row
+
+
+def validate_row(row):
+    """Turn a manifest row into a products tuple, raising ValueError if it is unusable"""
+    if isinstance(row, Exception):
+        raise ValueError(f"unreadable row: {row}")
+    if not isinstance(row, dict):
+        # A JSONL line can hold any JSON value, e.g. a list or a bare number
+        raise ValueError("row must be a JSON object")
+    pid = str(row.get("product_id") or "").strip()
+    if not pid:
+        raise ValueError("missing product_id")
+    try:
+        qty = int(row["quantity"])
+        cost = float(row["cost_price"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("quantity and cost_price must be numbers")
+    if qty <= 0 or cost <= 0:
+        raise ValueError("quantity and cost_price must be positive")
+    text = {field: str(row.get(field) or "").strip()
+            for field in ("name", "brand", "category", "subcategory", "origin")}
+    return (pid, text["name"], text["brand"], text["category"], text["subcategory"],
+            qty, cost, text["origin"])
+
+
+def valid_rows(path, result, check=None):
+    """Validated rows of a manifest; check may reject more rows by raising ValueError"""
+    for number, row in read_manifest(path):
+        try:
+            row = validate_row(row)
+            if check is not None:
+                check(row)
+            yield row
+        except ValueError as e:
+            result.error(number, str(e))
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_into_database(db, path, chunk_size=5000):
+    """Upsert a supplier manifest into products, one transaction per chunk"""
+    result = ImportResult()
+    for chunk in chunked(valid_rows(path, result), chunk_size):
+        db.import_products(chunk)
+        result.record(chunk)
+    logging.info(f"Imported {result.imported} products from {path} "
+                 f"({result.error_count} rejected)")
+    return result
+
+
+def import_into_store(store, path, chunk_size=1000):
+    """Import a manifest through a StoreService or StoreClient
+
+    The manifest is read and checked here, on the till, and only valid rows
+    are sent, a chunk per call; chunks stay well under the server's request
+    size limit.
+    """
+    result = ImportResult()
+    for chunk in chunked(valid_rows(path, result), chunk_size):
+        store.import_products(chunk)
+        result.record(chunk)
+    logging.info(f"Imported {result.imported} products from {path} "
+                 f"({result.error_count} rejected)")
+    return result
+
+
+def import_into_catalog(catalog, journal, path, chunk_size=5000):
+    """Apply a supplier manifest to the console catalog through the product journal
+
+    Product ids the sales ledger cannot hold are rejected up front, rather
+    than stocking products whose sales could not be recorded.
+    """
+    result = ImportResult()
+    check = lambda row: check_product_id(row[0])
+    for chunk in chunked(valid_rows(path, result, check), chunk_size):
+        applied = []
+        for pid, name, brand, category, subcategory, qty, cost, origin in chunk:
+            existing = catalog.get(pid)
+            if existing is not None:
+                name = name or existing.name
+                brand = brand or existing.brand
+                origin = origin or existing.origin
+            catalog.restock(pid, qty, cost, name=name, brand=brand, origin=origin)
+            journal.append(pid, qty, cost, name=name, brand=brand, origin=origin)
+            applied.append((pid, name, brand, category, subcategory, qty, cost, origin))
+        journal.sync()
+        result.record(applied)
+    logging.info(f"Imported {result.imported} products from {path} "
+                 f"({result.error_count} rejected)")
+    return result
+
+
+def export_products(rows, path):
+    """Stream product tuples (in FIELDS order) to a CSV or JSONL file; returns the row count"""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        if is_jsonl(path):
+            for row in rows:
+                file.write(json.dumps(dict(zip(FIELDS, row))) + "\n")
+                count += 1
+        else:
+            writer = csv.writer(file)
+            writer.writerow(FIELDS)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+    return count
+
+
+def export_from_database(db, path):
+    with db.reader() as conn:
+        cursor = conn.execute(f"SELECT {', '.join(FIELDS)} FROM products ORDER BY product_id")
+        return export_products(cursor, path)
+
+
+def iter_store_products(store, page_size=1000):
+    """Every product of a StoreService or StoreClient in product_id order, a page at a time"""
+    after = None
+    while True:
+        rows = store.products_page(limit=page_size, after=after)
+        yield from rows
+        if len(rows) < page_size:
+            return
+        after = (rows[-1][0],)
+
+
+def export_from_store(store, path):
+    return export_products(iter_store_products(store), path)
@@ -0,0 +1,209 @@
+import logging
+
+
+class Product:
+    """Compact product record shared by the console and GUI front ends"""
+    __slots__ = ("id", "name", "brand", "category", "subcategory",
+                 "quantity", "cost_price", "origin")
+
+    def __init__(self, id, name, brand, quantity, cost_price, origin,
+                 category="", subcategory=""):
+        self.id = id
+        self.name = name
+        self.brand = brand
+        self.category = category
+        self.subcategory = subcategory
+        self.quantity = quantity
+        self.cost_price = cost_price
+        self.origin = origin
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a product from a row of the products table"""
+        return cls(row[0], row[1], row[2], row[5], row[6], row[7],
+                   category=row[3], subcategory=row[4])
+
+    # Dict-style access keeps the console code (p['name']) working unchanged
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    @property
+    def selling_price(self):
+        return self.cost_price * 2
+
+    def copy(self):
+        return Product(self.id, self.name, self.brand, self.quantity, self.cost_price,
+                       self.origin, category=self.category, subcategory=self.subcategory)
+
+    def as_row(self):
+        return (self.id, self.name, self.brand, self.category, self.subcategory,
+                self.quantity, self.cost_price, self.origin)
+
+
+def read_snapshot_seq(path):
+    """Sequence number in a products.txt header; 0 if it has none"""
+    try:
+        with open(path, "r") as file:
+            line = file.readline()
+    except FileNotFoundError:
+        return 0
+    return int(line[6:]) if line.startswith("# seq=") else 0
+
+
+class ProductCatalog:
+    """In-memory product catalog indexed by id, brand, category and origin"""
+    INDEXED_FIELDS = ("brand", "category", "origin")
+
+    def __init__(self, products=()):
+        self.snapshot_seq = 0
+        self.by_id = {}
+        self.indexes = {field: {} for field in self.INDEXED_FIELDS}
+        for product in products:
+            self.add(product)
+
+    @classmethod
+    def from_file(cls, path):
+        """Load the console products.txt format"""
+        catalog = cls()
+        with open(path, "r") as file:
+            for line in file:
+                # Header written by journal compaction: "# seq=<n>"
+                if line.startswith("# seq="):
+                    catalog.snapshot_seq = int(line[6:])
+                    continue
+                parts = [x.strip() for x in line.strip().split(",")]
+                if len(parts) >= 6:
+                    pid, name, brand, qty, cost, origin = parts[:6]
+                    catalog.add(Product(pid, name, brand, int(qty), float(cost), origin))
+        return catalog
+
+    def replace(self, other):
+        """Take over another catalog's products, keeping this object's identity"""
+        self.snapshot_seq = other.snapshot_seq
+        self.by_id = other.by_id
+        self.indexes = other.indexes
+
+    @classmethod
+    def from_database(cls, conn):
+        """Load every product from the products table"""
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM products")
+        return cls(Product.from_row(row) for row in cursor)
+
+    # Mapping interface, so code written against the old products dict still works
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(self.by_id)
+
+    def __contains__(self, pid):
+        return pid in self.by_id
+
+    def __getitem__(self, pid):
+        return self.by_id[pid]
+
+    def get(self, pid, default=None):
+        return self.by_id.get(pid, default)
+
+    def values(self):
+        return self.by_id.values()
+
+    def _index(self, product):
+        for field in self.INDEXED_FIELDS:
+            key = getattr(product, field).lower()
+            self.indexes[field].setdefault(key, set()).add(product.id)
+
+    def _unindex(self, product):
+        for field in self.INDEXED_FIELDS:
+            key = getattr(product, field).lower()
+            ids = self.indexes[field].get(key)
+            if ids:
+                ids.discard(product.id)
+                if not ids:
+                    del self.indexes[field][key]
+
+    def add(self, product):
+        """Insert or replace a product and index it"""
+        old = self.by_id.get(product.id)
+        if old is not None:
+            self._unindex(old)
+        self.by_id[product.id] = product
+        self._index(product)
+        return product
+
+    def remove(self, pid):
+        product = self.by_id.pop(pid, None)
+        if product is not None:
+            self._unindex(product)
+        return product
+
+    def update(self, pid, **fields):
+        """Change product fields, re-indexing only when an indexed field changes"""
+        product = self.by_id[pid]
+        reindex = any(f in self.INDEXED_FIELDS and fields[f] != getattr(product, f)
+                      for f in fields)
+        if reindex:
+            self._unindex(product)
+        for field, value in fields.items():
+            setattr(product, field, value)
+        if reindex:
+            self._index(product)
+        return product
+
+    def adjust_quantity(self, pid, delta):
+        """Write-through stock change after a sale or restock"""
+        product = self.by_id[pid]
+        product.quantity += delta
+        return product
+
+    def restock(self, pid, qty, cost_price, **fields):
+        """Add stock to an existing product or create a new one"""
+        if pid in self.by_id:
+            product = self.update(pid, cost_price=cost_price, **fields)
+            product.quantity += qty
+            return product
+        logging.info(f"New product added to catalog: {pid}")
+        return self.add(Product(pid, fields.get("name", ""), fields.get("brand", ""),
+                                qty, cost_price, fields.get("origin", ""),
+                                category=fields.get("category", ""),
+                                subcategory=fields.get("subcategory", "")))
+
+    def _lookup(self, field, value):
+        ids = self.indexes[field].get(value.lower(), ())
+        return [self.by_id[pid] for pid in ids]
+
+    def find_by_brand(self, brand):
+        return self._lookup("brand", brand)
+
+    def find_by_category(self, category):
+        return self._lookup("category", category)
+
+    def find_by_origin(self, origin):
+        return self._lookup("origin", origin)
+
+    def search(self, keyword, fields=("name", "brand", "category", "origin")):
+        """Substring search; exact brand/category/origin hits come from the indexes"""
+        keyword = keyword.lower()
+        exact = set()
+        for field in self.INDEXED_FIELDS:
+            if field in fields:
+                exact.update(self.indexes[field].get(keyword, ()))
+        results = [self.by_id[pid] for pid in exact]
+        for product in self.by_id.values():
+            if product.id in exact:
+                continue
+            if any(keyword in getattr(product, field).lower() for field in fields):
+                results.append(product)
+        return results
+
+    def low_stock(self, threshold=10):
+        return [p for p in self.by_id.values() if p.quantity < threshold]
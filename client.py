@@ -0,0 +1,233 @@
+"""Thin till client for the store server (server.py)
+
+StoreClient takes the same calls as store.StoreService, so the Tk front end
+can run against either. Run this module for a small console till:
+
+    python client.py --port 8765 --staff alice
+"""
+import argparse
+import itertools
+import json
+import select
+import socket
+import threading
+
+from reports import iter_pages, sales_filters, format_page, REPORT_HEADER
+from store import StoreError, DEFAULT_HOST, DEFAULT_PORT
+
+
+class StoreClient:
+    """Client side of the store server's newline-delimited JSON protocol
+
+    Calls are serialized over one connection, which is reopened once if the
+    server dropped it while idle. A request is only sent again when sending
+    it failed; once it has gone out, a lost reply raises StoreError rather
+    than risk running a checkout twice. ValueError from the server is raised
+    as ValueError (the request was rejected and nothing was written); any
+    other failure raises StoreError.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None, timeout=30.0):
+        self.address = path or (host, port)
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if isinstance(self.address, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        sock.connect(self.address)
+        self._sock, self._file = sock, sock.makefile("rb")
+
+    def _disconnect(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = self._file = None
+
+    def _send(self, data):
+        # An idle connection with something to read has been closed by the server
+        if self._sock is not None and select.select([self._sock], [], [], 0)[0]:
+            self._disconnect()
+        if self._sock is None:
+            self._connect()
+        self._sock.sendall(data)
+
+    def _receive(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Store server closed the connection")
+        return line
+
+    def call(self, method, **params):
+        request_id = next(self._ids)
+        data = json.dumps({"id": request_id, "method": method, "params": params}).encode("utf-8") + b"\n"
+        with self._lock:
+            reused = self._sock is not None
+            try:
+                try:
+                    self._send(data)
+                except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+                    # A connection the server dropped while idle fails on first use;
+                    # a request cut off mid-line is never a complete one, so the
+                    # server cannot have run it and it is safe to send again
+                    self._disconnect()
+                    if not reused:
+                        raise
+                    self._send(data)
+                response = json.loads(self._receive())
+            except (OSError, ValueError) as e:
+                self._disconnect()
+                raise StoreError(f"Store server unavailable: {e}")
+        if "error" in response:
+            error = response["error"]
+            if error.get("type") == "ValueError":
+                raise ValueError(error["message"])
+            raise StoreError(error["message"])
+        return response["result"]
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+    def products(self):
+        return self.call("products")
+
+    def product_count(self):
+        return self.call("product_count")
+
+    def products_page(self, order="product_id", descending=False, offset=0, limit=200, after=None):
+        return [tuple(row) for row in self.call("products_page", order=order, descending=descending,
+                                                 offset=offset, limit=limit,
+                                                 after=list(after) if after is not None else None)]
+
+    def search(self, keyword, limit=100):
+        return self.call("search", keyword=keyword, limit=limit)
+
+    def checkout(self, customer_name, items, payment_method, staff=None):
+        sale_id, lines = self.call("checkout", customer_name=customer_name, items=list(items),
+                                   payment_method=payment_method, staff=staff)
+        return sale_id, [tuple(line) for line in lines]
+
+    def restock(self, product_id, quantity, cost_price, name="", brand="", category="",
+                subcategory="", origin=""):
+        return self.call("restock", product_id=product_id, quantity=quantity, cost_price=cost_price,
+                         name=name, brand=brand, category=category, subcategory=subcategory,
+                         origin=origin)
+
+    def stock_alerts(self):
+        return [tuple(row) for row in self.call("stock_alerts")]
+
+    def sales_summary(self, start=None, end=None, staff=None):
+        return tuple(self.call("sales_summary", start=start, end=end, staff=staff))
+
+    def sales_page(self, start=None, end=None, staff=None, after=("", ""), page_size=500):
+        return [tuple(row) for row in self.call("sales_page", start=start, end=end, staff=staff,
+                                                 after=list(after), page_size=page_size)]
+
+    def iter_sales_pages(self, start=None, end=None, staff=None, page_size=500):
+        sales_filters(start, end, staff)
+        return iter_pages(
+            lambda after, size: self.sales_page(start, end, staff, after, size), page_size)
+
+    def reload_catalog(self):
+        return self.call("reload_catalog")
+
+    def health(self):
+        return self.call("health")
+
+    def import_products(self, rows):
+        return self.call("import_products", rows=[list(row) for row in rows])
+
+    def login(self, username, password):
+        return self.call("login", username=username, password=password)
+
+    def register_user(self, username, password, email, full_name, phone):
+        return self.call("register_user", username=username, password=password, email=email,
+                         full_name=full_name, phone=phone)
+
+    def request_password_reset(self, username, email):
+        return self.call("request_password_reset", username=username, email=email)
+
+    def change_password(self, username, current, new):
+        return self.call("change_password", username=username, current=current, new=new)
+
+    def add_customer(self, name, email="", phone="", address=""):
+        return self.call("add_customer", name=name, email=email, phone=phone, address=address)
+
+    def email_receipt(self, recipient, receipt):
+        return self.call("email_receipt", recipient=recipient, receipt=receipt)
+
+
+def run_console(client, staff):
+    """Minimal console till: search, sell, restock, stock alerts and the sales report"""
+    while True:
+        print("\n1. Search products\n2. Sell\n3. Restock\n4. Stock alerts\n5. Sales report\n6. Exit")
+        choice = input("Enter your choice: ").strip()
+        try:
+            if choice == "1":
+                for row in client.search(input("Keyword (blank for all): "))[:50]:
+                    print(f"{row[0]:<10} {row[1]:<30} {row[2]:<15} Rs. {row[6] * 2:,.2f}  Qty: {row[5]}")
+            elif choice == "2":
+                items = []
+                while True:
+                    pid = input("Product ID (blank to finish): ").strip()
+                    if not pid:
+                        break
+                    items.append((pid, int(input("Quantity: "))))
+                sale_id, lines = client.checkout(input("Customer name: "), items,
+                                                 input("Payment method: "), staff=staff)
+                for _, name, brand, qty, free_qty, _, subtotal in lines:
+                    print(f"{name} ({brand}) x {qty} + {free_qty} free  Rs. {subtotal:,.2f}")
+                print(f"Sale {sale_id} total: Rs. {sum(line[6] for line in lines):,.2f}")
+            elif choice == "3":
+                client.restock(input("Product ID: ").strip(), int(input("Quantity: ")),
+                               float(input("Cost price: ")), name=input("Name: "),
+                               brand=input("Brand: "), origin=input("Origin: "))
+                print("Product restocked successfully!")
+            elif choice == "4":
+                alerts = client.stock_alerts()
+                for _, name, brand, quantity, point, order in alerts:
+                    print(f"⚠️ {name} ({brand}) - Only {quantity} left!"
+                          + (f" Reorder point {point:.0f}, order {order}" if point is not None else ""))
+                if not alerts:
+                    print("All products have sufficient stock levels.")
+            elif choice == "5":
+                start = input("From (YYYY-MM-DD, blank for all): ").strip() or None
+                end = input("To (YYYY-MM-DD, blank for all): ").strip() or None
+                print(REPORT_HEADER, end="")
+                for rows in client.iter_sales_pages(start, end):
+                    print(format_page(rows), end="")
+            elif choice == "6":
+                break
+            else:
+                print("Invalid choice!")
+        except ValueError as e:
+            print(f"Error: {e}")
+        except StoreError as e:
+            print(f"Store error: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WeCare console till")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="connect to a Unix socket instead of TCP")
+    parser.add_argument("--staff", default=None)
+    args = parser.parse_args()
+
+    client = StoreClient(args.host, args.port, args.socket)
+    try:
+        run_console(client, args.staff or input("Staff name: ").strip())
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
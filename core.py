@@ -1,477 +1,564 @@
-import sqlite3
-import uuid
-import re
-import random
-from datetime import datetime
-import os
-from tkinter import messagebox, ttk, scrolledtext
-import tkinter as tk
-from pathlib import Path  # Added for stock_alert
-import logging
-from .database import DatabaseManager
-from .notifications import NotificationService
-from .ecommerce import ECommerceIntegration
-from .gui import WeCareGUI
-
-class WeCareSystem:
-    def __init__(self, root):  # Add root parameter
-        self.root = root  # Store root
-        self.db = DatabaseManager()
-        self.notification = NotificationService()
-        self.ecommerce = ECommerceIntegration()
-        self.MESSAGES = [
-            "You're doing amazing! 💪",
-            "Great job closing that sale! 🎉",
-            "Keep going, sales star! 🌟",
-            "Another happy customer! 😊",
-            "You're rocking it! 🔥"
-        ]
-        self.current_user = None
-        self.gui = WeCareGUI(self.root, self)
-
-    def validate_password(self, password):
-        """Validate password strength"""
-        if len(password) < 8:
-            return False, "Password must be at least 8 characters long"
-        if not any(c.isupper() for c in password):
-            return False, "Password must contain at least one uppercase letter"
-        if not any(c.islower() for c in password):
-            return False, "Password must contain at least one lowercase letter"
-        if not any(c.isdigit() for c in password):
-            return False, "Password must contain at least one number"
-        return True, "Password is strong"
-
-    def validate_email(self, email):
-        """Validate email format"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
-
-    def login(self):
-        """Handle user login"""
-        username = self.gui.login_username.get().strip()
-        password = self.gui.login_password.get().strip()
-        
-        try:
-            with sqlite3.connect(self.db.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT password, email FROM users WHERE username = ?", (username,))
-                result = cursor.fetchone()
-                
-                if result and result[0] == password:
-                    self.current_user = username
-                    self.gui.notebook.select(self.gui.main_frame)
-                    messagebox.showinfo("Success", "Login successful!")
-                    self.notification.send_email(result[1], "Login Notification", 
-                                               f"User {username} logged in at {datetime.now()}")
-                else:
-                    messagebox.showerror("Error", "Invalid credentials")
-        except sqlite3.Error as e:
-            logging.error(f"Login error: {e}")
-            messagebox.showerror("Error", "Database error occurred")
-
-    def register_user(self):
-        """Register a new user"""
-        data = {k: v.get() for k, v in self.gui.register_entries.items()}
-        
-        try:
-            if not all(data.values()):
-                messagebox.showerror("Error", "All fields are required")
-                return
-
-            if not self.validate_email(data['email']):
-                messagebox.showerror("Error", "Invalid email format")
-                return
-
-            valid, message = self.validate_password(data['password'])
-            if not valid:
-                messagebox.showerror("Error", message)
-                return
-
-            with sqlite3.connect(self.db.db_name) as conn:
-                cursor = conn.cursor()
-                try:
-                    cursor.execute("INSERT INTO users VALUES (?, ?, ?, ?, ?)",
-                                 (data['username'], data['password'], data['email'], 
-                                  data['full_name'], data['phone']))
-                    conn.commit()
-                    messagebox.showinfo("Success", "Registration successful!")
-                    self.notification.send_email(data['email'], "Welcome to WeCare",
-                                               f"Welcome {data['full_name']} to WeCare Store!")
-                except sqlite3.IntegrityError:
-                    messagebox.showerror("Error", "Username or email already exists")
-        except sqlite3.Error as e:
-            logging.error(f"Registration error: {e}")
-            messagebox.showerror("Error", "Database error occurred")
-
-    def forgot_password(self):
-        """Password recovery functionality"""
-        dialog = tk.Toplevel(self.root)
-        dialog.title("Password Recovery")
-        dialog.geometry("300x200")
-
-        ttk.Label(dialog, text="Username:").pack()
-        username_entry = ttk.Entry(dialog)
-        username_entry.pack()
-
-        ttk.Label(dialog, text="Email:").pack()
-        email_entry = ttk.Entry(dialog)
-        email_entry.pack()
-
-        def submit():
-            username = username_entry.get()
-            email = email_entry.get()
-
-            try:
-                with sqlite3.connect(self.db.db_name) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT email FROM users WHERE username = ?", (username,))
-                    result = cursor.fetchone()
-
-                    if result and result[0] == email:
-                        recovery_code = str(uuid.uuid4())[:8]
-                        cursor.execute("INSERT INTO recovery_codes VALUES (?, ?, ?)",
-                                     (username, recovery_code, datetime.now().isoformat()))
-                        conn.commit()
-                        
-                        self.notification.send_email(email, "Password Recovery Code",
-                                                   f"Your recovery code is: {recovery_code}")
-                        messagebox.showinfo("Success", f"Recovery code sent to {email}")
-                        dialog.destroy()
-                    else:
-                        messagebox.showerror("Error", "Invalid username or email")
-            except sqlite3.Error as e:
-                logging.error(f"Password recovery error: {e}")
-                messagebox.showerror("Error", "Database error occurred")
-
-        ttk.Button(dialog, text="Submit", command=submit).pack(pady=10)
-
-    def change_password(self):
-        """Change user password"""
-        dialog = tk.Toplevel(self.root)
-        dialog.title("Change Password")
-        dialog.geometry("300x200")
-
-        ttk.Label(dialog, text="Current Password:").pack()
-        current_pass = ttk.Entry(dialog, show="*")
-        current_pass.pack()
-
-        ttk.Label(dialog, text="New Password:").pack()
-        new_pass = ttk.Entry(dialog, show="*")
-        new_pass.pack()
-
-        def submit():
-            try:
-                with sqlite3.connect(self.db.db_name) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT password FROM users WHERE username = ?",
-                                  (self.current_user,))
-                    if cursor.fetchone()[0] == current_pass.get():
-                        valid, message = self.validate_password(new_pass.get())
-                        if valid:
-                            cursor.execute("UPDATE users SET password = ? WHERE username = ?",
-                                          (new_pass.get(), self.current_user))
-                            conn.commit()
-                            messagebox.showinfo("Success", "Password changed successfully!")
-                            dialog.destroy()
-                        else:
-                            messagebox.showerror("Error", message)
-                    else:
-                        messagebox.showerror("Error", "Current password incorrect")
-            except sqlite3.Error as e:
-                logging.error(f"Password change error: {e}")
-                messagebox.showerror("Error", "Database error occurred")
-
-        ttk.Button(dialog, text="Submit", command=submit).pack(pady=10)
-
-    def display_products(self):
-        """Display all products in treeview"""
-        for item in self.gui.products_tree.get_children():
-            self.gui.products_tree.delete(item)
-
-        try:
-            with sqlite3.connect(self.db.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM products")
-                for row in cursor.fetchall():
-                    selling_price = row[6] * 2
-                    self.gui.products_tree.insert("", "end", values=(
-                        row[0], row[1], row[2], row[3], row[4], f"Rs. {selling_price:,.2f}", row[5], row[7]))
-                    
-                    self.ecommerce.sync_product({
-                        'id': row[0], 'name': row[1], 'brand': row[2], 
-                        'category': row[3], 'subcategory': row[4], 
-                        'price': selling_price, 'quantity': row[5]
-                    })
-        except sqlite3.Error as e:
-            logging.error(f"Product display error: {e}")
-            messagebox.showerror("Error", "Failed to load products")
-
-    def search_products(self):
-        """Search products by name, brand, category, or country"""
-        keyword = self.gui.product_search.get().lower()
-        
-        for item in self.gui.products_tree.get_children():
-            self.gui.products_tree.delete(item)
-
-        try:
-            with sqlite3.connect(self.db.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT * FROM products 
-                    WHERE LOWER(name) LIKE ? OR LOWER(brand) LIKE ? 
-                    OR LOWER(category) LIKE ? OR LOWER(origin) LIKE ?
-                """, (f'%{keyword}%', f'%{keyword}%', f'%{keyword}%', f'%{keyword}%'))
-                
-                for row in cursor.fetchall():
-                    selling_price = row[6] * 2
-                    self.gui.products_tree.insert("", "end", values=(
-                        row[0], row[1], row[2], row[3], row[4], f"Rs. {selling_price:,.2f}", row[5], row[7]))
-        except sqlite3.Error as e:
-            logging.error(f"Product search error: {e}")
-            messagebox.showerror("Error", "Failed to search products")
-
-    def add_customer(self):
-        """Add new customer"""
-        data = {k: v.get() for k, v in self.gui.customer_entries.items()}
-        
-        try:
-            if not data['name']:
-                messagebox.showerror("Error", "Customer name is required")
-                return
-
-            customer_id = str(uuid.uuid4())
-            with sqlite3.connect(self.db.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute("INSERT INTO customers VALUES (?, ?, ?, ?, ?)",
-                              (customer_id, data['name'], data['email'], 
-                               data['phone'], data['address']))
-                conn.commit()
-                messagebox.showinfo("Success", "Customer added successfully!")
-                self.notification.send_sms(data['phone'], f"Welcome {data['name']} to WeCare Store!")
-        except sqlite3.Error as e:
-            logging.error(f"Customer add error: {e}")
-            messagebox.showerror("Error", "Failed to add customer")
-
-    def sell_product(self):
-        """Process product sales"""
-        dialog = tk.Toplevel(self.root)
-        dialog.title("Sell Products")
-        dialog.geometry("400x500")
-
-        ttk.Label(dialog, text="Customer Name:").pack()
-        customer_name = ttk.Entry(dialog)
-        customer_name.pack()
-
-        ttk.Label(dialog, text="Product ID:").pack()
-        product_id = ttk.Entry(dialog)
-        product_id.pack()
-
-        ttk.Label(dialog, text="Quantity:").pack()
-        quantity = ttk.Entry(dialog)
-        quantity.pack()
-
-        payment_methods = ["Cash", "Credit Card", "UPI"]
-        ttk.Label(dialog, text="Payment Method:").pack()
-        payment_method = ttk.Combobox(dialog, values=payment_methods)
-        payment_method.pack()
-
-        def submit():
-            try:
-                with sqlite3.connect(self.db.db_name) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT * FROM products WHERE product_id = ?", (product_id.get(),))
-                    product = cursor.fetchone()
-                    
-                    if not product:
-                        messagebox.showerror("Error", "Product not found")
-                        return
-
-                    qty = int(quantity.get())
-                    if qty <= 0:
-                        messagebox.showerror("Error", "Quantity must be positive")
-                        return
-
-                    if qty > product[5]:
-                        messagebox.showerror("Error", f"Only {product[5]} available")
-                        return
-
-                    free_qty = qty // 3
-                    total_qty = qty + free_qty
-                    selling_price = product[6] * 2
-                    total = qty * selling_price
-
-                    cursor.execute("UPDATE products SET quantity = quantity - ? WHERE product_id = ?",
-                                  (total_qty, product_id.get()))
-
-                    cursor.execute("SELECT customer_id FROM customers WHERE name = ?", (customer_name.get(),))
-                    customer = cursor.fetchone()
-                    if not customer:
-                        customer_id = str(uuid.uuid4())
-                        cursor.execute("INSERT INTO customers (customer_id, name) VALUES (?, ?)",
-                                      (customer_id, customer_name.get()))
-                    else:
-                        customer_id = customer[0]
-
-                    purchase_id = str(uuid.uuid4())
-                    cursor.execute("INSERT INTO purchases VALUES (?, ?, ?, ?, ?, ?, ?)",
-                                  (purchase_id, customer_id, product_id.get(), qty, total, 
-                                   payment_method.get(), datetime.now().isoformat()))
-
-                    conn.commit()
-
-                    receipt = f"""
-WeCare Store Receipt
-==================
-Customer: {customer_name.get()}
-Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-------------------
-Item: {product[1]} ({product[2]})
-Quantity: {qty} + {free_qty} free
-Price: Rs. {selling_price:,.2f} each
-Payment Method: {payment_method.get()}
-------------------
-Total: Rs. {total:,.2f}
-==================
-"""
-                    with open(f"receipts/receipt_{purchase_id}.txt", "w") as f:
-                        f.write(receipt)
-
-                    messagebox.showinfo("Success", f"Sale completed! {random.choice(self.MESSAGES)}")
-                    self.notification.send_email(f"{customer_name.get()}@example.com",
-                                               "Purchase Receipt", receipt)
-                    dialog.destroy()
-            except (sqlite3.Error, ValueError) as e:
-                logging.error(f"Sale error: {e}")
-                messagebox.showerror("Error", "Failed to process sale")
-
-        ttk.Button(dialog, text="Submit Sale", command=submit).pack(pady=10)
-
-    def restock_product(self):
-        """Process product restocking"""
-        dialog = tk.Toplevel(self.root)
-        dialog.title("Restock Products")
-        dialog.geometry("400x500")
-
-        fields = ["Product ID", "Name", "Brand", "Category", "Subcategory", "Quantity", "Cost Price", "Origin"]
-        entries = {}
-        
-        for i, field in enumerate(fields):
-            ttk.Label(dialog, text=f"{field}:").pack()
-            entry = ttk.Entry(dialog)
-            entry.pack()
-            entries[field.lower().replace(" ", "_")] = entry
-
-        def submit():
-            try:
-                with sqlite3.connect(self.db.db_name) as conn:
-                    cursor = conn.cursor()
-                    product_id = entries['product_id'].get()
-                    qty = int(entries['quantity'].get())
-                    cost = float(entries['cost_price'].get())
-
-                    if qty <= 0 or cost <= 0:
-                        messagebox.showerror("Error", "Quantity and cost must be positive")
-                        return
-
-                    cursor.execute("SELECT * FROM products WHERE product_id = ?", (product_id,))
-                    if cursor.fetchone():
-                        cursor.execute("""
-                            UPDATE products SET quantity = quantity + ?, cost_price = ?,
-                            name = ?, brand = ?, category = ?, subcategory = ?, origin = ?
-                            WHERE product_id = ?
-                        """, (qty, cost, entries['name'].get(), entries['brand'].get(),
-                              entries['category'].get(), entries['subcategory'].get(),
-                              entries['origin'].get(), product_id))
-                    else:
-                        cursor.execute("INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                                      (product_id, entries['name'].get(), entries['brand'].get(),
-                                       entries['category'].get(), entries['subcategory'].get(),
-                                       qty, cost, entries['origin'].get()))
-
-                    conn.commit()
-                    messagebox.showinfo("Success", "Product restocked successfully!")
-                    self.ecommerce.sync_product({
-                        'id': product_id,
-                        'name': entries['name'].get(),
-                        'brand': entries['brand'].get(),
-                        'category': entries['category'].get(),
-                        'subcategory': entries['subcategory'].get(),
-                        'quantity': qty,
-                        'price': cost * 2
-                    })
-                    dialog.destroy()
-            except (sqlite3.Error, ValueError) as e:
-                logging.error(f"Restock error: {e}")
-                messagebox.showerror("Error", "Failed to restock product")
-
-        ttk.Button(dialog, text="Submit Restock", command=submit).pack(pady=10)
-
-    def stock_alert(self):
-        """Generate and display stock alerts"""
-        try:
-            with sqlite3.connect(self.db.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM products WHERE quantity < 10")
-                low_stock = cursor.fetchall()
-
-                alert_text = "Stock Alerts\n" + "="*50 + "\n"
-                for product in low_stock:
-                    alert_text += f"⚠️ {product[1]} ({product[2]}) - Only {product[5]} left!\n"
-
-                if not low_stock:
-                    alert_text += "All products have sufficient stock levels.\n"
-
-                Path("stock_alerts").mkdir(exist_ok=True)
-                with open(f"stock_alerts/alert_{datetime.now().strftime('%Y%m%d')}.txt", "w") as f:
-                    f.write(alert_text)
-
-                messagebox.showinfo("Stock Alerts", alert_text)
-        except sqlite3.Error as e:
-            logging.error(f"Stock alert error: {e}")
-            messagebox.showerror("Error", "Failed to generate stock alerts")
-
-    def view_sales_report(self):
-        """View sales reports"""
-        dialog = tk.Toplevel(self.root)
-        dialog.title("Sales Reports")
-        dialog.geometry("600x400")
-
-        text_area = scrolledtext.ScrolledText(dialog, height=20)
-        text_area.pack(expand=True, fill='both')
-
-        try:
-            with sqlite3.connect(self.db.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT p.purchase_date, c.name, pr.name, p.quantity, p.total, p.payment_method
-                    FROM purchases p
-                    JOIN customers c ON p.customer_id = c.customer_id
-                    JOIN products pr ON p.product_id = pr.product_id
-                """)
-                
-                report = "Sales Report\n" + "="*50 + "\n"
-                for row in cursor.fetchall():
-                    report += f"Date: {row[0]}\nCustomer: {row[1]}\nProduct: {row[2]}\n"
-                    report += f"Quantity: {row[3]}\nTotal: Rs. {row[4]:,.2f}\n"
-                    report += f"Payment: {row[5]}\n" + "-"*50 + "\n"
-
-                text_area.insert(tk.END, report)
-                text_area.config(state='disabled')
-        except sqlite3.Error as e:
-            logging.error(f"Sales report error: {e}")
-            messagebox.showerror("Error", "Failed to generate sales report")
-
-    def logout(self):
-        """Handle logout"""
-        self.current_user = None
-        self.gui.notebook.select(self.gui.login_frame)
-        messagebox.showinfo("Success", "Logged out successfully")
-
-    def run(self):
-        """Run the application"""
-        try:
-            self.db.backup_database()
-            self.root.mainloop()
-        except Exception as e:
-            logging.error(f"Application error: {e}")
+import sqlite3
+import re
+import random
+from datetime import datetime
+import os
+from tkinter import messagebox, ttk, scrolledtext, filedialog
+import tkinter as tk
+from pathlib import Path  # Added for stock_alert
+import logging
+from database import DatabaseManager
+from notification import NotificationService
+from ecommerce import ECommerceIntegration
+from alerts import StockAlertDispatcher
+from backup import BackupScheduler
+from oplog import OpLog
+from store import StoreService, StoreError
+import bulk
+import reports
+from gui import WeCareGUI
+from worker import TkExecutor
+
+class WeCareSystem:
+    def __init__(self, root, store=None, timer=None):  # Add root parameter
+        self.root = root  # Store root
+        # timer.mark(label) records how long each startup step took
+        mark = timer.mark if timer is not None else (lambda label: None)
+        # Everything touching the database goes through the store: in process
+        # by default, or a StoreClient when several tills share a store server,
+        # which then owns the database and its background services
+        if store is None:
+            self.db = DatabaseManager(oplog=OpLog())
+            mark("open database")
+            self.notification = NotificationService(self.db)
+            self.ecommerce = ECommerceIntegration()
+            self.ecommerce.attach_change_feed(self.db)
+            self.stock_alerts = StockAlertDispatcher(self.db, self.notification)
+            self.backups = BackupScheduler(self.db)
+            store = StoreService(self.db, self.ecommerce, self.stock_alerts, self.notification)
+            mark("start services")
+        else:
+            self.db = self.notification = self.ecommerce = self.stock_alerts = self.backups = None
+        self.store = store
+        self.MESSAGES = [
+            "You're doing amazing! 💪",
+            "Great job closing that sale! 🎉",
+            "Keep going, sales star! 🌟",
+            "Another happy customer! 😊",
+            "You're rocking it! 🔥"
+        ]
+        self.current_user = None
+        # Database, file and network work runs here so the window never hangs
+        self.tasks = TkExecutor(self.root, on_busy=lambda busy: self.gui.set_busy(busy))
+        self.gui = WeCareGUI(self.root, self)
+        mark("build window")
+
+    def background(self, fn, *args, on_done=None, on_error=None, key=None,
+                   log="Background task error", error="Database error occurred"):
+        """Run fn(*args) on a worker and on_done(result) back on the Tk thread
+
+        A ValueError is shown to the user as is; any other failure is logged
+        with the log prefix and reported with the error message. Calls with a
+        key supersede earlier ones with the same key.
+        """
+        def failed(e):
+            if on_error is not None:
+                on_error(e)
+            if isinstance(e, ValueError):
+                messagebox.showerror("Error", str(e))
+            else:
+                logging.error(f"{log}: {e}")
+                messagebox.showerror("Error", error)
+
+        return self.tasks.submit(fn, *args, on_done=on_done, on_error=failed, key=key)
+
+    def validate_password(self, password):
+        """Validate password strength"""
+        if len(password) < 8:
+            return False, "Password must be at least 8 characters long"
+        if not any(c.isupper() for c in password):
+            return False, "Password must contain at least one uppercase letter"
+        if not any(c.islower() for c in password):
+            return False, "Password must contain at least one lowercase letter"
+        if not any(c.isdigit() for c in password):
+            return False, "Password must contain at least one number"
+        return True, "Password is strong"
+
+    def validate_email(self, email):
+        """Validate email format"""
+        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+        return bool(re.match(pattern, email))
+
+    def login(self):
+        """Handle user login"""
+        username = self.gui.login_username.get().strip()
+        password = self.gui.login_password.get().strip()
+
+        def done(valid):
+            if valid:
+                self.current_user = username
+                self.gui.notebook.select(self.gui.main_frame)
+                messagebox.showinfo("Success", "Login successful!")
+            else:
+                messagebox.showerror("Error", "Invalid credentials")
+
+        self.background(self.store.login, username, password, on_done=done, log="Login error")
+
+    def register_user(self):
+        """Register a new user"""
+        data = {k: v.get() for k, v in self.gui.register_entries.items()}
+
+        if not all(data.values()):
+            messagebox.showerror("Error", "All fields are required")
+            return
+
+        if not self.validate_email(data['email']):
+            messagebox.showerror("Error", "Invalid email format")
+            return
+
+        valid, message = self.validate_password(data['password'])
+        if not valid:
+            messagebox.showerror("Error", message)
+            return
+
+        def done(registered):
+            if registered:
+                messagebox.showinfo("Success", "Registration successful!")
+            else:
+                messagebox.showerror("Error", "Username or email already exists")
+
+        self.background(self.store.register_user, data['username'], data['password'], data['email'],
+                        data['full_name'], data['phone'], on_done=done, log="Registration error")
+
+    def forgot_password(self):
+        """Password recovery functionality"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Password Recovery")
+        dialog.geometry("300x200")
+
+        ttk.Label(dialog, text="Username:").pack()
+        username_entry = ttk.Entry(dialog)
+        username_entry.pack()
+
+        ttk.Label(dialog, text="Email:").pack()
+        email_entry = ttk.Entry(dialog)
+        email_entry.pack()
+
+        def submit():
+            username = username_entry.get()
+            email = email_entry.get()
+
+            def done(sent):
+                if sent:
+                    messagebox.showinfo("Success", f"Recovery code sent to {email}")
+                    dialog.destroy()
+                else:
+                    messagebox.showerror("Error", "Invalid username or email")
+
+            self.background(self.store.request_password_reset, username, email,
+                            on_done=done, log="Password recovery error")
+
+        ttk.Button(dialog, text="Submit", command=submit).pack(pady=10)
+
+    def change_password(self):
+        """Change user password"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Change Password")
+        dialog.geometry("300x200")
+
+        ttk.Label(dialog, text="Current Password:").pack()
+        current_pass = ttk.Entry(dialog, show="*")
+        current_pass.pack()
+
+        ttk.Label(dialog, text="New Password:").pack()
+        new_pass = ttk.Entry(dialog, show="*")
+        new_pass.pack()
+
+        def submit():
+            username, current, new = self.current_user, current_pass.get(), new_pass.get()
+            valid, message = self.validate_password(new)
+            if not valid:
+                messagebox.showerror("Error", message)
+                return
+
+            def done(changed):
+                if changed:
+                    messagebox.showinfo("Success", "Password changed successfully!")
+                    dialog.destroy()
+                else:
+                    messagebox.showerror("Error", "Current password incorrect")
+
+            self.background(self.store.change_password, username, current, new,
+                            on_done=done, log="Password change error")
+
+        ttk.Button(dialog, text="Submit", command=submit).pack(pady=10)
+
+    def display_products(self):
+        """Display all products in treeview"""
+        self.gui.products_view.show_all()
+
+    def search_products(self):
+        """Search products by name, brand, category, or country"""
+        keyword = self.gui.product_search.get().lower()
+
+        # Each search supersedes the last, so only the latest results are shown
+        if keyword.strip():
+            self.gui.products_view.show_matches(lambda: self.store.search(keyword))
+        else:
+            self.gui.products_view.show_all()
+
+    def refresh_products_view(self):
+        """Update the product rows in view after a sale or restock"""
+        view = getattr(self.gui, "products_view", None)
+        if view is not None:
+            view.refresh()
+
+    def add_customer(self):
+        """Add new customer"""
+        data = {k: v.get() for k, v in self.gui.customer_entries.items()}
+
+        if not data['name']:
+            messagebox.showerror("Error", "Customer name is required")
+            return
+
+        self.background(self.store.add_customer, data['name'], data['email'], data['phone'],
+                        data['address'], on_done=lambda _: messagebox.showinfo("Success", "Customer added successfully!"),
+                        log="Customer add error", error="Failed to add customer")
+
+    def sell_product(self):
+        """Process product sales; a basket can hold any number of lines"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Sell Products")
+        dialog.geometry("400x500")
+
+        ttk.Label(dialog, text="Customer Name:").pack()
+        customer_name = ttk.Entry(dialog)
+        customer_name.pack()
+
+        ttk.Label(dialog, text="Product ID:").pack()
+        product_id = ttk.Entry(dialog)
+        product_id.pack()
+
+        ttk.Label(dialog, text="Quantity:").pack()
+        quantity = ttk.Entry(dialog)
+        quantity.pack()
+
+        basket = []
+        basket_list = tk.Listbox(dialog, height=8)
+
+        def add_item():
+            try:
+                qty = int(quantity.get())
+            except ValueError:
+                messagebox.showerror("Error", "Quantity must be a number")
+                return False
+            if qty <= 0:
+                messagebox.showerror("Error", "Quantity must be positive")
+                return False
+            basket.append((product_id.get().strip(), qty))
+            basket_list.insert(tk.END, f"{product_id.get().strip()} x {qty}")
+            product_id.delete(0, tk.END)
+            quantity.delete(0, tk.END)
+            return True
+
+        ttk.Button(dialog, text="Add Item", command=add_item).pack(pady=5)
+        basket_list.pack(fill='x', padx=10)
+
+        payment_methods = ["Cash", "Credit Card", "UPI"]
+        ttk.Label(dialog, text="Payment Method:").pack()
+        payment_method = ttk.Combobox(dialog, values=payment_methods)
+        payment_method.pack()
+
+        def submit():
+            # A line still in the entry boxes counts as part of the basket
+            if product_id.get().strip() and not add_item():
+                return
+            customer, payment, staff = customer_name.get(), payment_method.get(), self.current_user
+            # One click, one sale: the button stays disabled until this one finishes
+            submit_button.state(['disabled'])
+
+            def sell():
+                return self.store.checkout(customer, list(basket), payment, staff=staff)
+
+            def send_receipt(sale_id, lines):
+                receipt = self.write_receipt(sale_id, lines, customer, payment)
+                self.store.email_receipt(f"{customer}@example.com", receipt)
+
+            def done(result):
+                # The sale has committed: a receipt that fails now is logged, and
+                # must not put the basket back up to be charged a second time
+                sale_id, lines = result
+                self.tasks.submit(send_receipt, sale_id, lines,
+                                  on_error=lambda e: logging.error(f"Receipt error for sale {sale_id}: {e}"))
+                self.refresh_products_view()
+                messagebox.showinfo("Success", f"Sale completed! {random.choice(self.MESSAGES)}")
+                dialog.destroy()
+
+            def failed(e):
+                if dialog.winfo_exists():
+                    submit_button.state(['!disabled'])
+
+            self.background(sell, on_done=done, on_error=failed,
+                            log="Sale error", error="Failed to process sale")
+
+        submit_button = ttk.Button(dialog, text="Submit Sale", command=submit)
+        submit_button.pack(pady=10)
+
+    def write_receipt(self, sale_id, lines, customer, payment_method):
+        """Write a sale's receipt file; returns the receipt text"""
+        total = sum(line[6] for line in lines)
+        items = ""
+        for pid, name, brand, qty, free_qty, selling_price, subtotal in lines:
+            items += f"Item: {name} ({brand})\n"
+            items += f"Quantity: {qty} + {free_qty} free\n"
+            items += f"Price: Rs. {selling_price:,.2f} each\n"
+            items += f"Subtotal: Rs. {subtotal:,.2f}\n"
+        receipt = f"""
+WeCare Store Receipt
+==================
+Customer: {customer}
+Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+------------------
+{items}Payment Method: {payment_method}
+------------------
+Total: Rs. {total:,.2f}
+==================
+"""
+        os.makedirs("receipts", exist_ok=True)
+        with open(f"receipts/receipt_{sale_id}.txt", "w") as f:
+            f.write(receipt)
+        return receipt
+
+    def restock_product(self):
+        """Process product restocking"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Restock Products")
+        dialog.geometry("400x500")
+
+        fields = ["Product ID", "Name", "Brand", "Category", "Subcategory", "Quantity", "Cost Price", "Origin"]
+        entries = {}
+        
+        for i, field in enumerate(fields):
+            ttk.Label(dialog, text=f"{field}:").pack()
+            entry = ttk.Entry(dialog)
+            entry.pack()
+            entries[field.lower().replace(" ", "_")] = entry
+
+        def submit():
+            try:
+                qty = int(entries['quantity'].get())
+                cost = float(entries['cost_price'].get())
+            except ValueError as e:
+                logging.error(f"Restock error: {e}")
+                messagebox.showerror("Error", "Failed to restock product")
+                return
+            if qty <= 0 or cost <= 0:
+                messagebox.showerror("Error", "Quantity and cost must be positive")
+                return
+            fields = {k: entries[k].get() for k in ('name', 'brand', 'category', 'subcategory', 'origin')}
+            submit_button.state(['disabled'])
+
+            def done(_):
+                self.refresh_products_view()
+                messagebox.showinfo("Success", "Product restocked successfully!")
+                dialog.destroy()
+
+            def failed(e):
+                if dialog.winfo_exists():
+                    submit_button.state(['!disabled'])
+
+            self.background(self.store.restock, entries['product_id'].get(), qty, cost, **fields,
+                            on_done=done, on_error=failed,
+                            log="Restock error", error="Failed to restock product")
+
+        submit_button = ttk.Button(dialog, text="Submit Restock", command=submit)
+        submit_button.pack(pady=10)
+
+    def bulk_import(self):
+        """Import a CSV/JSONL supplier manifest and write one supplier invoice"""
+        path = filedialog.askopenfilename(title="Supplier Manifest",
+                                          filetypes=[("Manifests", "*.csv *.jsonl"), ("All files", "*.*")])
+        if not path:
+            return
+
+        def import_manifest():
+            result = bulk.import_into_store(self.store, path)
+            try:
+                if result.imported:
+                    Path("invoices").mkdir(exist_ok=True)
+                    invoice_file = f"invoices/supplier_invoice_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+                    with open(invoice_file, "w") as f:
+                        f.write(f"WeCare Store Supplier Invoice\n==================\n"
+                                f"Manifest: {os.path.basename(path)}\n"
+                                f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                                f"------------------\n")
+                        for line in result.invoice_lines():
+                            f.write(line + "\n")
+                        f.write(f"------------------\nTotal Cost: Rs. {result.total_cost:,.2f}\n")
+
+                message = f"Imported {result.imported} products."
+                if result.error_count:
+                    message += f"\n{result.error_count} rows rejected, e.g.:\n"
+                    message += "\n".join(f"Line {n}: {m}" for n, m in result.errors[:5])
+                return message
+            finally:
+                result.close()
+
+        def done(message):
+            self.refresh_products_view()
+            messagebox.showinfo("Bulk Import", message)
+
+        self.background(import_manifest, on_done=done,
+                        log="Bulk import error", error="Failed to import products")
+
+    def bulk_export(self):
+        """Export all products to CSV/JSONL"""
+        path = filedialog.asksaveasfilename(title="Export Products", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
+        if not path:
+            return
+        self.background(bulk.export_from_store, self.store, path,
+                        on_done=lambda count: messagebox.showinfo("Export", f"Exported {count} products"),
+                        log="Export error", error="Failed to export products")
+
+    def stock_alert(self):
+        """Generate and display stock alerts"""
+        def show(low_stock):
+            alert_text = "Stock Alerts\n" + "="*50 + "\n"
+            for product_id, name, brand, quantity, reorder_point, order_quantity in low_stock:
+                alert_text += f"⚠️ {name} ({brand}) - Only {quantity} left!"
+                if reorder_point is not None:
+                    alert_text += f" Reorder point {reorder_point:.0f}, order {order_quantity}"
+                alert_text += "\n"
+
+            if not low_stock:
+                alert_text += "All products have sufficient stock levels.\n"
+
+            messagebox.showinfo("Stock Alerts", alert_text)
+
+        # Open alerts are raised as sales land; reorder points come from
+        # each product's forecast demand and lead time
+        self.background(self.store.stock_alerts, on_done=show,
+                        log="Stock alert error", error="Failed to generate stock alerts")
+
+    def view_sales_report(self):
+        """View sales reports, filtered by date range and staff, loaded a page at a time"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Sales Reports")
+        dialog.geometry("600x450")
+
+        filters = ttk.Frame(dialog)
+        filters.pack(fill='x')
+        entries = {}
+        for i, field in enumerate(["From (YYYY-MM-DD)", "To (YYYY-MM-DD)", "Staff"]):
+            ttk.Label(filters, text=f"{field}:").grid(row=0, column=2 * i, padx=2)
+            entry = ttk.Entry(filters, width=12)
+            entry.grid(row=0, column=2 * i + 1, padx=2)
+            entries[i] = entry
+
+        text_area = scrolledtext.ScrolledText(dialog, height=20)
+        text_area.pack(expand=True, fill='both')
+        # Bumped on every new report so a superseded one stops loading pages
+        generation = [0]
+
+        def current_filters():
+            return [entries[i].get().strip() or None for i in range(3)]
+
+        def show():
+            generation[0] += 1
+            run = generation[0]
+            filters = current_filters()
+            try:
+                # Checked here, on the Tk thread, so a bad date never reaches a page fetch
+                reports.sales_filters(*filters)
+                pages = self.store.iter_sales_pages(*filters)
+            except ValueError:
+                messagebox.showerror("Error", "Dates must be YYYY-MM-DD")
+                return
+            # A new report supersedes the pages still on their way for the last one
+            key = ("sales report", id(dialog))
+
+            def summary():
+                try:
+                    return self.store.sales_summary(*filters)
+                except (sqlite3.Error, StoreError) as e:
+                    logging.error(f"Sales summary error: {e}")
+                    return 0, 0.0
+
+            def show_summary(result):
+                if run != generation[0] or not dialog.winfo_exists():
+                    return
+                sales, revenue = result
+                text_area.config(state='normal')
+                text_area.delete('1.0', tk.END)
+                text_area.insert(tk.END, reports.REPORT_HEADER)
+                text_area.insert(tk.END, f"Items sold: {sales}  |  Revenue: Rs. {revenue:,.2f}\n" + "=" * 50 + "\n")
+                load_next_page()
+
+            def load_next_page():
+                self.background(next, pages, None, on_done=show_page, key=key,
+                                log="Sales report error", error="Failed to generate sales report")
+
+            def show_page(rows):
+                if run != generation[0] or not dialog.winfo_exists():
+                    return
+                if rows is None:
+                    text_area.config(state='disabled')
+                    return
+                text_area.insert(tk.END, reports.format_page(rows))
+                load_next_page()
+
+            self.background(summary, on_done=show_summary, key=key)
+
+        def save():
+            path = filedialog.asksaveasfilename(title="Save Sales Report", defaultextension=".txt")
+            if not path:
+                return
+            filters = current_filters()
+            try:
+                reports.sales_filters(*filters)
+                pages = self.store.iter_sales_pages(*filters)
+            except ValueError:
+                messagebox.showerror("Error", "Dates must be YYYY-MM-DD")
+                return
+
+            def write():
+                with open(path, "w") as f:
+                    return reports.write_pages(f, pages)
+
+            self.background(write, on_done=lambda count: messagebox.showinfo("Success", f"Saved {count} sales to {path}"),
+                            log="Sales report error", error="Failed to save sales report")
+
+        buttons = ttk.Frame(dialog)
+        buttons.pack(pady=5)
+        ttk.Button(buttons, text="Show", command=show).pack(side='left', padx=5)
+        ttk.Button(buttons, text="Save to File", command=save).pack(side='left', padx=5)
+        show()
+
+    def logout(self):
+        """Handle logout"""
+        self.current_user = None
+        self.gui.notebook.select(self.gui.login_frame)
+        messagebox.showinfo("Success", "Logged out successfully")
+
+    def run(self):
+        """Run the application"""
+        try:
+            if self.db is not None:
+                self.backups.start()
+                self.notification.start()
+                self.stock_alerts.start()
+            self.root.mainloop()
+            self.tasks.close()
+            if self.db is None:
+                self.store.close()
+                return
+            self.backups.close()
+            self.stock_alerts.close()
+            self.ecommerce.close()
+            self.notification.close()
+            self.db.close()
+            self.db.oplog.close()
+        except Exception as e:
+            logging.error(f"Application error: {e}")
             messagebox.showerror("Error", "Application crashed")
\ No newline at end of file
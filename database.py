@@ -1,85 +1,946 @@
-import sqlite3
-import os
-from datetime import datetime
-from pathlib import Path
-import shutil
-import logging
-
-class DatabaseManager:
-    def __init__(self, db_name="wecare.db"):
-        self.db_name = db_name
-        self.backup_folder = "wecare_backups"
-        self.init_database()
-
-    def init_database(self):
-        try:
-            with sqlite3.connect(self.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS users (
-                        username TEXT PRIMARY KEY,
-                        password TEXT NOT NULL,
-                        email TEXT UNIQUE NOT NULL,
-                        full_name TEXT NOT NULL,
-                        phone TEXT NOT NULL
-                    )
-                """)
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS products (
-                        product_id TEXT PRIMARY KEY,
-                        name TEXT NOT NULL,
-                        brand TEXT NOT NULL,
-                        category TEXT NOT NULL,
-                        subcategory TEXT NOT NULL,
-                        quantity INTEGER NOT NULL,
-                        cost_price REAL NOT NULL,
-                        origin TEXT NOT NULL
-                    )
-                """)
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS customers (
-                        customer_id TEXT PRIMARY KEY,
-                        name TEXT NOT NULL,
-                        email TEXT,
-                        phone TEXT,
-                        address TEXT
-                    )
-                """)
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS purchases (
-                        purchase_id TEXT PRIMARY KEY,
-                        customer_id TEXT,
-                        product_id TEXT,
-                        quantity INTEGER NOT NULL,
-                        total REAL NOT NULL,
-                        payment_method TEXT NOT NULL,
-                        purchase_date TEXT NOT NULL,
-                        FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
-                        FOREIGN KEY (product_id) REFERENCES products(product_id)
-                    )
-                """)
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS recovery_codes (
-                        username TEXT,
-                        code TEXT NOT NULL,
-                        created_at TEXT NOT NULL,
-                        FOREIGN KEY (username) REFERENCES users(username)
-                    )
-                """)
-                cursor.execute("SELECT COUNT(*) FROM users")
-                if cursor.fetchone()[0] == 0:
-                    cursor.execute("INSERT INTO users VALUES (?, ?, ?, ?, ?)",
-                                  ('admin', 'password123', 'admin@wecare.com', 'Administrator', '12345'))
-                conn.commit()
-                logging.info("Database initialized successfully")
-        except sqlite3.Error as e:
-            logging.error(f"Database initialization error: {e}")
-
-    def backup_database(self):
-        try:
-            Path(self.backup_folder).mkdir(exist_ok=True)
-            backup_file = f"{self.backup_folder}/backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-            shutil.copy(self.db_name, backup_file)
-            logging.info(f"Database backed up to {backup_file}")
-        except Exception as e:
-            logging.error(f"Database backup error: {e}")
\ No newline at end of file
+import sqlite3
+import os
+import re
+from datetime import datetime
+import logging
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+try:
+    from .forecast import Forecast, FALLBACK_THRESHOLD, LEAD_TIME_DAYS, day_number
+    from .backup import take_backup, BackupCancelled, RETENTION
+    from .bulk import UPSERT_SQL
+except ImportError:
+    from forecast import Forecast, FALLBACK_THRESHOLD, LEAD_TIME_DAYS, day_number
+    from backup import take_backup, BackupCancelled, RETENTION
+    from bulk import UPSERT_SQL
+
+# Connection tuning applied to every pooled connection
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,       # ~16 MB page cache per connection
+    "mmap_size": 268435456,     # 256 MB memory-mapped reads
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+# Recomputes the daily sales rollups from the purchases table
+ROLLUP_REBUILD = [
+    "DELETE FROM sales_daily_product",
+    "DELETE FROM sales_daily_payment",
+    "DELETE FROM sales_daily_staff",
+    """INSERT INTO sales_daily_product
+       SELECT substr(purchase_date, 1, 10), product_id, COUNT(*), SUM(quantity),
+              SUM(quantity / 3), SUM(total)
+       FROM purchases GROUP BY 1, 2""",
+    """INSERT INTO sales_daily_payment
+       SELECT substr(purchase_date, 1, 10), payment_method, COUNT(*), SUM(total)
+       FROM purchases GROUP BY 1, 2""",
+    """INSERT INTO sales_daily_staff
+       SELECT substr(purchase_date, 1, 10), COALESCE(staff, ''), COUNT(*), SUM(total)
+       FROM purchases GROUP BY 1, 2""",
+]
+
+
+# A product's low-stock threshold: its reorder point once it has sales
+# history, otherwise the fixed quantity < FALLBACK_THRESHOLD rule
+LOW_STOCK_THRESHOLD = f"""COALESCE(
+    (SELECT reorder_point FROM demand_forecast
+     WHERE product_id = new.product_id AND day IS NOT NULL),
+    {FALLBACK_THRESHOLD - 1})"""
+
+# Raise (or refresh) the open alert of a product whose forecast threshold it is at or below
+RAISE_ALERT_SQL = """
+    INSERT INTO stock_alerts (product_id, quantity, threshold)
+    SELECT p.product_id, p.quantity, f.reorder_point
+    FROM products p JOIN demand_forecast f ON f.product_id = p.product_id
+    WHERE p.product_id = ? AND f.day IS NOT NULL AND p.quantity <= f.reorder_point
+    ON CONFLICT(product_id) WHERE resolved_at IS NULL
+    DO UPDATE SET quantity = excluded.quantity, threshold = excluded.threshold
+"""
+
+# Resolve the open alert of a product now above its (lowered) threshold
+RESOLVE_ALERT_SQL = """
+    UPDATE stock_alerts SET resolved_at = CURRENT_TIMESTAMP
+    WHERE product_id = ?1 AND resolved_at IS NULL
+      AND (SELECT quantity FROM products WHERE product_id = ?1) > ?2
+"""
+
+FORECAST_UPSERT = """
+    INSERT INTO demand_forecast (product_id, level, variance, day, pending, started, reorder_point, as_of)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(product_id) DO UPDATE SET
+        level = excluded.level, variance = excluded.variance, day = excluded.day,
+        pending = excluded.pending, started = excluded.started,
+        reorder_point = excluded.reorder_point, as_of = excluded.as_of
+"""
+
+# Add stock to a product, creating it if it is new; one statement, so two
+# tills restocking a new product cannot collide
+RESTOCK_SQL = """
+    INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(product_id) DO UPDATE SET
+        quantity = quantity + excluded.quantity, cost_price = excluded.cost_price,
+        name = excluded.name, brand = excluded.brand, category = excluded.category,
+        subcategory = excluded.subcategory, origin = excluded.origin
+"""
+
+def add_column(table, definition):
+    """Migration step adding a column unless the table was created with it"""
+    def step(conn):
+        name = definition.split()[0]
+        if name not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {definition}")
+    return step
+
+
+def seed_forecasts(conn):
+    """Rebuild demand forecasts from the daily product sales rollup"""
+    forecasts = {}
+    for pid, day, units in conn.execute("""
+        SELECT product_id, day, quantity + free_quantity FROM sales_daily_product
+        ORDER BY product_id, day
+    """):
+        forecast = forecasts.get(pid)
+        if forecast is None:
+            forecast = forecasts[pid] = Forecast()
+        forecast.observe(datetime.strptime(day, "%Y-%m-%d").toordinal(), units)
+    conn.execute("DELETE FROM demand_forecast WHERE product_id NOT IN (SELECT product_id FROM products)")
+    lead_times = dict(conn.execute("SELECT product_id, lead_time FROM demand_forecast"))
+    today = day_number()
+    conn.executemany(FORECAST_UPSERT, [
+        (pid, *forecast.as_row(), forecast.reorder_point(today, lead_times.get(pid, LEAD_TIME_DAYS)), today)
+        for pid, forecast in forecasts.items()])
+
+
+
+# Versioned schema migrations applied on top of the base tables in order.
+# PRAGMA user_version records how many have run; append new steps, never edit old ones.
+# A step is an SQL statement or a function called with the connection.
+MIGRATIONS = [
+    # 1: secondary indexes for customer lookup, the sales report join and stock alerts
+    [
+        "CREATE INDEX IF NOT EXISTS idx_customers_name ON customers(name)",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_date ON purchases(purchase_date)",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_customer ON purchases(customer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_product ON purchases(product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_quantity ON products(quantity)",
+    ],
+    # 2: FTS5 product search index, kept in sync with products by triggers
+    [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            name, brand, category, subcategory, origin,
+            content='products', content_rowid='rowid', prefix='2 3'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts(rowid, name, brand, category, subcategory, origin)
+            VALUES (new.rowid, new.name, new.brand, new.category, new.subcategory, new.origin);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, brand, category, subcategory, origin)
+            VALUES ('delete', old.rowid, old.name, old.brand, old.category, old.subcategory, old.origin);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS products_fts_update
+        AFTER UPDATE OF name, brand, category, subcategory, origin ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, brand, category, subcategory, origin)
+            VALUES ('delete', old.rowid, old.name, old.brand, old.category, old.subcategory, old.origin);
+            INSERT INTO products_fts(rowid, name, brand, category, subcategory, origin)
+            VALUES (new.rowid, new.name, new.brand, new.category, new.subcategory, new.origin);
+        END""",
+        "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+    ],
+    # 3: change-data-capture feed of product changes with per-consumer cursors
+    [
+        """CREATE TABLE IF NOT EXISTS product_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id TEXT NOT NULL,
+            operation TEXT NOT NULL,
+            changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """CREATE TABLE IF NOT EXISTS change_cursors (
+            consumer TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS products_cdc_insert AFTER INSERT ON products BEGIN
+            INSERT INTO product_changes(product_id, operation) VALUES (new.product_id, 'insert');
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS products_cdc_update
+        AFTER UPDATE OF name, brand, category, subcategory, quantity, cost_price, origin ON products
+        WHEN old.name IS NOT new.name OR old.brand IS NOT new.brand
+            OR old.category IS NOT new.category OR old.subcategory IS NOT new.subcategory
+            OR old.quantity IS NOT new.quantity OR old.cost_price IS NOT new.cost_price
+            OR old.origin IS NOT new.origin
+        BEGIN
+            INSERT INTO product_changes(product_id, operation) VALUES (new.product_id, 'update');
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS products_cdc_delete AFTER DELETE ON products BEGIN
+            INSERT INTO product_changes(product_id, operation) VALUES (old.product_id, 'delete');
+        END""",
+        # Existing products are shipped once to every consumer
+        "INSERT INTO product_changes(product_id, operation) SELECT product_id, 'insert' FROM products",
+    ],
+    # 4: persistent outbox drained by the notification dispatcher
+    [
+        """CREATE TABLE IF NOT EXISTS notification_outbox (
+            message_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel TEXT NOT NULL,
+            recipient TEXT NOT NULL,
+            subject TEXT,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            sent_at REAL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_outbox_status ON notification_outbox(status, next_attempt_at)",
+    ],
+    # 5: purchase rows from one basket share a sale id
+    [
+        "ALTER TABLE purchases ADD COLUMN sale_id TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_sale ON purchases(sale_id)",
+    ],
+    # 6: staff on purchases, and keyset-pagination indexes for the sales report
+    [
+        "ALTER TABLE purchases ADD COLUMN staff TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_date_id ON purchases(purchase_date, purchase_id)",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_staff ON purchases(staff, purchase_date, purchase_id)",
+    ],
+    # 7: daily sales rollups maintained by a trigger as each purchase row commits
+    [
+        """CREATE TABLE IF NOT EXISTS sales_daily_product (
+            day TEXT NOT NULL,
+            product_id TEXT NOT NULL,
+            sales INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            free_quantity INTEGER NOT NULL,
+            revenue REAL NOT NULL,
+            PRIMARY KEY (day, product_id)
+        ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS sales_daily_payment (
+            day TEXT NOT NULL,
+            payment_method TEXT NOT NULL,
+            sales INTEGER NOT NULL,
+            revenue REAL NOT NULL,
+            PRIMARY KEY (day, payment_method)
+        ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS sales_daily_staff (
+            day TEXT NOT NULL,
+            staff TEXT NOT NULL,
+            sales INTEGER NOT NULL,
+            revenue REAL NOT NULL,
+            PRIMARY KEY (day, staff)
+        ) WITHOUT ROWID""",
+        """CREATE TRIGGER IF NOT EXISTS purchases_rollup AFTER INSERT ON purchases BEGIN
+            INSERT INTO sales_daily_product
+            VALUES (substr(new.purchase_date, 1, 10), new.product_id, 1,
+                    new.quantity, new.quantity / 3, new.total)
+            ON CONFLICT(day, product_id) DO UPDATE SET
+                sales = sales + 1, quantity = quantity + excluded.quantity,
+                free_quantity = free_quantity + excluded.free_quantity,
+                revenue = revenue + excluded.revenue;
+            INSERT INTO sales_daily_payment
+            VALUES (substr(new.purchase_date, 1, 10), new.payment_method, 1, new.total)
+            ON CONFLICT(day, payment_method) DO UPDATE SET
+                sales = sales + 1, revenue = revenue + excluded.revenue;
+            INSERT INTO sales_daily_staff
+            VALUES (substr(new.purchase_date, 1, 10), COALESCE(new.staff, ''), 1, new.total)
+            ON CONFLICT(day, staff) DO UPDATE SET
+                sales = sales + 1, revenue = revenue + excluded.revenue;
+        END""",
+        *ROLLUP_REBUILD,
+    ],
+    # 8: per-product demand forecasts (smoothed daily demand) and reorder points
+    [
+        """CREATE TABLE IF NOT EXISTS demand_forecast (
+            product_id TEXT PRIMARY KEY,
+            level REAL,
+            variance REAL NOT NULL DEFAULT 0,
+            day INTEGER,
+            pending INTEGER NOT NULL DEFAULT 0,
+            started INTEGER,
+            lead_time INTEGER NOT NULL DEFAULT 7,
+            reorder_point REAL NOT NULL DEFAULT 0,
+            as_of INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_forecast_as_of ON demand_forecast(as_of)",
+        seed_forecasts,
+    ],
+    # 9: low-stock alerts raised when stock drops to the reorder point, one open alert per product
+    [
+        """CREATE TABLE IF NOT EXISTS stock_alerts (
+            alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            threshold REAL NOT NULL,
+            raised_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            notified_at TEXT,
+            resolved_at TEXT
+        )""",
+        """CREATE UNIQUE INDEX IF NOT EXISTS idx_stock_alerts_open
+           ON stock_alerts(product_id) WHERE resolved_at IS NULL""",
+        """CREATE INDEX IF NOT EXISTS idx_stock_alerts_pending
+           ON stock_alerts(alert_id) WHERE notified_at IS NULL""",
+        f"""CREATE TRIGGER IF NOT EXISTS products_stock_alert
+        AFTER UPDATE OF quantity ON products
+        WHEN new.quantity < old.quantity AND new.quantity <= {LOW_STOCK_THRESHOLD}
+        BEGIN
+            INSERT INTO stock_alerts (product_id, quantity, threshold)
+            VALUES (new.product_id, new.quantity, {LOW_STOCK_THRESHOLD})
+            ON CONFLICT(product_id) WHERE resolved_at IS NULL
+            DO UPDATE SET quantity = excluded.quantity;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS products_stock_alert_insert
+        AFTER INSERT ON products
+        WHEN new.quantity <= {LOW_STOCK_THRESHOLD}
+        BEGIN
+            INSERT INTO stock_alerts (product_id, quantity, threshold)
+            VALUES (new.product_id, new.quantity, {LOW_STOCK_THRESHOLD})
+            ON CONFLICT(product_id) WHERE resolved_at IS NULL
+            DO UPDATE SET quantity = excluded.quantity;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS products_stock_resolved
+        AFTER UPDATE OF quantity ON products
+        WHEN new.quantity > old.quantity
+        BEGIN
+            UPDATE stock_alerts SET resolved_at = CURRENT_TIMESTAMP
+            WHERE product_id = new.product_id AND resolved_at IS NULL
+              AND new.quantity > threshold;
+        END""",
+        f"""INSERT INTO stock_alerts (product_id, quantity, threshold)
+            SELECT p.product_id, p.quantity, COALESCE(f.reorder_point, {FALLBACK_THRESHOLD - 1})
+            FROM products p
+            LEFT JOIN demand_forecast f ON f.product_id = p.product_id AND f.day IS NOT NULL
+            WHERE p.quantity <= COALESCE(f.reorder_point, {FALLBACK_THRESHOLD - 1})""",
+    ],
+    # 10: one index per sortable product column, ending in product_id so a
+    # sorted page of the product view is an index range scan
+    [
+        "CREATE INDEX IF NOT EXISTS idx_products_name ON products(name, product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_brand ON products(brand, product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_category ON products(category, product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_subcategory ON products(subcategory, product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_cost ON products(cost_price, product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_quantity_id ON products(quantity, product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_origin ON products(origin, product_id)",
+    ],
+    # 11: number of the last sell/restock, bumped in the same transaction, so
+    # a backup records which operation log entries it already contains
+    [
+        """CREATE TABLE IF NOT EXISTS oplog_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            seq INTEGER NOT NULL,
+            at TEXT NOT NULL
+        )""",
+        "INSERT OR IGNORE INTO oplog_state VALUES (1, 0, '')",
+    ],
+    # 12: outbox claims are leases, so a message another process is sending
+    # is only taken over once its lease has run out
+    [
+        "ALTER TABLE notification_outbox ADD COLUMN claimed_at REAL",
+        "ALTER TABLE notification_outbox ADD COLUMN claimed_by TEXT",
+    ],
+    # 13: forecasts remember the (partial) day they started on and are
+    # rebuilt so smoothing starts from the first complete day. Migration 8
+    # creates the column already, as its seeding writes it.
+    [
+        add_column("demand_forecast", "started INTEGER"),
+        seed_forecasts,
+    ],
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# Columns the product view can sort by; each has an index from migration 10
+PRODUCT_SORT_COLUMNS = ("product_id", "name", "brand", "category", "subcategory",
+                        "cost_price", "quantity", "origin")
+
+# Hot queries issued by core.WeCareSystem, with sample parameters for EXPLAIN QUERY PLAN
+HOT_QUERIES = {
+    "login": ("SELECT password, email FROM users WHERE username = ?", ("admin",)),
+    "product lookup": ("SELECT * FROM products WHERE product_id = ?", ("P001",)),
+    "customer lookup": ("SELECT customer_id FROM customers WHERE name = ?", ("Walk-in",)),
+    "stock alert": ("""
+        SELECT p.product_id FROM stock_alerts a
+        JOIN products p ON p.product_id = a.product_id
+        WHERE a.resolved_at IS NULL
+    """, ()),
+    "pending stock alerts": ("""
+        SELECT alert_id FROM stock_alerts WHERE notified_at IS NULL ORDER BY alert_id LIMIT 500
+    """, ()),
+    "stale reorder points": ("SELECT product_id FROM demand_forecast WHERE as_of < ?", (0,)),
+    "sales report page": ("""
+        SELECT p.purchase_date, p.purchase_id, c.name, pr.name, p.quantity, p.total,
+               p.payment_method, p.staff
+        FROM purchases p
+        JOIN customers c ON p.customer_id = c.customer_id
+        JOIN products pr ON p.product_id = pr.product_id
+        WHERE (p.purchase_date, p.purchase_id) > (?, ?)
+        ORDER BY p.purchase_date, p.purchase_id
+        LIMIT 500
+    """, ("2024-01-01", "")),
+    "staff sales report page": ("""
+        SELECT p.purchase_date, p.purchase_id FROM purchases p
+        WHERE (p.purchase_date, p.purchase_id) > (?, ?) AND p.staff = ?
+        ORDER BY p.purchase_date, p.purchase_id
+        LIMIT 500
+    """, ("2024-01-01", "", "admin")),
+    "product search": ("""
+        SELECT p.* FROM products_fts f JOIN products p ON p.rowid = f.rowid
+        WHERE products_fts MATCH ? ORDER BY bm25(products_fts) LIMIT 50
+    """, ('"cetaphil"*',)),
+    "sorted product page": ("SELECT * FROM products ORDER BY brand, product_id LIMIT 200 OFFSET ?",
+                            (1000,)),
+    "next sorted product page": ("SELECT * FROM products WHERE (brand, product_id) > (?, ?) "
+                                 "ORDER BY brand, product_id LIMIT 200", ("Cetaphil", "P001")),
+    "change feed": ("""
+        SELECT seq, product_id FROM product_changes WHERE seq > ? ORDER BY seq LIMIT 500
+    """, (0,)),
+    "product sales": ("SELECT SUM(quantity), SUM(total) FROM purchases WHERE product_id = ?", ("P001",)),
+}
+
+class DatabaseManager:
+    def __init__(self, db_name="wecare.db", readers=3, oplog=None):
+        self.db_name = db_name
+        self.backup_folder = "wecare_backups"
+        # Sales and restocks are appended here once committed (see oplog.OpLog)
+        self.oplog = oplog
+        self.max_readers = readers
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._writer_owner = None
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._pool_lock = threading.Lock()
+        self.init_database()
+
+    def connect(self, read_only=False):
+        """Open a tuned connection that can be shared across threads"""
+        conn = sqlite3.connect(self.db_name, timeout=30, check_same_thread=False)
+        for pragma, value in PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma}={value}")
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """Hand out the single writer connection; commits on success, rolls back on error
+
+        Not re-entrant: anything that takes the writer itself, such as
+        queueing a notification, belongs after the block, not inside it.
+        """
+        if self._writer_owner == threading.get_ident():
+            raise RuntimeError("writer() is already held by this thread")
+        with self._writer_lock:
+            self._writer_owner = threading.get_ident()
+            try:
+                if self._writer is None:
+                    self._writer = self.connect()
+                try:
+                    yield self._writer
+                    self._writer.commit()
+                except BaseException:
+                    self._writer.rollback()
+                    raise
+            finally:
+                self._writer_owner = None
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection from the pool"""
+        conn = None
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                if self._reader_count < self.max_readers:
+                    self._reader_count += 1
+                    conn = self.connect(read_only=True)
+            if conn is None:
+                conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._pool_lock:
+            while not self._readers.empty():
+                self._readers.get_nowait().close()
+            self._reader_count = 0
+
+    def init_database(self):
+        try:
+            with self.writer() as conn:
+                # A database already at the current schema version needs no DDL
+                if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+                    logging.info("Database schema is current")
+                    return
+                cursor = conn.cursor()
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS users (
+                        username TEXT PRIMARY KEY,
+                        password TEXT NOT NULL,
+                        email TEXT UNIQUE NOT NULL,
+                        full_name TEXT NOT NULL,
+                        phone TEXT NOT NULL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS products (
+                        product_id TEXT PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        brand TEXT NOT NULL,
+                        category TEXT NOT NULL,
+                        subcategory TEXT NOT NULL,
+                        quantity INTEGER NOT NULL,
+                        cost_price REAL NOT NULL,
+                        origin TEXT NOT NULL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS customers (
+                        customer_id TEXT PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        email TEXT,
+                        phone TEXT,
+                        address TEXT
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS purchases (
+                        purchase_id TEXT PRIMARY KEY,
+                        customer_id TEXT,
+                        product_id TEXT,
+                        quantity INTEGER NOT NULL,
+                        total REAL NOT NULL,
+                        payment_method TEXT NOT NULL,
+                        purchase_date TEXT NOT NULL,
+                        FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
+                        FOREIGN KEY (product_id) REFERENCES products(product_id)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS recovery_codes (
+                        username TEXT,
+                        code TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        FOREIGN KEY (username) REFERENCES users(username)
+                    )
+                """)
+                cursor.execute("SELECT COUNT(*) FROM users")
+                if cursor.fetchone()[0] == 0:
+                    cursor.execute("INSERT INTO users VALUES (?, ?, ?, ?, ?)",
+                                  ('admin', 'password123', 'admin@wecare.com', 'Administrator', '12345'))
+                conn.commit()
+                self.migrate(conn)
+                logging.info("Database initialized successfully")
+        except sqlite3.Error as e:
+            logging.error(f"Database initialization error: {e}")
+
+    def migrate(self, conn):
+        """Apply pending schema migrations, each in its own transaction"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+            conn.execute("BEGIN")
+            try:
+                for statement in statements:
+                    if callable(statement):
+                        statement(conn)
+                    else:
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {number}")
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+            logging.info(f"Database migrated to schema version {number}")
+
+    def search_products(self, keyword, limit=100):
+        """Ranked full-text product search; every word is matched as a prefix"""
+        terms = re.findall(r"\w+", keyword.lower())
+        if not terms:
+            return []
+        query = " ".join(f'"{term}"*' for term in terms)
+        with self.reader() as conn:
+            # Name matches weigh most, then brand, category, subcategory and origin
+            return conn.execute("""
+                SELECT p.* FROM products_fts f
+                JOIN products p ON p.rowid = f.rowid
+                WHERE products_fts MATCH ?
+                ORDER BY bm25(products_fts, 10.0, 5.0, 2.0, 1.0, 1.0)
+                LIMIT ?
+            """, (query, limit)).fetchall()
+
+    def product_count(self):
+        with self.reader() as conn:
+            return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def products_page(self, order="product_id", descending=False, offset=0, limit=200, after=None):
+        """One page of products sorted by a column, ties broken by product_id
+
+        With after, the (sort value, product_id) of the row before the page,
+        the page is found by a keyset seek and offset is ignored; otherwise
+        offset rows of the index are skipped, which lets the view jump to any
+        scroll position.
+        """
+        if order not in PRODUCT_SORT_COLUMNS:
+            raise ValueError(f"Cannot sort products by {order}")
+        direction = "DESC" if descending else "ASC"
+        keys = "product_id" if order == "product_id" else f"{order}, product_id"
+        sql, params = "SELECT * FROM products", []
+        if after is not None:
+            if order == "product_id":
+                sql += f" WHERE product_id {'<' if descending else '>'} ?"
+                params.append(after[-1])
+            else:
+                sql += f" WHERE ({keys}) {'<' if descending else '>'} (?, ?)"
+                params.extend(after)
+            offset = 0
+        sql += f" ORDER BY {keys.replace(',', f' {direction},')} {direction} LIMIT ? OFFSET ?"
+        with self.reader() as conn:
+            return conn.execute(sql, params + [limit, offset]).fetchall()
+
+    def checkout(self, customer_name, items, payment_method, staff=None):
+        """Sell a basket of (product_id, quantity) lines in one transaction
+
+        Every third paid unit earns one free unit (Buy 3 Get 1 Free). Returns
+        (sale_id, lines), each line being (product_id, name, brand, qty,
+        free_qty, selling_price, total). Raises ValueError if any line is
+        invalid, in which case nothing is written.
+        """
+        basket = {}
+        for product_id, qty in items:
+            if qty <= 0:
+                raise ValueError("Quantity must be positive")
+            basket[product_id] = basket.get(product_id, 0) + qty
+        if not basket:
+            raise ValueError("The basket is empty")
+
+        sale_id = str(uuid.uuid4())
+        sale_date = datetime.now().isoformat()
+        with self.writer() as conn:
+            placeholders = ", ".join("?" * len(basket))
+            products = {row[0]: row for row in conn.execute(
+                f"SELECT * FROM products WHERE product_id IN ({placeholders})", list(basket))}
+
+            lines = []
+            for product_id, qty in basket.items():
+                product = products.get(product_id)
+                if product is None:
+                    raise ValueError(f"Product {product_id} not found")
+                free_qty = qty // 3
+                # Fast rejection only; take_stock() is what guarantees the stock is there
+                if qty + free_qty > product[5]:
+                    raise ValueError(f"Only {product[5]} of {product[1]} available")
+                selling_price = product[6] * 2
+                lines.append((product_id, product[1], product[2], qty, free_qty,
+                              selling_price, qty * selling_price))
+
+            row = conn.execute("SELECT customer_id FROM customers WHERE name = ?",
+                               (customer_name,)).fetchone()
+            if row:
+                customer_id = row[0]
+            else:
+                customer_id = str(uuid.uuid4())
+                conn.execute("INSERT INTO customers (customer_id, name) VALUES (?, ?)",
+                             (customer_id, customer_name))
+
+            self.take_stock(conn, [(product_id, qty + free_qty)
+                                   for product_id, _, _, qty, free_qty, _, _ in lines])
+            purchase_ids = [str(uuid.uuid4()) for _ in lines]
+            conn.executemany("""
+                INSERT INTO purchases (purchase_id, customer_id, product_id, quantity, total,
+                                       payment_method, purchase_date, sale_id, staff)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(purchase_id, customer_id, product_id, qty, total, payment_method,
+                   sale_date, sale_id, staff)
+                  for purchase_id, (product_id, _, _, qty, _, _, total) in zip(purchase_ids, lines)])
+            self.record_demand(conn, {product_id: qty + free_qty
+                                      for product_id, _, _, qty, free_qty, _, _ in lines})
+            self.log_operation(conn, {
+                "op": "sell", "at": sale_date, "sale_id": sale_id, "customer_id": customer_id,
+                "customer_name": customer_name, "payment_method": payment_method, "staff": staff,
+                "lines": [[purchase_id, product_id, qty, free_qty, total]
+                          for purchase_id, (product_id, _, _, qty, free_qty, _, total)
+                          in zip(purchase_ids, lines)]})
+        return sale_id, lines
+
+    def restock(self, product_id, quantity, cost_price, name="", brand="", category="",
+                subcategory="", origin=""):
+        """Add quantity to a product at cost_price, creating it if it is new"""
+        with self.writer() as conn:
+            conn.execute(RESTOCK_SQL, (product_id, name, brand, category, subcategory,
+                                       quantity, cost_price, origin))
+            self.log_operation(conn, {
+                "op": "restock", "at": datetime.now().isoformat(), "product_id": product_id,
+                "quantity": quantity, "cost_price": cost_price, "name": name, "brand": brand,
+                "category": category, "subcategory": subcategory, "origin": origin})
+
+    def import_products(self, rows):
+        """Upsert validated manifest rows (bulk.FIELDS order) in one transaction
+
+        The chunk is logged as a single import operation.
+        """
+        with self.writer() as conn:
+            conn.executemany(UPSERT_SQL, rows)
+            self.log_operation(conn, {"op": "import", "at": datetime.now().isoformat(),
+                                      "rows": [list(row) for row in rows]})
+
+    def log_operation(self, conn, record):
+        """Number a sell/restock/import in its transaction, commit, then append it to the oplog
+
+        The append happens under the writer lock, so the log is in commit
+        order for this process. Returns False if the record could not be
+        written (see OpLog.metrics).
+        """
+        if self.oplog is None:
+            return True
+        record["seq"] = conn.execute("UPDATE oplog_state SET seq = seq + 1, at = ? RETURNING seq",
+                                     (record["at"],)).fetchone()[0]
+        conn.commit()
+        return self.oplog.append(record)
+
+    def replay_operation(self, conn, record):
+        """Apply one oplog record to a restored database, as the original did"""
+        if record["op"] == "sell":
+            conn.execute("INSERT OR IGNORE INTO customers (customer_id, name) VALUES (?, ?)",
+                         (record["customer_id"], record["customer_name"]))
+            # The sale went through when it was logged, so no stock check here;
+            # a product that is missing means an operation creating it was lost
+            for _, product_id, qty, free_qty, _ in record["lines"]:
+                cursor = conn.execute("UPDATE products SET quantity = quantity - ? WHERE product_id = ?",
+                                      (qty + free_qty, product_id))
+                if cursor.rowcount == 0:
+                    raise ValueError(f"Oplog entry {record['seq']} sells {product_id}, "
+                                     f"which the restored database does not have")
+            conn.executemany("""
+                INSERT INTO purchases (purchase_id, customer_id, product_id, quantity, total,
+                                       payment_method, purchase_date, sale_id, staff)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(purchase_id, record["customer_id"], product_id, qty, total,
+                   record["payment_method"], record["at"], record["sale_id"], record["staff"])
+                  for purchase_id, product_id, qty, _, total in record["lines"]])
+            units = {}
+            for _, product_id, qty, free_qty, _ in record["lines"]:
+                units[product_id] = units.get(product_id, 0) + qty + free_qty
+            self.record_demand(conn, units, datetime.fromisoformat(record["at"]).toordinal())
+        elif record["op"] == "restock":
+            conn.execute(RESTOCK_SQL, (record["product_id"], record["name"], record["brand"],
+                                       record["category"], record["subcategory"],
+                                       record["quantity"], record["cost_price"], record["origin"]))
+        elif record["op"] == "import":
+            conn.executemany(UPSERT_SQL, [tuple(row) for row in record["rows"]])
+        else:
+            raise ValueError(f"Unknown operation {record['op']} in oplog entry {record['seq']}")
+        conn.execute("UPDATE oplog_state SET seq = ?, at = ?", (record["seq"], record["at"]))
+
+    def take_stock(self, conn, items):
+        """Decrement stock for (product_id, units) pairs only where enough is left
+
+        The quantity check is part of each UPDATE, so a till that read the
+        stock level earlier cannot oversell after another till (or process)
+        sold the same units. Raises ValueError if any line falls short; the
+        caller's transaction then rolls back every decrement.
+        """
+        for product_id, units in items:
+            cursor = conn.execute("""
+                UPDATE products SET quantity = quantity - ?
+                WHERE product_id = ? AND quantity >= ?
+            """, (units, product_id, units))
+            if cursor.rowcount != 1:
+                row = conn.execute("SELECT name, quantity FROM products WHERE product_id = ?",
+                                   (product_id,)).fetchone()
+                if row is None:
+                    raise ValueError(f"Product {product_id} not found")
+                raise ValueError(f"Only {row[1]} of {row[0]} available")
+
+    def record_demand(self, conn, units, day=None):
+        """Fold {product_id: units} sold today into the products' forecasts and reorder points"""
+        day = day or day_number()
+        placeholders = ", ".join("?" * len(units))
+        rows = {row[0]: row[1:] for row in conn.execute(f"""
+            SELECT product_id, level, variance, day, pending, started, lead_time FROM demand_forecast
+            WHERE product_id IN ({placeholders})
+        """, list(units))}
+        updates = []
+        for product_id, sold in units.items():
+            row = rows.get(product_id)
+            forecast = Forecast.from_row(row[:5]) if row else Forecast()
+            forecast.observe(day, sold)
+            lead_time = row[5] if row else LEAD_TIME_DAYS
+            updates.append((product_id, *forecast.as_row(),
+                            forecast.reorder_point(day, lead_time), day))
+        conn.executemany(FORECAST_UPSERT, updates)
+        # A higher reorder point can put stock below it without a further sale
+        conn.executemany(RAISE_ALERT_SQL, [(product_id,) for product_id in units])
+
+    def refresh_reorder_points(self, day=None):
+        """Recompute reorder points last computed before the given day; returns how many"""
+        day = day or day_number()
+        with self.writer() as conn:
+            rows = conn.execute("""
+                SELECT product_id, level, variance, day, pending, started, lead_time FROM demand_forecast
+                WHERE as_of < ?
+            """, (day,)).fetchall()
+            points = [(Forecast.from_row(row[1:6]).reorder_point(day, row[6]), day, row[0])
+                      for row in rows]
+            conn.executemany("UPDATE demand_forecast SET reorder_point = ?, as_of = ? WHERE product_id = ?",
+                             points)
+            conn.executemany(RESOLVE_ALERT_SQL, [(product_id, point) for point, _, product_id in points])
+            conn.executemany(RAISE_ALERT_SQL, [(product_id,) for _, _, product_id in points])
+        return len(rows)
+
+    def reorder_alerts(self, day=None):
+        """Open low-stock alerts, with the quantity to order
+
+        Returns (product_id, name, brand, quantity, reorder_point,
+        order_quantity) rows. Products that have never sold have no forecast
+        and use a fixed threshold, with reorder_point and order_quantity None.
+        """
+        day = day or day_number()
+        self.refresh_reorder_points(day)
+        with self.reader() as conn:
+            rows = conn.execute("""
+                SELECT p.product_id, p.name, p.brand, p.quantity, f.reorder_point,
+                       f.level, f.variance, f.day, f.pending, f.started, f.lead_time
+                FROM stock_alerts a
+                JOIN products p ON p.product_id = a.product_id
+                LEFT JOIN demand_forecast f ON f.product_id = p.product_id
+                WHERE a.resolved_at IS NULL
+                ORDER BY p.quantity
+            """).fetchall()
+        alerts = []
+        for product_id, name, brand, quantity, point, *state, lead_time in rows:
+            forecast = Forecast.from_row(state)
+            if forecast.day is None:
+                alerts.append((product_id, name, brand, quantity, None, None))
+            else:
+                alerts.append((product_id, name, brand, quantity, point,
+                               forecast.order_quantity(quantity, day, lead_time)))
+        return alerts
+
+    def claim_stock_alerts(self, limit=500):
+        """Mark alerts raised since the last call as notified and return them
+
+        Returns (alert_id, product_id, name, brand, quantity, threshold,
+        raised_at) rows, oldest first.
+        """
+        with self.writer() as conn:
+            rows = conn.execute("""
+                SELECT a.alert_id, a.product_id, p.name, p.brand, a.quantity, a.threshold, a.raised_at
+                FROM stock_alerts a
+                LEFT JOIN products p ON p.product_id = a.product_id
+                WHERE a.notified_at IS NULL
+                ORDER BY a.alert_id LIMIT ?
+            """, (limit,)).fetchall()
+            conn.executemany("UPDATE stock_alerts SET notified_at = CURRENT_TIMESTAMP WHERE alert_id = ?",
+                             [(row[0],) for row in rows])
+        return rows
+
+    def set_lead_time(self, product_id, days):
+        """Set a product's supplier lead time in days"""
+        with self.writer() as conn:
+            conn.execute("""
+                INSERT INTO demand_forecast (product_id, lead_time) VALUES (?, ?)
+                ON CONFLICT(product_id) DO UPDATE SET lead_time = excluded.lead_time, as_of = 0
+            """, (product_id, days))
+
+    def rebuild_forecasts(self):
+        """Recompute every demand forecast from the sales history"""
+        with self.writer() as conn:
+            seed_forecasts(conn)
+
+    def rebuild_rollups(self):
+        """Recompute the daily sales rollup tables from scratch"""
+        with self.writer() as conn:
+            for statement in ROLLUP_REBUILD:
+                conn.execute(statement)
+        logging.info("Sales rollups rebuilt")
+
+    def fetch_changes(self, consumer, limit=500):
+        """Return (last_seq, rows) for the next window of product changes after the consumer's cursor
+
+        Each changed product appears once with its current row; deleted products
+        come back with None in place of the product columns.
+        """
+        with self.reader() as conn:
+            row = conn.execute("SELECT last_seq FROM change_cursors WHERE consumer = ?",
+                               (consumer,)).fetchone()
+            cursor_seq = row[0] if row else 0
+            rows = conn.execute("""
+                WITH window AS (
+                    SELECT seq, product_id FROM product_changes
+                    WHERE seq > ? ORDER BY seq LIMIT ?
+                )
+                SELECT w.product_id, MAX(w.seq), p.name, p.brand, p.category,
+                       p.subcategory, p.quantity, p.cost_price
+                FROM window w LEFT JOIN products p ON p.product_id = w.product_id
+                GROUP BY w.product_id
+                ORDER BY MAX(w.seq)
+            """, (cursor_seq, limit)).fetchall()
+        last_seq = max((r[1] for r in rows), default=cursor_seq)
+        return last_seq, rows
+
+    def advance_cursor(self, consumer, seq):
+        """Record that a consumer has processed every change up to seq"""
+        with self.writer() as conn:
+            conn.execute("""
+                INSERT INTO change_cursors (consumer, last_seq) VALUES (?, ?)
+                ON CONFLICT(consumer) DO UPDATE SET last_seq = MAX(last_seq, excluded.last_seq)
+            """, (consumer, seq))
+            # Changes every consumer has seen are no longer needed
+            conn.execute("""
+                DELETE FROM product_changes
+                WHERE seq <= (SELECT MIN(last_seq) FROM change_cursors)
+            """)
+
+    def explain_queries(self):
+        """Print EXPLAIN QUERY PLAN for every hot query"""
+        with self.reader() as conn:
+            for name, (sql, params) in HOT_QUERIES.items():
+                print(f"-- {name}")
+                for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+                    print(f"   {row[-1]}")
+
+    def backup_database(self, compress=False, retention=RETENTION, cancel=None):
+        """Online backup into backup_folder; returns its path, or None if it failed
+
+        See backup.take_backup. Checkouts keep committing while it runs.
+        """
+        try:
+            return take_backup(self.db_name, self.backup_folder, compress, retention, cancel)
+        except BackupCancelled:
+            logging.info("Database backup cancelled")
+        except Exception as e:
+            logging.error(f"Database backup error: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="WeCare database maintenance")
+    parser.add_argument("command", choices=["explain", "rebuild-rollups", "rebuild-forecasts", "backup"])
+    parser.add_argument("--db", default="wecare.db")
+    parser.add_argument("--compress", action="store_true", help="gzip the backup")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    if args.command == "explain":
+        db.explain_queries()
+    elif args.command == "rebuild-rollups":
+        db.rebuild_rollups()
+    elif args.command == "rebuild-forecasts":
+        db.rebuild_forecasts()
+    elif args.command == "backup":
+        print(db.backup_database(args.compress) or "Backup failed, see the log")
+    db.close()
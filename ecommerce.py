@@ -1,13 +1,203 @@
-import requests
-import logging
-
-class ECommerceIntegration:
-    def sync_product(self, product_data):
-        try:
-            response = requests.post("https://api.ecommerce-platform.com/products",
-                                   json=product_data, timeout=5)
-            logging.info(f"Product synced: {product_data['name']}")
-            return response.status_code == 200
-        except Exception as e:
-            logging.error(f"E-commerce sync failed: {e}")
-            return False
\ No newline at end of file
+import logging
+import threading
+import time
+
+class ECommerceIntegration:
+    """Syncs products to the storefront from a background queue
+
+    Updates are coalesced per product id, products whose data has not changed
+    since the last successful sync are skipped, and the rest are sent in
+    batches over one pooled HTTP session with retry and exponential backoff.
+    With a change feed attached, the worker also ships the products table's
+    change log and advances its cursor only after the storefront accepts a
+    batch, so a crash resumes where it left off.
+    """
+
+    def __init__(self, endpoint="https://api.ecommerce-platform.com/products",
+                 batch_size=200, flush_interval=1.0, max_retries=4, backoff=0.5, timeout=5,
+                 poll_interval=5.0):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.db = None
+        self.consumer = None
+        self._changes_waiting = False
+        self._pending = {}
+        self._synced = {}
+        self._in_flight = 0
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._session = None
+        self._worker = None
+        self.rejected = 0
+
+    @property
+    def session(self):
+        if self._session is None:
+            # requests is imported on first sync rather than at startup
+            import requests
+            from requests.adapters import HTTPAdapter
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+        return self._session
+
+    def _start_worker(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="ecommerce-sync", daemon=True)
+            self._worker.start()
+
+    def sync_product(self, product_data):
+        """Queue a product for sync; returns immediately"""
+        pid = product_data['id']
+        with self._cond:
+            if pid not in self._pending and self._synced.get(pid) == product_data:
+                return True
+            self._pending[pid] = dict(product_data)
+            self._start_worker()
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def attach_change_feed(self, db, consumer="ecommerce"):
+        """Ship changes recorded in the database's product change log"""
+        with self._cond:
+            self.db = db
+            self.consumer = consumer
+            self._changes_waiting = True
+            self._start_worker()
+            self._cond.notify_all()
+
+    def notify_changes(self):
+        """Wake the worker after a commit that changed products"""
+        with self._cond:
+            self._changes_waiting = True
+            self._cond.notify_all()
+
+    def ship_changes(self):
+        """Send the next window of logged changes; returns how many products were shipped"""
+        last_seq, rows = self.db.fetch_changes(self.consumer, self.batch_size)
+        if not rows:
+            return 0
+        batch = []
+        for pid, seq, name, brand, category, subcategory, quantity, cost_price in rows:
+            if name is None:
+                batch.append({'id': pid, 'deleted': True})
+            else:
+                batch.append({'id': pid, 'name': name, 'brand': brand, 'category': category,
+                              'subcategory': subcategory, 'price': cost_price * 2,
+                              'quantity': quantity})
+        if not self._post_batch(batch):
+            return 0
+        self.db.advance_cursor(self.consumer, last_seq)
+        with self._cond:
+            self._synced.update((p['id'], p) for p in batch)
+        return len(rows)
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._pending) + self._in_flight
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not (self._pending or self._changes_waiting or self._closed):
+                    if not self._cond.wait(self.poll_interval if self.db else None):
+                        self._changes_waiting = self.db is not None
+                if self._closed and not self._pending:
+                    return
+                ship_feed, self._changes_waiting = self._changes_waiting, False
+                # Give more updates a moment to coalesce into a fuller batch
+                if (self._pending and len(self._pending) < self.batch_size
+                        and not (self._flush_requested or self._closed)):
+                    self._cond.wait(self.flush_interval)
+                batch = {}
+                for pid in list(self._pending)[:self.batch_size]:
+                    batch[pid] = self._pending.pop(pid)
+                self._in_flight = len(batch)
+
+            sent = self._post_batch(list(batch.values())) if batch else True
+
+            with self._cond:
+                if sent:
+                    self._synced.update(batch)
+                else:
+                    # Newer updates queued meanwhile take precedence over the failed ones
+                    for pid, data in batch.items():
+                        self._pending.setdefault(pid, data)
+                self._in_flight = 0
+                if not self._pending:
+                    self._flush_requested = False
+                self._cond.notify_all()
+
+            if ship_feed:
+                try:
+                    # Coalescing can leave fewer products than changes read, so keep
+                    # going until a window comes back empty (or fails to post)
+                    while self.ship_changes():
+                        pass
+                except Exception as e:
+                    logging.error(f"E-commerce change feed failed: {e}")
+            if not sent and not self._closed:
+                time.sleep(self.flush_interval)
+
+    def _post_batch(self, batch):
+        """Send one batch; True once the storefront has accepted or permanently rejected it
+
+        Network errors and 5xx (and 408/429) responses are retried with
+        backoff. Any other 4xx means the batch itself is bad and would be
+        refused forever, so it is logged and dropped instead of blocking the
+        queue and the change feed behind it.
+        """
+        import requests
+        for attempt in range(self.max_retries):
+            try:
+                response = self.session.post(f"{self.endpoint}/batch", json={"products": batch},
+                                             timeout=self.timeout)
+                if response.status_code < 300:
+                    logging.info(f"Synced {len(batch)} products")
+                    return True
+                if 400 <= response.status_code < 500 and response.status_code not in (408, 429):
+                    self.rejected += len(batch)
+                    logging.error(f"E-commerce sync rejected {len(batch)} products with HTTP "
+                                  f"{response.status_code}, dropping them: {response.text[:500]} "
+                                  f"ids: {', '.join(str(p['id']) for p in batch[:50])}")
+                    return True
+                logging.warning(f"E-commerce sync rejected with HTTP {response.status_code}")
+            except requests.RequestException as e:
+                logging.warning(f"E-commerce sync attempt {attempt + 1} failed: {e}")
+            time.sleep(self.backoff * 2 ** attempt)
+        logging.error(f"E-commerce sync failed for {len(batch)} products, will retry")
+        return False
+
+    def flush(self, timeout=None):
+        """Send everything queued now and wait for it; True if the queue drained"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self, timeout=10):
+        """Flush pending updates and stop the worker"""
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
@@ -0,0 +1,157 @@
+import math
+from datetime import date
+
+# Smoothing weight of the newest day's demand
+ALPHA = 0.2
+# Safety stock in standard deviations of lead-time demand (~95% service level)
+SERVICE_Z = 1.65
+# Supplier lead time assumed until one is set for a product
+LEAD_TIME_DAYS = 7
+# Days of demand a replenishment order should cover beyond the reorder point
+COVER_DAYS = 14
+# Threshold for products that have no sales history yet
+FALLBACK_THRESHOLD = 10
+
+
+def day_number(day=None):
+    """Ordinal day number used by forecast state; defaults to today"""
+    return (day or date.today()).toordinal()
+
+
+class Forecast:
+    """Exponentially smoothed daily demand of one product
+
+    Units sold are accumulated for the open day; when a sale lands on a
+    later day the open day is folded into the smoothed level and variance,
+    and the idle days in between are folded in as zero demand. Each sale is
+    therefore O(1) and history never has to be rescanned.
+
+    The day tracking started on (started) is usually partial, the product
+    having gone on sale part way through it, so it is not folded in:
+    smoothing starts from the first complete day, and the started day's
+    sales are only an estimate until that day is over.
+    """
+
+    __slots__ = ("level", "variance", "day", "pending", "started")
+
+    def __init__(self, level=None, variance=0.0, day=None, pending=0, started=None):
+        self.level = level
+        self.variance = variance
+        self.day = day
+        self.pending = pending
+        self.started = started
+
+    @classmethod
+    def from_row(cls, row):
+        level, variance, day, pending, started = row
+        return cls(level, variance, day, pending, started)
+
+    def as_row(self):
+        return self.level, self.variance, self.day, self.pending, self.started
+
+    def observe(self, day, units, alpha=ALPHA):
+        """Record units leaving the shelf on an ordinal day"""
+        if self.day is None:
+            self.day = self.started = day
+        elif self.level is None and self.day == self.started and day == self.day + 1:
+            # The partial first day is dropped; this is the first complete one
+            self.day, self.pending = day, 0
+        elif day > self.day:
+            self.level, self.variance = self.at(day, alpha)
+            self.day, self.pending = day, 0
+        # Sales recorded late for an earlier day count towards the open day
+        self.pending += units
+
+    def at(self, day, alpha=ALPHA):
+        """(level, variance) with every day before the given one folded in"""
+        if self.day is None:
+            return 0.0, self.variance
+        if day <= self.day:
+            # Until a day has completed, the open day's sales are the best estimate
+            return (float(self.pending) if self.level is None else self.level), self.variance
+        level, variance = self.level, self.variance
+        if level is None and self.day == self.started:
+            if day == self.day + 1:
+                # No complete day yet
+                return float(self.pending), variance
+            # The day after the started day completed without a sale
+            return decay(0.0, variance, day - self.day - 2, alpha)
+        if level is None:
+            # The first complete day seeds the level
+            level = float(self.pending)
+        else:
+            level, variance = smooth(level, variance, self.pending, alpha)
+        return decay(level, variance, day - self.day - 1, alpha)
+
+    def reorder_point(self, day, lead_time=LEAD_TIME_DAYS, alpha=ALPHA, z=SERVICE_Z):
+        """Expected demand over the lead time plus safety stock"""
+        level, variance = self.at(day, alpha)
+        return level * lead_time + z * math.sqrt(variance * lead_time)
+
+    def order_quantity(self, quantity, day, lead_time=LEAD_TIME_DAYS, cover_days=COVER_DAYS,
+                       alpha=ALPHA, z=SERVICE_Z):
+        """Units to order to bring stock up to the reorder point plus cover_days of demand"""
+        level, _ = self.at(day, alpha)
+        target = self.reorder_point(day, lead_time, alpha, z) + level * cover_days
+        return max(0, math.ceil(target - quantity))
+
+
+def smooth(level, variance, units, alpha=ALPHA):
+    """Fold one day's demand into an exponentially weighted mean and variance"""
+    error = units - level
+    return level + alpha * error, (1 - alpha) * (variance + alpha * error * error)
+
+
+def decay(level, variance, idle_days, alpha=ALPHA):
+    """smooth() applied over idle_days days of zero demand, in closed form"""
+    if idle_days <= 0:
+        return level, variance
+    remaining = (1 - alpha) ** idle_days
+    return level * remaining, remaining * (variance + level * level * (1 - remaining))
+
+
+class ForecastBook:
+    """Forecasts for a whole catalog, keyed by product id
+
+    Used by the console front end, which keeps its sales in the ledger
+    rather than in SQLite.
+    """
+
+    def __init__(self, lead_times=None):
+        self.forecasts = {}
+        self.lead_times = lead_times or {}
+
+    @classmethod
+    def from_ledger(cls, ledger):
+        book = cls()
+        for timestamp, _, _, pid, qty, free_qty, _ in ledger.records():
+            # Ledger timestamps are local seconds since 1970-01-01 (ordinal 719163)
+            book.observe(pid, 719163 + int(timestamp // 86400), qty + free_qty)
+        return book
+
+    def observe(self, pid, day, units):
+        forecast = self.forecasts.get(pid)
+        if forecast is None:
+            forecast = self.forecasts[pid] = Forecast()
+        forecast.observe(day, units)
+
+    def check(self, product, day=None):
+        """(is low, reorder point, order quantity) for one product; O(1)"""
+        day = day or day_number()
+        forecast = self.forecasts.get(product['id'])
+        if forecast is None:
+            return product['quantity'] < FALLBACK_THRESHOLD, None, None
+        lead_time = self.lead_times.get(product['id'], LEAD_TIME_DAYS)
+        point = forecast.reorder_point(day, lead_time)
+        return (product['quantity'] <= point, point,
+                forecast.order_quantity(product['quantity'], day, lead_time))
+
+    def alerts(self, products, day=None):
+        """(product, reorder point, order quantity) for products at or below their reorder point"""
+        day = day or day_number()
+        alerts = []
+        for product in products.values():
+            low, point, order = self.check(product, day)
+            if low:
+                alerts.append((product, point, order))
+        return alerts
@@ -1,134 +1,413 @@
-import tkinter as tk
-from tkinter import ttk, scrolledtext
-from PIL import Image, ImageTk
-import logging
-
-class WeCareGUI:
-    def __init__(self, root, system):
-        self.root = root
-        self.system = system
-        self.root.title("WeCare Store Management System")
-        self.root.geometry("800x600")
-        self.setup_gui()
-
-    def setup_gui(self):
-        logging.info("Starting GUI setup")
-        self.root.configure(bg="#f0f0f0")
-        self.notebook = ttk.Notebook(self.root)
-        self.notebook.pack(pady=10, expand=True, fill='both')
-
-        self.login_frame = ttk.Frame(self.notebook)
-        self.notebook.add(self.login_frame, text="Login")
-        self.setup_login_frame()
-
-        self.main_frame = ttk.Frame(self.notebook)
-        self.notebook.add(self.main_frame, text="Main Menu")
-        ttk.Label(self.main_frame, text="Welcome to WeCare!").pack()
-
-        try:
-            image = Image.open("D:/skincare/logo.png")
-            image = image.resize((100, 100), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(image)
-            label = ttk.Label(self.login_frame, image=photo)
-            label.image = photo
-            label.pack()
-        except Exception as e:
-            logging.error(f"Image loading failed: {e}")
-
-        logging.info("GUI setup complete")
-
-    def setup_login_frame(self):
-        ttk.Label(self.login_frame, text="Username:").pack()
-        self.login_username = ttk.Entry(self.login_frame)
-        self.login_username.pack()
-        ttk.Label(self.login_frame, text="Password:").pack()
-        self.login_password = ttk.Entry(self.login_frame, show="*")
-        self.login_password.pack()
-        ttk.Button(self.login_frame, text="Login", command=self.system.login).pack(pady=10)
-
-    # Add other frame setups (e.g., setup_customers_frame with grid) as needed
-
-    def setup_register_frame(self):
-        """Setup registration GUI"""
-        frame = ttk.Frame(self.register_frame, padding="20")
-        frame.pack(expand=True, fill='both')
-
-        fields = ["Username", "Password", "Email", "Full Name", "Phone"]
-        self.register_entries = {}
-        
-        for i, field in enumerate(fields):
-            ttk.Label(frame, text=f"{field}:").grid(row=i, column=0, padx=5, pady=5)
-            entry = ttk.Entry(frame, show="*" if field == "Password" else "")
-            entry.grid(row=i, column=1, padx=5, pady=5)
-            self.register_entries[field.lower().replace(" ", "_")] = entry
-
-        ttk.Button(frame, text="Register", command=self.system.register_user).grid(row=len(fields), column=0, columnspan=2, pady=10)
-
-    def setup_main_frame(self):
-        """Setup main menu GUI"""
-        frame = ttk.Frame(self.main_frame, padding="20")
-        frame.pack(expand=True, fill='both')
-
-        buttons = [
-            ("View Products", lambda: self.notebook.select(self.products_frame)),
-            ("Manage Customers", lambda: self.notebook.select(self.customers_frame)),
-            ("Sell Products", self.system.sell_product),
-            ("Restock Products", self.system.restock_product),
-            ("View Stock Alerts", self.system.stock_alert),
-            ("View Sales Reports", self.system.view_sales_report),
-            ("Change Password", self.system.change_password),
-            ("Logout", self.system.logout)
-        ]
-
-        for i, (text, command) in enumerate(buttons):
-            ttk.Button(frame, text=text, command=command).grid(row=i, column=0, pady=5, sticky='ew')
-
-    def setup_products_frame(self):
-        """Setup products management GUI"""
-        frame = ttk.Frame(self.products_frame, padding="20")
-        frame.pack(expand=True, fill='both')
-
-        # Search
-        ttk.Label(frame, text="Search:").pack()
-        self.product_search = ttk.Entry(frame)
-        self.product_search.pack(fill='x')
-        ttk.Button(frame, text="Search", command=self.system.search_products).pack()
-
-        # Products treeview
-        self.products_tree = ttk.Treeview(frame, columns=("ID", "Name", "Brand", "Category", "Subcategory", "Price", "Qty", "Origin"), show="headings")
-        for col in self.products_tree["columns"]:
-            self.products_tree.heading(col, text=col)
-            self.products_tree.column(col, width=100)
-        self.products_tree.pack(expand=True, fill='both')
-
-        ttk.Button(frame, text="Refresh Products", command=self.system.display_products).pack(pady=5)
-
-    def setup_customers_frame(self):
-        """Setup customers management GUI"""
-        frame = ttk.Frame(self.customers_frame, padding="20")
-        frame.grid(row=0, column=0, sticky="nsew")
-
-        # Customer info
-        fields = ["Name", "Email", "Phone", "Address"]
-        self.customer_entries = {}
-        
-        for i, field in enumerate(fields):
-            ttk.Label(frame, text=f"{field}:").grid(row=i, column=0, padx=5, pady=5, sticky="w")
-            entry = ttk.Entry(frame)
-            entry.grid(row=i, column=1, padx=5, pady=5, sticky="ew")
-            self.customer_entries[field.lower()] = entry
-
-        ttk.Button(frame, text="Add Customer", command=self.system.add_customer).grid(row=len(fields), column=0, columnspan=2, pady=5, sticky="ew")
-
-        # Purchase history
-        self.purchase_tree = ttk.Treeview(frame, columns=("ID", "Product", "Qty", "Total", "Date", "Payment"), show="headings")
-        for col in self.purchase_tree["columns"]:
-            self.purchase_tree.heading(col, text=col)
-            self.purchase_tree.column(col, width=100)
-        
-        self.purchase_tree.grid(row=len(fields)+1, column=0, columnspan=2, pady=10, sticky="nsew")
-        
-        # Configure grid weights
-        frame.grid_columnconfigure(0, weight=1)
-        frame.grid_columnconfigure(1, weight=1)
-        frame.grid_rowconfigure(len(fields)+1, weight=1)
+import tkinter as tk
+from tkinter import ttk, scrolledtext
+from collections import OrderedDict
+import logging
+import os
+
+
+LOGO_PATH = "D:/skincare/logo.png"
+
+
+def load_logo(path=LOGO_PATH, size=(100, 100)):
+    """The logo resized to size, from a cached copy beside it while that is current
+
+    Tk reads the cached PNG itself, so PIL is only imported when the logo
+    changes or the cache cannot be written.
+    """
+    base, _ = os.path.splitext(path)
+    cache = f"{base}_{size[0]}x{size[1]}.png"
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        return tk.PhotoImage(file=cache)
+    from PIL import Image, ImageTk
+    image = Image.open(path).resize(size, Image.Resampling.LANCZOS)
+    try:
+        image.save(cache)
+    except OSError as e:
+        logging.error(f"Caching resized logo failed: {e}")
+    return ImageTk.PhotoImage(image)
+
+
+class ProductTable:
+    """Product Treeview that only materializes the rows in view
+
+    The tree holds one item per visible line and a separate scrollbar spans
+    the whole catalog. Scrolling rewrites those items from pages fetched on
+    demand through fetch_page(order, descending, offset, limit, after), so
+    Tk does the same work at 50 products or 500k. Clicking a heading sorts
+    by that column in the database; refresh() re-reads the rows in view and
+    updates only the items whose values changed.
+
+    Fetches go through run(fn, on_done, on_error, key), which by default
+    calls fn at once; given a TkExecutor's submit they run on a worker, rows still on
+    their way show as "…" and the previous values stay up during a refresh.
+    """
+    # (heading, products column)
+    COLUMNS = (("ID", "product_id"), ("Name", "name"), ("Brand", "brand"),
+               ("Category", "category"), ("Subcategory", "subcategory"),
+               ("Price", "cost_price"), ("Qty", "quantity"), ("Origin", "origin"))
+    # Position of each column in a products table row
+    FIELDS = ("product_id", "name", "brand", "category", "subcategory", "quantity", "cost_price", "origin")
+    BLANK = ("",) * 8
+    LOADING = ("…",) + ("",) * 7
+
+    def __init__(self, parent, fetch_page, count, page_size=200, cached_pages=20, run=None):
+        self.fetch_page = fetch_page
+        self.count = count
+        self.run = run or (lambda fn, on_done, on_error=None, key=None: on_done(fn()))
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        # None keeps the natural order: product id, or relevance for search results
+        self.order, self.descending = None, False
+        self.pages = OrderedDict()
+        # Pages from before a refresh, shown until their replacements arrive
+        self.stale = {}
+        self.loading = set()
+        # Bumped on every reload so pages fetched for an older one are dropped
+        self.generation = 0
+        # Search results are shown from this callable instead of the paged catalog
+        self.matches = None
+        self.rows = None
+        self.total = 0
+        self.top = 0
+        self.slots = []
+        self.shown = {}
+        self.selected = None
+
+        frame = ttk.Frame(parent)
+        frame.pack(expand=True, fill='both')
+        self.tree = ttk.Treeview(frame, columns=[heading for heading, _ in self.COLUMNS],
+                                 show="headings", selectmode="browse", height=10)
+        for heading, field in self.COLUMNS:
+            self.tree.heading(heading, text=heading, command=lambda f=field: self.sort(f))
+            self.tree.column(heading, width=100)
+        self.scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', expand=True, fill='both')
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_to(self.top + (-3 if e.delta > 0 else 3)))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_to(self.top - 3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_to(self.top + 3))
+        for key, step in (("<Up>", -1), ("<Down>", 1)):
+            self.tree.bind(key, lambda e, s=step: self.scroll_to(self.top + s) or "break")
+        for key, pages in (("<Prior>", -1), ("<Next>", 1)):
+            self.tree.bind(key, lambda e, p=pages: self.scroll_to(self.top + p * len(self.slots)) or "break")
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0) or "break")
+        self.tree.bind("<End>", lambda e: self.scroll_to(self.total) or "break")
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+
+    def row_height(self):
+        height = ttk.Style().lookup("Treeview", "rowheight")
+        try:
+            return int(height) or 20
+        except (TypeError, ValueError):
+            return 20
+
+    def on_resize(self, event):
+        # Leave room for the heading row
+        wanted = max(1, (event.height - 25) // self.row_height())
+        while len(self.slots) < wanted:
+            self.slots.append(self.tree.insert("", "end", values=self.BLANK))
+        while len(self.slots) > wanted:
+            iid = self.slots.pop()
+            self.tree.delete(iid)
+            self.shown.pop(iid, None)
+        self.scroll_to(self.top, force=True)
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.total))
+        elif unit == "pages":
+            self.scroll_to(self.top + int(amount) * len(self.slots))
+        else:
+            self.scroll_to(self.top + int(amount))
+
+    def on_select(self, event=None):
+        selection = self.tree.selection()
+        if selection and self.shown.get(selection[0], self.BLANK)[0]:
+            self.selected = self.shown[selection[0]][0]
+
+    def scroll_to(self, top, force=False):
+        top = max(0, min(top, self.total - len(self.slots)))
+        if top != self.top or force:
+            self.top = top
+            self.render()
+
+    def page(self, number):
+        """Rows of one page, or None while it is being fetched
+
+        A page is found by keyset seek when the page before it is cached.
+        """
+        rows = self.pages.get(number)
+        if rows is not None:
+            self.pages.move_to_end(number)
+            return rows
+        if number not in self.loading:
+            self.loading.add(number)
+            order = self.order or "product_id"
+            after = None
+            previous = self.pages.get(number - 1)
+            if previous:
+                last = previous[-1]
+                after = (last[self.FIELDS.index(order)], last[0])
+            args = (order, self.descending, number * self.page_size, self.page_size, after)
+            generation = self.generation
+            self.run(lambda: self.fetch_page(*args),
+                     lambda rows: self.page_loaded(generation, number, rows),
+                     lambda error: self.page_failed(generation, number))
+        return self.pages.get(number, self.stale.get(number))
+
+    def page_loaded(self, generation, number, rows):
+        if generation != self.generation:
+            return
+        self.loading.discard(number)
+        self.stale.pop(number, None)
+        self.pages[number] = rows
+        while len(self.pages) > self.cached_pages:
+            self.pages.popitem(last=False)
+        self.render()
+
+    def page_failed(self, generation, number):
+        # Fetch the page again the next time it scrolls into view
+        if generation == self.generation:
+            self.loading.discard(number)
+
+    def row(self, index):
+        """The row at a position, LOADING while its page is fetched, or None past the end"""
+        if index >= self.total:
+            return None
+        if self.rows is not None:
+            return self.rows[index]
+        rows = self.page(index // self.page_size)
+        if rows is None:
+            return self.LOADING
+        offset = index % self.page_size
+        return rows[offset] if offset < len(rows) else None
+
+    @staticmethod
+    def format(row):
+        pid, name, brand, category, subcategory, quantity, cost_price, origin = row
+        return (pid, name, brand, category, subcategory, f"Rs. {cost_price * 2:,.2f}", quantity, origin)
+
+    def render(self):
+        """Write the rows in view into the tree items, touching only those that changed"""
+        for i, iid in enumerate(self.slots):
+            row = self.row(self.top + i)
+            values = self.BLANK if row is None else row if row is self.LOADING else self.format(row)
+            if self.shown.get(iid) != values:
+                self.tree.item(iid, values=values)
+                self.shown[iid] = values
+        # Keep the selection on the same product as it scrolls
+        selection = [iid for iid in self.slots if self.selected and self.shown[iid][0] == self.selected]
+        if tuple(selection) != self.tree.selection():
+            self.tree.selection_set(selection)
+        if self.total:
+            self.scrollbar.set(self.top / self.total, min(1.0, (self.top + len(self.slots)) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def load(self, keep=False):
+        """Re-read the row count (or search results) and drop cached pages"""
+        self.generation += 1
+        generation = self.generation
+        self.stale = dict(self.pages) if keep else {}
+        self.pages.clear()
+        self.loading.clear()
+        matches = self.matches
+        if matches is not None:
+            order, descending = self.order, self.descending
+
+            def fetch():
+                rows = list(matches())
+                if order:
+                    column = self.FIELDS.index(order)
+                    rows.sort(key=lambda r: (r[column], r[0]), reverse=descending)
+                return rows
+        else:
+            fetch = self.count
+        self.run(fetch, lambda result: self.loaded(generation, result), key=("products", id(self)))
+
+    def loaded(self, generation, result):
+        if generation != self.generation:
+            return
+        if isinstance(result, list):
+            self.rows, self.total = result, len(result)
+        else:
+            self.rows, self.total = None, result
+        self.scroll_to(self.top, force=True)
+
+    def show_all(self):
+        """Page through the whole catalog from the top"""
+        self.matches, self.top = None, 0
+        self.load()
+
+    def show_matches(self, matches):
+        """Show the rows returned by matches() (e.g. a search) instead of the whole catalog"""
+        self.matches, self.top = matches, 0
+        self.load()
+
+    def refresh(self):
+        """Re-read the rows in view after stock or prices changed"""
+        self.load(keep=True)
+
+    def sort(self, field):
+        self.descending = not self.descending if field == self.order else False
+        self.order, self.top = field, 0
+        for heading, column in self.COLUMNS:
+            arrow = (" ▼" if self.descending else " ▲") if column == field else ""
+            self.tree.heading(heading, text=heading + arrow)
+        self.load()
+
+
+class WeCareGUI:
+    def __init__(self, root, system):
+        self.root = root
+        self.system = system
+        self.root.title("WeCare Store Management System")
+        self.root.geometry("800x600")
+        self.setup_gui()
+
+    def setup_gui(self):
+        logging.info("Starting GUI setup")
+        self.root.configure(bg="#f0f0f0")
+
+        # Busy indicator for work running on the background workers
+        self.status_bar = ttk.Frame(self.root)
+        self.status_bar.pack(side='bottom', fill='x')
+        self.status_label = ttk.Label(self.status_bar, text="")
+        self.status_label.pack(side='left', padx=5)
+        self.progress = ttk.Progressbar(self.status_bar, mode='indeterminate', length=120)
+
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.pack(pady=10, expand=True, fill='both')
+
+        self.login_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.login_frame, text="Login")
+        self.setup_login_frame()
+
+        self.main_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.main_frame, text="Main Menu")
+        ttk.Label(self.main_frame, text="Welcome to WeCare!").pack()
+
+        try:
+            photo = load_logo()
+            label = ttk.Label(self.login_frame, image=photo)
+            label.image = photo
+            label.pack()
+        except Exception as e:
+            logging.error(f"Image loading failed: {e}")
+
+        logging.info("GUI setup complete")
+
+    def set_busy(self, busy):
+        """Show or hide the busy indicator"""
+        if busy:
+            self.status_label.config(text="Working…")
+            self.progress.pack(side='right', padx=5)
+            self.progress.start(10)
+            self.root.config(cursor="watch")
+        else:
+            self.progress.stop()
+            self.progress.pack_forget()
+            self.status_label.config(text="")
+            self.root.config(cursor="")
+
+    def setup_login_frame(self):
+        ttk.Label(self.login_frame, text="Username:").pack()
+        self.login_username = ttk.Entry(self.login_frame)
+        self.login_username.pack()
+        ttk.Label(self.login_frame, text="Password:").pack()
+        self.login_password = ttk.Entry(self.login_frame, show="*")
+        self.login_password.pack()
+        ttk.Button(self.login_frame, text="Login", command=self.system.login).pack(pady=10)
+
+    # Add other frame setups (e.g., setup_customers_frame with grid) as needed
+
+    def setup_register_frame(self):
+        """Setup registration GUI"""
+        frame = ttk.Frame(self.register_frame, padding="20")
+        frame.pack(expand=True, fill='both')
+
+        fields = ["Username", "Password", "Email", "Full Name", "Phone"]
+        self.register_entries = {}
+        
+        for i, field in enumerate(fields):
+            ttk.Label(frame, text=f"{field}:").grid(row=i, column=0, padx=5, pady=5)
+            entry = ttk.Entry(frame, show="*" if field == "Password" else "")
+            entry.grid(row=i, column=1, padx=5, pady=5)
+            self.register_entries[field.lower().replace(" ", "_")] = entry
+
+        ttk.Button(frame, text="Register", command=self.system.register_user).grid(row=len(fields), column=0, columnspan=2, pady=10)
+
+    def setup_main_frame(self):
+        """Setup main menu GUI"""
+        frame = ttk.Frame(self.main_frame, padding="20")
+        frame.pack(expand=True, fill='both')
+
+        buttons = [
+            ("View Products", lambda: self.notebook.select(self.products_frame)),
+            ("Manage Customers", lambda: self.notebook.select(self.customers_frame)),
+            ("Sell Products", self.system.sell_product),
+            ("Restock Products", self.system.restock_product),
+            ("Bulk Import Products", self.system.bulk_import),
+            ("Export Products", self.system.bulk_export),
+            ("View Stock Alerts", self.system.stock_alert),
+            ("View Sales Reports", self.system.view_sales_report),
+            ("Change Password", self.system.change_password),
+            ("Logout", self.system.logout)
+        ]
+
+        for i, (text, command) in enumerate(buttons):
+            ttk.Button(frame, text=text, command=command).grid(row=i, column=0, pady=5, sticky='ew')
+
+    def setup_products_frame(self):
+        """Setup products management GUI"""
+        frame = ttk.Frame(self.products_frame, padding="20")
+        frame.pack(expand=True, fill='both')
+
+        # Search
+        ttk.Label(frame, text="Search:").pack()
+        self.product_search = ttk.Entry(frame)
+        self.product_search.pack(fill='x')
+        ttk.Button(frame, text="Search", command=self.system.search_products).pack()
+
+        # Products view, paged from the store as it scrolls
+        store = self.system.store
+        self.products_view = ProductTable(
+            frame, store.products_page, store.product_count,
+            run=lambda fn, on_done, on_error=None, key=None: self.system.background(
+                fn, on_done=on_done, on_error=on_error, key=key,
+                log="Product load error", error="Failed to load products"))
+        self.products_tree = self.products_view.tree
+
+        ttk.Button(frame, text="Refresh Products", command=self.system.display_products).pack(pady=5)
+
+    def setup_customers_frame(self):
+        """Setup customers management GUI"""
+        frame = ttk.Frame(self.customers_frame, padding="20")
+        frame.grid(row=0, column=0, sticky="nsew")
+
+        # Customer info
+        fields = ["Name", "Email", "Phone", "Address"]
+        self.customer_entries = {}
+        
+        for i, field in enumerate(fields):
+            ttk.Label(frame, text=f"{field}:").grid(row=i, column=0, padx=5, pady=5, sticky="w")
+            entry = ttk.Entry(frame)
+            entry.grid(row=i, column=1, padx=5, pady=5, sticky="ew")
+            self.customer_entries[field.lower()] = entry
+
+        ttk.Button(frame, text="Add Customer", command=self.system.add_customer).grid(row=len(fields), column=0, columnspan=2, pady=5, sticky="ew")
+
+        # Purchase history
+        self.purchase_tree = ttk.Treeview(frame, columns=("ID", "Product", "Qty", "Total", "Date", "Payment"), show="headings")
+        for col in self.purchase_tree["columns"]:
+            self.purchase_tree.heading(col, text=col)
+            self.purchase_tree.column(col, width=100)
+        
+        self.purchase_tree.grid(row=len(fields)+1, column=0, columnspan=2, pady=10, sticky="nsew")
+        
+        # Configure grid weights
+        frame.grid_columnconfigure(0, weight=1)
+        frame.grid_columnconfigure(1, weight=1)
+        frame.grid_rowconfigure(len(fields)+1, weight=1)
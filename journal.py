@@ -0,0 +1,265 @@
+import os
+import threading
+import logging
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Exclusive lock on a lock file, held across processes sharing the store"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+
+class ProductJournal:
+    """Append-only journal of stock changes replayed on top of products.txt
+
+    Each record is one tab-separated line:
+        seq, product id, quantity delta, cost price, name, brand, origin
+    Sales leave cost/name/brand/origin empty. The snapshot written by
+    compaction carries the last folded sequence number in its header, so
+    records already folded in are skipped on replay.
+
+    Several processes may share one store. Changes are made inside
+    transaction(), which takes an exclusive file lock, first applies the
+    records other processes appended since this one last looked, and
+    flushes the new records before releasing the lock. Sequence numbers are
+    global, so records are never applied twice. When another process has
+    compacted the journal, reload(catalog) must load the new snapshot into
+    the catalog and return its sequence number. A compaction is recognised
+    by the journal file being replaced or shrinking, or by snapshot_seq(),
+    which returns the sequence number in the snapshot's header, being ahead
+    of the records seen.
+    """
+
+    def __init__(self, path, sync_every=50, compact_threshold=5000, reload=None, snapshot_seq=None):
+        self.path = path
+        self.reload = reload
+        self.snapshot_seq = snapshot_seq
+        self.lock_path = path + ".lock"
+        self.sync_every = sync_every
+        self.compact_threshold = compact_threshold
+        self.seq = 0
+        self.pending = 0
+        self.unsynced = 0
+        self.offset = 0
+        self._inode = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._compactor = None
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            # Terminate a torn record left by a crashed writer
+            if self._file.tell():
+                with open(self.path, "rb") as file:
+                    file.seek(-1, os.SEEK_END)
+                    if file.read(1) != b"\n":
+                        self._file.write(b"\n")
+            self._inode = os.fstat(self._file.fileno()).st_ino
+        return self._file
+
+    def _close(self):
+        self._sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def lock(self):
+        """Exclusive cross-process lock on the products file and journal"""
+        return FileLock(self.lock_path)
+
+    def replay(self, catalog, snapshot_seq=0):
+        """Apply journal records newer than the snapshot to the catalog
+
+        Call with the lock held, so the journal read belongs to the snapshot.
+        """
+        self.seq = snapshot_seq
+        self.pending = 0
+        self.offset = 0
+        # None while there is no journal yet: the first one seen is then
+        # treated as a compaction, as it may already hold one
+        self._inode = os.stat(self.path).st_ino if os.path.exists(self.path) else None
+        self.catch_up(catalog)
+        return catalog
+
+    def catch_up(self, catalog):
+        """Apply records appended since the last read; returns the product ids they touched
+
+        Call with the lock held. If another process compacted the journal
+        it is read again from the start, skipping sequence numbers already
+        applied.
+        """
+        touched = []
+        exists = os.path.exists(self.path)
+        stat = os.stat(self.path) if exists else None
+        replaced = exists and (stat.st_ino != self._inode or stat.st_size < self.offset)
+        if replaced:
+            with self._lock:
+                # Appends must go to the new file, not the one compaction replaced
+                self._close()
+            self._inode = stat.st_ino
+            self.offset = 0
+        behind = self.snapshot_seq is not None and self.snapshot_seq() > self.seq
+        if (replaced or behind) and self.reload is not None:
+            # Records we had not seen yet may have been folded into the snapshot
+            self.seq = self.reload(catalog)
+            touched.extend(catalog)
+        if not exists or stat.st_size == self.offset:
+            return touched
+
+        with open(self.path, "rb") as file:
+            file.seek(self.offset)
+            for line in file:
+                # A torn final line from a crash mid-append is ignored
+                if not line.endswith(b"\n"):
+                    logging.warning("Ignoring incomplete journal record")
+                    break
+                self.offset += len(line)
+                parts = line.decode("utf-8", "replace").rstrip("\n").split("\t")
+                try:
+                    seq = int(parts[0])
+                except ValueError:
+                    continue
+                if len(parts) != 7 or seq <= self.seq:
+                    continue
+                self.apply(catalog, parts[1:])
+                self.seq = seq
+                self.pending += 1
+                touched.append(parts[1])
+        return touched
+
+    @contextmanager
+    def transaction(self, catalog, on_change=None):
+        """Hold the store lock, bring the catalog up to date, and publish appends on exit
+
+        on_change, if given, is called with the product ids other processes changed.
+        """
+        with self.lock():
+            touched = self.catch_up(catalog)
+            if touched and on_change is not None:
+                on_change(touched)
+            try:
+                yield catalog
+            finally:
+                with self._lock:
+                    if self._file is not None:
+                        # Visible to other processes now; fsync is still batched
+                        self._file.flush()
+                        self.offset = self._file.tell()
+
+    def apply(self, catalog, fields):
+        pid, delta, cost, name, brand, origin = fields
+        delta = int(delta)
+        if cost:
+            catalog.restock(pid, delta, float(cost), name=name, brand=brand, origin=origin)
+        elif pid in catalog:
+            catalog.adjust_quantity(pid, delta)
+        else:
+            logging.warning(f"Journal record for unknown product {pid}")
+
+    def append(self, pid, delta, cost=None, name=None, brand=None, origin=None):
+        """Record a stock change; durable after the next sync()"""
+        with self._lock:
+            self.seq += 1
+            fields = [str(self.seq), pid, str(delta), "" if cost is None else repr(cost),
+                      name or "", brand or "", origin or ""]
+            line = "\t".join(f.replace("\t", " ") for f in fields) + "\n"
+            self._open().write(line.encode("utf-8"))
+            self.pending += 1
+            self.unsynced += 1
+            if self.unsynced >= self.sync_every:
+                self._sync()
+
+    def _sync(self):
+        if self._file is not None and self.unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.unsynced = 0
+
+    def sync(self):
+        """Flush and fsync every record appended so far"""
+        with self._lock:
+            self._sync()
+
+    def maybe_compact(self, catalog, write_snapshot):
+        """Fold the journal into a fresh snapshot in the background once it grows large"""
+        if self.pending >= self.compact_threshold:
+            self.compact(catalog, write_snapshot)
+
+    def compact(self, catalog, write_snapshot, background=True):
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        with self.lock():
+            self.catch_up(catalog)
+            with self._lock:
+                self._sync()
+                seq = self.seq
+                offset = self.offset
+                inode = self._inode
+                snapshot = {p.id: p.copy() for p in catalog.values()}
+                self.pending = 0
+
+        if background:
+            self._compactor = threading.Thread(target=self._compact, args=(snapshot, seq, offset, inode,
+                                               write_snapshot), daemon=True)
+            self._compactor.start()
+        else:
+            self._compact(snapshot, seq, offset, inode, write_snapshot)
+
+    def _compact(self, snapshot, seq, offset, inode, write_snapshot):
+        try:
+            with self.lock():
+                if inode is not None and os.stat(self.path).st_ino != inode:
+                    logging.info("Journal already compacted by another process")
+                    return
+                write_snapshot(snapshot, seq)
+                with self._lock:
+                    # Keep only the records appended since the snapshot was taken
+                    self._close()
+                    with open(self.path, "rb") as file:
+                        file.seek(offset)
+                        tail = file.read()
+                    tmp_path = self.path + ".tmp"
+                    with open(tmp_path, "wb") as file:
+                        file.write(tail)
+                        file.flush()
+                        os.fsync(file.fileno())
+                    os.replace(tmp_path, self.path)
+                    self._inode = os.stat(self.path).st_ino
+                    self.offset -= offset
+            logging.info(f"Product journal compacted at seq {seq}")
+        except OSError as e:
+            logging.error(f"Journal compaction failed: {e}")
+
+    def close(self):
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            self._close()
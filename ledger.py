@@ -0,0 +1,202 @@
+import os
+import struct
+import uuid
+from datetime import datetime, date, timedelta
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# One fixed-width record per sold line:
+#   timestamp      float64  local wall-clock seconds since 1970-01-01
+#   sale_id        16 bytes uuid shared by the lines of one sale
+#   staff          16 bytes utf-8, zero padded, cut short if longer
+#   product_id     16 bytes utf-8, zero padded; longer ids are refused
+#   quantity       int32    paid units
+#   free_quantity  int32    Buy 3 Get 1 Free units
+#   amount         float64  amount charged
+RECORD = struct.Struct("<d16s16s16siid")
+ID_BYTES = 16
+
+if numpy is not None:
+    DTYPE = numpy.dtype([("timestamp", "<f8"), ("sale_id", "S16"), ("staff", "S16"),
+                         ("product_id", "S16"), ("quantity", "<i4"),
+                         ("free_quantity", "<i4"), ("amount", "<f8")])
+
+EPOCH = datetime(1970, 1, 1)
+DAY = 86400
+
+
+def to_timestamp(moment):
+    return (moment - EPOCH).total_seconds()
+
+
+def from_timestamp(timestamp):
+    return EPOCH + timedelta(seconds=timestamp)
+
+
+def encode(text):
+    """Staff names are labels, so a long one is cut at a character boundary"""
+    return text.encode("utf-8")[:ID_BYTES].decode("utf-8", "ignore").encode("utf-8")
+
+
+def check_product_id(pid):
+    """Raise ValueError if pid would not fit the ledger's product_id field"""
+    if len(pid.encode("utf-8")) > ID_BYTES:
+        raise ValueError(f"product_id {pid!r} is longer than {ID_BYTES} bytes")
+
+
+def encode_product_id(pid):
+    # A truncated id would silently merge two products' sales
+    check_product_id(pid)
+    return pid.encode("utf-8")
+
+
+def decode(raw):
+    return raw.rstrip(b"\0").decode("utf-8", "replace")
+
+
+class SalesLedger:
+    """Append-only binary ledger of console sales
+
+    Records are appended in time order, so a day's sales are found with a
+    binary search and month-end totals are a single vectorized pass when
+    NumPy is installed. render_day() reproduces the old daily text report.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def append_sale(self, staff, lines, moment=None):
+        """Append one sale of (product_id, qty, free_qty, amount) lines; returns the sale id
+
+        Raises ValueError, writing nothing, if a product id is over 16 bytes.
+        """
+        sale_id = uuid.uuid4().bytes
+        timestamp = to_timestamp(moment or datetime.now())
+        data = b"".join(RECORD.pack(timestamp, sale_id, encode(staff), encode_product_id(pid),
+                                    qty, free_qty, amount)
+                        for pid, qty, free_qty, amount in lines)
+        with open(self.path, "ab") as file:
+            # Drop a torn record left by a crash so the file stays aligned
+            extra = file.tell() % RECORD.size
+            if extra:
+                file.truncate(file.tell() - extra)
+            # Keep records in time order even if the clock steps backwards
+            if file.tell():
+                with open(self.path, "rb") as tail:
+                    tail.seek(file.tell() - RECORD.size)
+                    last = RECORD.unpack(tail.read(RECORD.size))[0]
+                if timestamp < last:
+                    data = b"".join(RECORD.pack(last, *RECORD.unpack_from(data, offset)[1:])
+                                    for offset in range(0, len(data), RECORD.size))
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        return sale_id
+
+    def record_count(self):
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path) // RECORD.size
+
+    def load(self):
+        """All records as a NumPy structured array (memory-mapped, read-only)"""
+        if numpy is None:
+            raise RuntimeError("NumPy is required for vectorized ledger scans")
+        count = self.record_count()
+        if count == 0:
+            return numpy.zeros(0, dtype=DTYPE)
+        return numpy.memmap(self.path, dtype=DTYPE, mode="r", shape=(count,))
+
+    def records(self, start=0, stop=None):
+        """Decode records [start, stop) as tuples without NumPy"""
+        stop = self.record_count() if stop is None else stop
+        if stop <= start:
+            return
+        with open(self.path, "rb") as file:
+            file.seek(start * RECORD.size)
+            data = file.read((stop - start) * RECORD.size)
+        for timestamp, sale_id, staff, pid, qty, free_qty, amount in RECORD.iter_unpack(data):
+            yield timestamp, sale_id, decode(staff), decode(pid), qty, free_qty, amount
+
+    def _search(self, file, count, timestamp):
+        """Index of the first record at or after timestamp"""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            file.seek(mid * RECORD.size)
+            if RECORD.unpack(file.read(RECORD.size))[0] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _bounds(self, lo_timestamp, hi_timestamp):
+        """Index range of records with lo <= timestamp < hi, by binary search"""
+        if numpy is not None:
+            timestamps = self.load()["timestamp"]
+            return (int(numpy.searchsorted(timestamps, lo_timestamp)),
+                    int(numpy.searchsorted(timestamps, hi_timestamp)))
+        count = self.record_count()
+        if count == 0:
+            return 0, 0
+        with open(self.path, "rb") as file:
+            return self._search(file, count, lo_timestamp), self._search(file, count, hi_timestamp)
+
+    def day_records(self, day):
+        start = to_timestamp(datetime.combine(day, datetime.min.time()))
+        lo, hi = self._bounds(start, start + DAY)
+        return list(self.records(lo, hi))
+
+    def days(self):
+        """Sorted list of dates that have sales"""
+        if numpy is not None:
+            timestamps = self.load()["timestamp"]
+            day_numbers = numpy.unique((timestamps // DAY).astype("int64"))
+            return [date(1970, 1, 1) + timedelta(days=int(n)) for n in day_numbers]
+        return sorted({from_timestamp(record[0]).date() for record in self.records()})
+
+    def daily_totals(self):
+        """(date, sale lines, amount) per day, in one vectorized pass"""
+        if numpy is None:
+            totals = {}
+            for record in self.records():
+                day = from_timestamp(record[0]).date()
+                lines, amount = totals.get(day, (0, 0.0))
+                totals[day] = (lines + 1, amount + record[6])
+            return [(day, *totals[day]) for day in sorted(totals)]
+        records = self.load()
+        if len(records) == 0:
+            return []
+        day_numbers = (records["timestamp"] // DAY).astype("int64")
+        first = int(day_numbers.min())
+        offsets = day_numbers - first
+        lines = numpy.bincount(offsets)
+        amounts = numpy.bincount(offsets, weights=records["amount"])
+        return [(date(1970, 1, 1) + timedelta(days=first + int(i)), int(lines[i]), float(amounts[i]))
+                for i in numpy.nonzero(lines)[0]]
+
+    def render_day(self, day, products):
+        """Render a day's sales in the daily sales report text layout"""
+        date_str = day.isoformat()
+        out = [f"{'WeCare Daily Sales Report':^50}\n",
+               f"{'Date: ' + date_str:^50}\n",
+               "=" * 50 + "\n\n"]
+
+        sale_id, total = None, 0.0
+        for timestamp, record_sale, staff, pid, qty, free_qty, amount in self.day_records(day):
+            if record_sale != sale_id:
+                if sale_id is not None:
+                    out.append(f"Total Sale: Rs. {total:,.2f}\n" + "-" * 50 + "\n\n")
+                sale_id, total = record_sale, 0.0
+                out.append(f"Time: {from_timestamp(timestamp).strftime('%H:%M:%S')}  |  Staff: {staff}\n")
+                out.append("-" * 50 + "\n")
+            product = products.get(pid)
+            label = f"{product['name']} ({product['brand']})" if product else pid
+            out.append(f"{label} - Qty: {qty}, Rs. {amount:,.2f}\n")
+            total += amount
+        if sale_id is not None:
+            out.append(f"Total Sale: Rs. {total:,.2f}\n" + "-" * 50 + "\n\n")
+        return "".join(out)
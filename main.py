@@ -1,14 +1,57 @@
-import tkinter as tk
-from core import WeCareSystem
-from pathlib import Path
-import logging
-
-logging.basicConfig(filename='wecare.log', level=logging.INFO, 
-                   format='%(asctime)s - %(levelname)s - %(message)s')
-
-if __name__ == "__main__":
-    Path("D:/skincare/receipts").mkdir(exist_ok=True)
-    Path("D:/skincare/stock_alerts").mkdir(exist_ok=True)
-    root = tk.Tk()
-    wecare = WeCareSystem(root)
-    wecare.run()
\ No newline at end of file
+import time
+import logging
+import os
+import sys
+
+
+class StartupTimer:
+    """Records how long each startup step took, from the first line of main"""
+
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.steps = []
+
+    def mark(self, label):
+        now = time.perf_counter()
+        self.steps.append((label, now - self.last))
+        self.last = now
+
+    def report(self, show=False):
+        total = self.last - self.start
+        lines = [f"{label:<16} {seconds * 1000:7.1f} ms" for label, seconds in self.steps]
+        lines.append(f"{'total':<16} {total * 1000:7.1f} ms")
+        logging.info("Startup time\n" + "\n".join(lines))
+        if show:
+            print("\n".join(lines), file=sys.stderr)
+
+
+timer = StartupTimer()
+import tkinter as tk
+from core import WeCareSystem
+from pathlib import Path
+timer.mark("imports")
+
+logging.basicConfig(filename='wecare.log', level=logging.INFO,
+                   format='%(asctime)s - %(levelname)s - %(message)s')
+
+if __name__ == "__main__":
+    Path("D:/skincare/receipts").mkdir(exist_ok=True)
+    Path("D:/skincare/stock_alerts").mkdir(exist_ok=True)
+    root = tk.Tk()
+    timer.mark("create root")
+    # WECARE_SERVER=host:port (or a Unix socket path) makes this a till of a shared store server
+    store = None
+    server = os.environ.get("WECARE_SERVER")
+    if server:
+        from client import StoreClient
+        host, _, port = server.rpartition(":")
+        store = StoreClient(host, int(port)) if port.isdigit() else StoreClient(path=server)
+    wecare = WeCareSystem(root, store=store, timer=timer)
+
+    def first_paint():
+        timer.mark("first paint")
+        # --timing (or WECARE_TIMING=1) also prints the breakdown
+        timer.report(show="--timing" in sys.argv or bool(os.environ.get("WECARE_TIMING")))
+
+    root.after_idle(first_paint)
+    wecare.run()
@@ -1,24 +1,238 @@
-from email.mime.text import MIMEText
-import smtplib
-import logging
-
-class NotificationService:
-    def send_email(self, recipient, subject, body):
-        try:
-            msg = MIMEText(body)
-            msg['Subject'] = subject
-            msg['From'] = 'noreply@wecare.com'
-            msg['To'] = recipient
-            logging.info(f"Email sent to {recipient}: {subject}")
-            return True
-        except Exception as e:
-            logging.error(f"Email sending failed: {e}")
-            return False
-
-    def send_sms(self, phone, message):
-        try:
-            logging.info(f"SMS sent to {phone}: {message}")
-            return True
-        except Exception as e:
-            logging.error(f"SMS sending failed: {e}")
-            return False
\ No newline at end of file
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+
+class NotificationService:
+    """Sends email and SMS notifications
+
+    With a database attached, messages are written to the notification_outbox
+    table and returned from immediately; a pool of worker threads drains the
+    outbox over reused SMTP connections and retries failures with backoff.
+    Without one, messages are delivered inline. smtp_host=None only logs
+    emails, as there is no mail server configured by default.
+
+    Several processes (tills, the store server) may drain one outbox. A
+    claimed message is leased to its worker for lease seconds; only a claim
+    whose lease has run out, e.g. from a crashed process, is taken over.
+    """
+
+    def __init__(self, db=None, smtp_host=None, smtp_port=25, sender='noreply@wecare.com',
+                 workers=2, max_attempts=5, backoff=2.0, poll_interval=5.0, lease=300.0):
+        self.db = db
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.smtp_host = smtp_host
+        self.smtp_port = smtp_port
+        self.sender = sender
+        self.worker_count = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.poll_interval = poll_interval
+        self.latencies = deque(maxlen=1000)
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._workers = []
+        self._start_lock = threading.Lock()
+
+    def send_email(self, recipient, subject, body):
+        if self.db is not None:
+            return self.enqueue('email', recipient, body, subject)
+        try:
+            self.deliver_email(recipient, subject, body)
+            return True
+        except Exception as e:
+            logging.error(f"Email sending failed: {e}")
+            return False
+
+    def send_sms(self, phone, message):
+        if self.db is not None:
+            return self.enqueue('sms', phone, message)
+        try:
+            self.deliver_sms(phone, message)
+            return True
+        except Exception as e:
+            logging.error(f"SMS sending failed: {e}")
+            return False
+
+    def enqueue(self, channel, recipient, body, subject=None):
+        """Store a message in the outbox for the dispatcher"""
+        try:
+            with self.db.writer() as conn:
+                conn.execute("""
+                    INSERT INTO notification_outbox (channel, recipient, subject, body, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (channel, recipient, subject, body, time.time()))
+        except Exception as e:
+            logging.error(f"Queueing {channel} to {recipient} failed: {e}")
+            return False
+        self.start()
+        self._wakeup.set()
+        return True
+
+    def deliver_email(self, recipient, subject, body):
+        # The email modules are only needed once there is mail to send
+        from email.mime.text import MIMEText
+        import smtplib
+        msg = MIMEText(body)
+        msg['Subject'] = subject
+        msg['From'] = self.sender
+        msg['To'] = recipient
+        if self.smtp_host is not None:
+            try:
+                self._smtp().send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # The reused connection timed out; reconnect once
+                self._close_smtp()
+                self._smtp().send_message(msg)
+        logging.info(f"Email sent to {recipient}: {subject}")
+
+    def deliver_sms(self, phone, message):
+        logging.info(f"SMS sent to {phone}: {message}")
+
+    def _smtp(self):
+        """Per-thread SMTP connection, kept open between messages"""
+        smtp = getattr(self._local, 'smtp', None)
+        if smtp is None:
+            import smtplib
+            smtp = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=30)
+            self._local.smtp = smtp
+        return smtp
+
+    def _close_smtp(self):
+        smtp = getattr(self._local, 'smtp', None)
+        self._local.smtp = None
+        if smtp is not None:
+            import smtplib
+            try:
+                smtp.quit()
+            except smtplib.SMTPException:
+                smtp.close()
+
+    def start(self):
+        """Start the dispatcher workers, replacing any that have died
+
+        Call at startup so messages left pending by an earlier run go out
+        without waiting for a new one to be queued.
+        """
+        if self.db is None:
+            return
+        with self._start_lock:
+            alive = [worker for worker in self._workers if worker.is_alive()]
+            if len(alive) == self.worker_count:
+                return
+            self._stopping.clear()
+            for i in range(len(alive), self.worker_count):
+                worker = threading.Thread(target=self._run, name=f"notification-{i}", daemon=True)
+                worker.start()
+                alive.append(worker)
+            self._workers = alive
+
+    def _claim(self):
+        """Lease the next due message to this process; expired leases are taken over"""
+        now = time.time()
+        with self.db.writer() as conn:
+            row = conn.execute("""
+                SELECT message_id, channel, recipient, subject, body, attempts, created_at
+                FROM notification_outbox
+                WHERE (status = 'pending' AND next_attempt_at <= ?1)
+                   OR (status = 'sending' AND COALESCE(claimed_at, 0) <= ?2)
+                ORDER BY message_id LIMIT 1
+            """, (now, now - self.lease)).fetchone()
+            if row is None:
+                return None
+            cursor = conn.execute("""
+                UPDATE notification_outbox SET status = 'sending', claimed_at = ?, claimed_by = ?
+                WHERE message_id = ? AND (status = 'pending' OR COALESCE(claimed_at, 0) <= ?)
+            """, (now, self.owner, row[0], now - self.lease))
+            return row if cursor.rowcount == 1 else None
+
+    def _run(self):
+        errors = 0
+        try:
+            while not self._stopping.is_set():
+                self._wakeup.clear()
+                try:
+                    message = self._claim()
+                    if message is not None:
+                        self._dispatch(message)
+                        errors = 0
+                        continue
+                except Exception as e:
+                    # e.g. "database is locked" while another till writes; back off and carry on
+                    errors = min(errors + 1, 5)
+                    logging.error(f"Notification worker error: {e}")
+                    self._stopping.wait(self.backoff * 2 ** errors)
+                    continue
+                errors = 0
+                self._wakeup.wait(self.poll_interval)
+        finally:
+            self._close_smtp()
+
+    def _dispatch(self, message):
+        message_id, channel, recipient, subject, body, attempts, created_at = message
+        started = time.perf_counter()
+        try:
+            if channel == 'email':
+                self.deliver_email(recipient, subject, body)
+            else:
+                self.deliver_sms(recipient, body)
+        except Exception as e:
+            attempts += 1
+            give_up = attempts >= self.max_attempts
+            with self.db.writer() as conn:
+                conn.execute("""
+                    UPDATE notification_outbox
+                    SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?
+                    WHERE message_id = ? AND claimed_by = ?
+                """, ('failed' if give_up else 'pending', attempts,
+                      time.time() + self.backoff * 2 ** attempts, str(e), message_id, self.owner))
+            with self._stats_lock:
+                if give_up:
+                    self.failed += 1
+                else:
+                    self.retried += 1
+            logging.error(f"{channel} to {recipient} failed (attempt {attempts}): {e}")
+            return
+
+        with self.db.writer() as conn:
+            conn.execute("""
+                UPDATE notification_outbox SET status = 'sent', attempts = ?, sent_at = ?
+                WHERE message_id = ? AND claimed_by = ?
+            """, (attempts + 1, time.time(), message_id, self.owner))
+        with self._stats_lock:
+            self.sent += 1
+            self.latencies.append(time.perf_counter() - started)
+
+    def queue_depth(self):
+        with self.db.reader() as conn:
+            return conn.execute("""
+                SELECT COUNT(*) FROM notification_outbox WHERE status IN ('pending', 'sending')
+            """).fetchone()[0]
+
+    def metrics(self):
+        """Queue depth, delivery counters and send latency in seconds"""
+        with self._stats_lock:
+            latencies = sorted(self.latencies)
+            stats = {'sent': self.sent, 'failed': self.failed, 'retried': self.retried}
+        stats['queue_depth'] = self.queue_depth() if self.db is not None else 0
+        if latencies:
+            stats['latency_avg'] = sum(latencies) / len(latencies)
+            stats['latency_p95'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return stats
+
+    def close(self, timeout=5):
+        """Stop the workers; undelivered messages stay in the outbox"""
+        self._stopping.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
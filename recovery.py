@@ -0,0 +1,165 @@
+"""Point-in-time recovery from a backup and the operation log
+
+Restores the newest backup that holds nothing after the chosen moment, then
+replays the sales, restocks and bulk imports logged after it up to that moment:
+
+    python recovery.py --until 2026-10-17T14:30 --out restored.db
+
+The restored database is written beside --out and only moved into place
+once the replay has finished. Operations missing from the log (an append
+that failed after its sale committed) make recovery fail, as the stock
+would come out wrong; --allow-gaps restores anyway and reports each gap.
+A sale of a product the restored database does not have also fails it.
+Start the store on it with a fresh oplog folder: the old log still holds
+the operations after --until.
+"""
+import argparse
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+from datetime import datetime
+
+from backup import list_backups
+from database import DatabaseManager
+from oplog import iter_ops
+
+
+def restore_snapshot(backup_path, target):
+    """Copy a backup to target, unzipping it if it is compressed"""
+    opener = gzip.open if backup_path.endswith(".gz") else open
+    with opener(backup_path, "rb") as src, open(target, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+
+
+def snapshot_state(path):
+    """(seq, at) of the last logged operation a restored backup holds"""
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT seq, at FROM oplog_state").fetchone() or (0, "")
+    except sqlite3.OperationalError:
+        # Taken before operations were logged
+        return 0, ""
+    finally:
+        conn.close()
+
+
+def missing_ranges(expected, ahead, limit):
+    """(first, last) runs of sequence numbers up to limit that never turned up
+
+    expected is the lowest number not yet seen and ahead the numbers seen
+    above it.
+    """
+    ranges = []
+    for number in sorted(n for n in ahead if n <= limit):
+        if number > expected:
+            ranges.append((expected, number - 1))
+        expected = number + 1
+    return ranges
+
+
+def format_ranges(ranges):
+    return ", ".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+def remove_database(path):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def recover(target, until=None, backup_folder="wecare_backups", oplog_folder="wecare_oplog",
+            batch=1000, allow_gaps=False):
+    """Rebuild the database as of until (ISO time, None for everything logged) into target
+
+    Returns (backup used, operations replayed, gaps), gaps being the
+    (first, last) runs of operation numbers missing from the log. Raises
+    ValueError when target exists, no backup predates until, or the log
+    has gaps and allow_gaps is False.
+    """
+    if os.path.exists(target):
+        raise ValueError(f"{target} already exists")
+    part = target + ".part"
+    for moment, path in list_backups(backup_folder):
+        if until is not None and moment.isoformat() > until:
+            continue
+        restore_snapshot(path, part)
+        seq, at = snapshot_state(part)
+        if until is None or at <= until:
+            break
+        # The copy finished after until and already holds later operations
+        remove_database(part)
+    else:
+        raise ValueError(f"No backup in {backup_folder} was taken before {until}")
+    logging.info(f"Restored {path} at operation {seq}")
+
+    replayed, latest = 0, None
+    # Every number after the snapshot's must turn up; processes sharing a
+    # database may append theirs slightly out of order, so early arrivals wait in ahead
+    expected, ahead = seq + 1, set()
+    db = DatabaseManager(part)
+    try:
+        with db.writer() as conn:
+            for record in iter_ops(oplog_folder, seq, until):
+                number = record["seq"]
+                if number < expected or number in ahead:
+                    logging.warning(f"Skipping duplicate operation {number}")
+                    continue
+                if number == expected:
+                    expected += 1
+                    while expected in ahead:
+                        ahead.remove(expected)
+                        expected += 1
+                else:
+                    ahead.add(number)
+                if until is not None and record["at"] > until:
+                    continue
+                db.replay_operation(conn, record)
+                if latest is None or number > latest["seq"]:
+                    latest = record
+                replayed += 1
+                if replayed % batch == 0:
+                    conn.commit()
+            if latest is not None:
+                conn.execute("UPDATE oplog_state SET seq = ?, at = ?", (latest["seq"], latest["at"]))
+            gaps = missing_ranges(expected, ahead, latest["seq"] if latest else seq)
+            if gaps:
+                message = f"Operation log is missing operations {format_ranges(gaps)}"
+                if not allow_gaps:
+                    raise ValueError(f"{message}; the restored stock would be wrong")
+                logging.error(message)
+    except BaseException:
+        db.close()
+        remove_database(part)
+        raise
+    db.close()
+    os.replace(part, target)
+    logging.info(f"Replayed {replayed} operations into {target}")
+    return path, replayed, gaps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restore the WeCare database to a point in time")
+    parser.add_argument("--out", required=True, help="path of the restored database")
+    parser.add_argument("--until", help="ISO date/time to recover to; default everything logged")
+    parser.add_argument("--backups", default="wecare_backups")
+    parser.add_argument("--oplog", default="wecare_oplog")
+    parser.add_argument("--allow-gaps", action="store_true",
+                        help="restore even if operations are missing from the log")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        until = datetime.fromisoformat(args.until).isoformat() if args.until else None
+        path, replayed, gaps = recover(args.out, until, args.backups, args.oplog,
+                                       allow_gaps=args.allow_gaps)
+    except ValueError as e:
+        parser.exit(1, f"Recovery failed: {e}\n")
+    print(f"Restored {path} and replayed {replayed} operations into {args.out}")
+    if gaps:
+        print(f"Missing from the log, not replayed: operations {format_ranges(gaps)}")
+
+
+if __name__ == "__main__":
+    main()
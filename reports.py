@@ -0,0 +1,152 @@
+from datetime import date, timedelta
+
+REPORT_HEADER = "Sales Report\n" + "=" * 50 + "\n"
+
+# Keyset pagination on (purchase_date, purchase_id): each page starts strictly
+# after the last row of the previous one, so every page is an index range scan
+PAGE_SQL = """
+    SELECT p.purchase_date, p.purchase_id, c.name, pr.name, p.quantity, p.total,
+           p.payment_method, p.staff
+    FROM purchases p
+    JOIN customers c ON p.customer_id = c.customer_id
+    JOIN products pr ON p.product_id = pr.product_id
+    WHERE (p.purchase_date, p.purchase_id) > (?, ?)
+    {filters}
+    ORDER BY p.purchase_date, p.purchase_id
+    LIMIT ?
+"""
+
+
+def sales_filters(start=None, end=None, staff=None):
+    """SQL conditions and parameters for an inclusive date range and staff member"""
+    conditions, params = [], []
+    if start:
+        conditions.append("p.purchase_date >= ?")
+        params.append(date.fromisoformat(start).isoformat())
+    if end:
+        conditions.append("p.purchase_date < ?")
+        params.append((date.fromisoformat(end) + timedelta(days=1)).isoformat())
+    if staff:
+        conditions.append("p.staff = ?")
+        params.append(staff)
+    return "".join(f"AND {c}\n" for c in conditions), params
+
+
+def fetch_sales_page(db, start=None, end=None, staff=None, after=("", ""), page_size=500):
+    """One page of sales rows following the (purchase_date, purchase_id) key in after"""
+    filters, params = sales_filters(start, end, staff)
+    with db.reader() as conn:
+        return conn.execute(PAGE_SQL.format(filters=filters),
+                            [*after, *params, page_size]).fetchall()
+
+
+def iter_pages(fetch_page, page_size=500):
+    """Yield pages from fetch_page(after, page_size) until one comes back short"""
+    after = ("", "")
+    while True:
+        rows = fetch_page(after, page_size)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        after = (rows[-1][0], rows[-1][1])
+
+
+def iter_sales_pages(db, start=None, end=None, staff=None, page_size=500):
+    """Yield lists of sales rows a page at a time, oldest first
+
+    Dates are 'YYYY-MM-DD' strings. Each page borrows a pooled reader only
+    while it is fetched, so a long report never pins a connection.
+    A malformed date raises ValueError here, before any page is fetched.
+    """
+    sales_filters(start, end, staff)
+    return iter_pages(lambda after, size: fetch_sales_page(db, start, end, staff, after, size),
+                      page_size)
+
+
+def format_sale(row):
+    purchase_date, _, customer, product, quantity, total, payment, staff = row
+    text = f"Date: {purchase_date}\nCustomer: {customer}\nProduct: {product}\n"
+    text += f"Quantity: {quantity}\nTotal: Rs. {total:,.2f}\n"
+    if staff:
+        text += f"Staff: {staff}\n"
+    text += f"Payment: {payment}\n" + "-" * 50 + "\n"
+    return text
+
+
+def format_page(rows):
+    return "".join(format_sale(row) for row in rows)
+
+
+def write_sales_report(db, file, start=None, end=None, staff=None, page_size=500):
+    """Write the report to an open text file page by page; returns the number of sales"""
+    return write_pages(file, iter_sales_pages(db, start, end, staff, page_size))
+
+
+def write_pages(file, pages):
+    file.write(REPORT_HEADER)
+    count = 0
+    for rows in pages:
+        file.write(format_page(rows))
+        count += len(rows)
+    return count
+
+
+# Dashboard queries answered from the daily rollup tables, so their cost
+# grows with the number of days in the range rather than with purchases
+
+def rollup_range(start=None, end=None):
+    return start or "0000-00-00", end or "9999-99-99"
+
+
+def sales_summary(db, start=None, end=None, staff=None):
+    """(number of sale lines, revenue) for an inclusive date range"""
+    with db.reader() as conn:
+        if staff:
+            row = conn.execute("""
+                SELECT COALESCE(SUM(sales), 0), COALESCE(SUM(revenue), 0)
+                FROM sales_daily_staff WHERE staff = ? AND day BETWEEN ? AND ?
+            """, (staff, *rollup_range(start, end))).fetchone()
+        else:
+            row = conn.execute("""
+                SELECT COALESCE(SUM(sales), 0), COALESCE(SUM(revenue), 0)
+                FROM sales_daily_payment WHERE day BETWEEN ? AND ?
+            """, rollup_range(start, end)).fetchone()
+    return row
+
+
+def revenue_by_day(db, start=None, end=None):
+    with db.reader() as conn:
+        return conn.execute("""
+            SELECT day, SUM(sales), SUM(revenue) FROM sales_daily_payment
+            WHERE day BETWEEN ? AND ? GROUP BY day ORDER BY day
+        """, rollup_range(start, end)).fetchall()
+
+
+def revenue_by_payment_method(db, start=None, end=None):
+    with db.reader() as conn:
+        return conn.execute("""
+            SELECT payment_method, SUM(sales), SUM(revenue) FROM sales_daily_payment
+            WHERE day BETWEEN ? AND ? GROUP BY payment_method ORDER BY 3 DESC
+        """, rollup_range(start, end)).fetchall()
+
+
+def revenue_by_staff(db, start=None, end=None):
+    with db.reader() as conn:
+        return conn.execute("""
+            SELECT staff, SUM(sales), SUM(revenue) FROM sales_daily_staff
+            WHERE day BETWEEN ? AND ? GROUP BY staff ORDER BY 3 DESC
+        """, rollup_range(start, end)).fetchall()
+
+
+def top_products(db, start=None, end=None, limit=10):
+    """(product_id, name, units sold, free units, revenue), best sellers first"""
+    with db.reader() as conn:
+        return conn.execute("""
+            SELECT r.product_id, pr.name, SUM(r.quantity), SUM(r.free_quantity), SUM(r.revenue)
+            FROM sales_daily_product r
+            LEFT JOIN products pr ON pr.product_id = r.product_id
+            WHERE r.day BETWEEN ? AND ?
+            GROUP BY r.product_id ORDER BY 5 DESC LIMIT ?
+        """, (*rollup_range(start, end), limit)).fetchall()
@@ -0,0 +1,68 @@
+import re
+import heapq
+from collections import Counter, defaultdict
+
+
+class ProductSearchIndex:
+    """Trigram index over product name, brand and origin for as-you-type search
+
+    Words are padded with two leading spaces, so the first one or two typed
+    letters already form trigrams ("  c", " ce") and prefixes match. Typos
+    still score well because most trigrams survive ("cetafil" shares 4 of 7
+    with "cetaphil").
+    """
+    FIELDS = ("name", "brand", "origin")
+
+    def __init__(self, products=(), min_score=0.5):
+        self.min_score = min_score
+        self.postings = defaultdict(set)
+        self.grams = {}
+        for product in products:
+            self.add(product)
+
+    @staticmethod
+    def words(text):
+        return re.findall(r"\w+", text.lower())
+
+    @staticmethod
+    def trigrams(word, complete=True):
+        padded = "  " + word + (" " if complete else "")
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def add(self, product):
+        """Index a product, replacing any previous entry for the same id"""
+        self.remove(product.id)
+        grams = set()
+        for field in self.FIELDS:
+            for word in self.words(getattr(product, field)):
+                grams |= self.trigrams(word)
+        self.grams[product.id] = grams
+        for gram in grams:
+            self.postings[gram].add(product.id)
+
+    def remove(self, pid):
+        for gram in self.grams.pop(pid, ()):
+            ids = self.postings[gram]
+            ids.discard(pid)
+            if not ids:
+                del self.postings[gram]
+
+    def search(self, query, k=10):
+        """Return up to k (score, product id) pairs, best match first"""
+        words = self.words(query)
+        if not words:
+            return []
+
+        # The last word may still be being typed, so it only has to match as a prefix
+        query_grams = set()
+        for i, word in enumerate(words):
+            query_grams |= self.trigrams(word, complete=i < len(words) - 1)
+
+        hits = Counter()
+        for gram in query_grams:
+            hits.update(self.postings.get(gram, ()))
+
+        total = len(query_grams)
+        scored = ((count / total, pid) for pid, count in hits.items()
+                  if count / total >= self.min_score)
+        return heapq.nlargest(k, scored)
@@ -0,0 +1,139 @@
+"""Local checkout server so several tills can share one store
+
+Each till connects over localhost TCP or a Unix socket and sends one JSON
+object per line:
+
+    {"id": 1, "method": "checkout", "params": {"customer_name": ..., "items": [...]}}
+
+and gets one line back, either {"id": 1, "result": ...} or
+{"id": 1, "error": {"type": "ValueError", "message": ...}}. Requests on one
+connection are answered in order; connections are served concurrently,
+with the database work run on a thread pool so the event loop never blocks.
+
+    python server.py --db wecare.db --port 8765
+    python server.py --db wecare.db --socket /tmp/wecare.sock
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from database import DatabaseManager
+from notification import NotificationService
+from ecommerce import ECommerceIntegration
+from alerts import StockAlertDispatcher
+from backup import BackupScheduler
+from oplog import OpLog
+from store import StoreService, StoreError, DEFAULT_HOST, DEFAULT_PORT
+
+# Longest request line accepted, so a runaway client cannot exhaust memory
+MAX_LINE = 1 << 20
+
+
+class StoreServer:
+    """Serves a StoreService to thin clients over newline-delimited JSON"""
+
+    def __init__(self, store, workers=8):
+        self.store = store
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="store")
+
+    def handle_request(self, line):
+        """Answer one request line; never raises"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            result = self.store.call(request["method"], request.get("params") or {})
+            return {"id": request_id, "result": result}
+        except ValueError as e:
+            # Bad input from the till, including malformed JSON
+            return {"id": request_id, "error": {"type": "ValueError", "message": str(e)}}
+        except (KeyError, TypeError, AttributeError, StoreError) as e:
+            return {"id": request_id, "error": {"type": "StoreError", "message": f"Bad request: {e}"}}
+        except sqlite3.Error as e:
+            logging.error(f"Store request error: {e}")
+            return {"id": request_id, "error": {"type": "StoreError", "message": "Database error occurred"}}
+        except Exception as e:
+            # Anything else is a bug; the till gets an answer and the connection stays up
+            logging.exception(f"Unexpected error handling store request: {e}")
+            return {"id": request_id, "error": {"type": "StoreError", "message": "Internal server error"}}
+
+    async def serve_client(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        peer = writer.get_extra_info("peername") or "local socket"
+        logging.info(f"Till connected: {peer}")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await loop.run_in_executor(self.executor, self.handle_request, line)
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            logging.error(f"Till connection error: {e}")
+        finally:
+            writer.close()
+            logging.info(f"Till disconnected: {peer}")
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None, ready=None):
+        if path:
+            if os.path.exists(path):
+                os.remove(path)
+            server = await asyncio.start_unix_server(self.serve_client, path, limit=MAX_LINE)
+            logging.info(f"Store server listening on {path}")
+        else:
+            server = await asyncio.start_server(self.serve_client, host, port, limit=MAX_LINE)
+            logging.info(f"Store server listening on {host}:{port}")
+        if ready is not None:
+            ready()
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WeCare store server for multiple tills")
+    parser.add_argument("--db", default="wecare.db")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--backup-interval", type=float, default=3600.0, help="seconds between backups")
+    parser.add_argument("--compress-backups", action="store_true")
+    parser.add_argument("--oplog", default="wecare_oplog", help="folder of the operation log")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    oplog = OpLog(args.oplog)
+    db = DatabaseManager(args.db, oplog=oplog)
+    notification = NotificationService(db)
+    ecommerce = ECommerceIntegration()
+    ecommerce.attach_change_feed(db)
+    stock_alerts = StockAlertDispatcher(db, notification)
+    backups = BackupScheduler(db, args.backup_interval, args.compress_backups)
+    server = StoreServer(StoreService(db, ecommerce, stock_alerts, notification))
+    notification.start()
+    stock_alerts.start()
+    backups.start()
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.socket,
+                                 ready=lambda: print("Store server ready", flush=True)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        backups.close()
+        stock_alerts.close()
+        ecommerce.close()
+        notification.close()
+        db.close()
+        oplog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import logging
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+try:
+    from .catalog import ProductCatalog
+    from . import reports
+except ImportError:
+    from catalog import ProductCatalog
+    import reports
+
+
+class StoreError(Exception):
+    """A store operation failed for a reason other than bad input"""
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Operations a till may call over RPC; each maps to a StoreService method
+METHODS = ("products", "product_count", "products_page", "search", "checkout", "restock", "stock_alerts",
+           "sales_summary", "sales_page", "reload_catalog", "health", "import_products",
+           "login", "register_user", "request_password_reset", "change_password", "add_customer",
+           "email_receipt")
+
+
+class StoreService:
+    """Catalog and database operations shared by every till of a store
+
+    One instance owns the hot product catalog and keeps it in step with the
+    database: checkouts and restocks write through to both, so the catalog
+    is read from SQLite once rather than by every till. The Tk front end
+    uses an instance directly, or a StoreClient (client.py) talking to one
+    hosted by server.py, which takes the same calls.
+
+    Results are plain tuples and lists so they cross the RPC boundary
+    unchanged. Invalid requests raise ValueError; nothing is written then.
+    Emails and texts to users and customers go through notification, the
+    store's outbox, when one is given.
+    """
+
+    def __init__(self, db, ecommerce=None, stock_alerts=None, notification=None):
+        self.db = db
+        self.ecommerce = ecommerce
+        self.alert_dispatcher = stock_alerts
+        self.notification = notification
+        self._catalog = None
+        self._lock = threading.Lock()
+
+    def catalog(self):
+        with self._lock:
+            if self._catalog is None:
+                with self.db.reader() as conn:
+                    self._catalog = ProductCatalog.from_database(conn)
+            return self._catalog
+
+    def reload_catalog(self):
+        """Drop the cached catalog after a change made behind the store's back (e.g. bulk import)"""
+        with self._lock:
+            self._catalog = None
+        self._changed()
+
+    def _changed(self):
+        if self.ecommerce is not None:
+            self.ecommerce.notify_changes()
+        if self.alert_dispatcher is not None:
+            self.alert_dispatcher.wake()
+
+    def products(self):
+        """Every product as a products table row"""
+        catalog = self.catalog()
+        with self._lock:
+            return [p.as_row() for p in catalog.values()]
+
+    def product_count(self):
+        return self.db.product_count()
+
+    def products_page(self, order="product_id", descending=False, offset=0, limit=200, after=None):
+        """One sorted page of products; see DatabaseManager.products_page"""
+        return [tuple(row) for row in
+                self.db.products_page(order, descending, offset, limit, after)]
+
+    def search(self, keyword, limit=100):
+        """Ranked full-text search; an empty keyword lists the whole catalog"""
+        if not keyword.strip():
+            return self.products()
+        return [tuple(row) for row in self.db.search_products(keyword, limit)]
+
+    def checkout(self, customer_name, items, payment_method, staff=None):
+        """Sell a basket of (product_id, quantity) lines; returns (sale_id, lines)
+
+        See DatabaseManager.checkout for the line layout.
+        """
+        catalog = self.catalog()
+        sale_id, lines = self.db.checkout(customer_name, [tuple(item) for item in items],
+                                          payment_method, staff=staff)
+        with self._lock:
+            for pid, _, _, qty, free_qty, _, _ in lines:
+                if pid in catalog:
+                    catalog.adjust_quantity(pid, -(qty + free_qty))
+        self._changed()
+        return sale_id, lines
+
+    def restock(self, product_id, quantity, cost_price, name="", brand="", category="",
+                subcategory="", origin=""):
+        """Add stock to a product, creating it if it is new"""
+        if not product_id:
+            raise ValueError("Product ID is required")
+        if quantity <= 0 or cost_price <= 0:
+            raise ValueError("Quantity and cost must be positive")
+        catalog = self.catalog()
+        self.db.restock(product_id, quantity, cost_price, name, brand, category, subcategory, origin)
+        with self._lock:
+            catalog.restock(product_id, quantity, cost_price, name=name, brand=brand,
+                            category=category, subcategory=subcategory, origin=origin)
+        self._changed()
+
+    def import_products(self, rows):
+        """Upsert a chunk of validated manifest rows (see bulk.import_into_store)"""
+        self.db.import_products([tuple(row) for row in rows])
+        # Stock and prices changed in bulk, so the catalog is reloaded on next use
+        self.reload_catalog()
+        return len(rows)
+
+    def stock_alerts(self):
+        """Open low-stock alerts; see DatabaseManager.reorder_alerts"""
+        return self.db.reorder_alerts()
+
+    def sales_summary(self, start=None, end=None, staff=None):
+        return tuple(reports.sales_summary(self.db, start, end, staff))
+
+    def sales_page(self, start=None, end=None, staff=None, after=("", ""), page_size=500):
+        """One page of the sales report following the (date, purchase id) key in after"""
+        return [tuple(row) for row in
+                reports.fetch_sales_page(self.db, start, end, staff, tuple(after), page_size)]
+
+    def iter_sales_pages(self, start=None, end=None, staff=None, page_size=500):
+        reports.sales_filters(start, end, staff)
+        return reports.iter_pages(
+            lambda after, size: self.sales_page(start, end, staff, after, size), page_size)
+
+    def login(self, username, password):
+        """True if the credentials match; the user is emailed about the login"""
+        with self.db.reader() as conn:
+            row = conn.execute("SELECT password, email FROM users WHERE username = ?",
+                               (username,)).fetchone()
+        if not row or row[0] != password:
+            return False
+        self._send_email(row[1], "Login Notification", f"User {username} logged in at {datetime.now()}")
+        return True
+
+    def register_user(self, username, password, email, full_name, phone):
+        """Add a user; False if the username or email is taken"""
+        try:
+            with self.db.writer() as conn:
+                conn.execute("INSERT INTO users VALUES (?, ?, ?, ?, ?)",
+                             (username, password, email, full_name, phone))
+        except sqlite3.IntegrityError:
+            return False
+        self._send_email(email, "Welcome to WeCare", f"Welcome {full_name} to WeCare Store!")
+        return True
+
+    def request_password_reset(self, username, email):
+        """Email a recovery code if email is the user's; False otherwise"""
+        with self.db.writer() as conn:
+            row = conn.execute("SELECT email FROM users WHERE username = ?", (username,)).fetchone()
+            if not (row and row[0] == email):
+                return False
+            recovery_code = str(uuid.uuid4())[:8]
+            conn.execute("INSERT INTO recovery_codes VALUES (?, ?, ?)",
+                         (username, recovery_code, datetime.now().isoformat()))
+        self._send_email(email, "Password Recovery Code", f"Your recovery code is: {recovery_code}")
+        return True
+
+    def change_password(self, username, current, new):
+        """Replace the password; False if current is not the user's password"""
+        with self.db.writer() as conn:
+            row = conn.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()
+            if not row or row[0] != current:
+                return False
+            conn.execute("UPDATE users SET password = ? WHERE username = ?", (new, username))
+        return True
+
+    def add_customer(self, name, email="", phone="", address=""):
+        """Add a customer and text them a welcome; returns the customer id"""
+        if not name:
+            raise ValueError("Customer name is required")
+        customer_id = str(uuid.uuid4())
+        with self.db.writer() as conn:
+            conn.execute("INSERT INTO customers VALUES (?, ?, ?, ?, ?)",
+                         (customer_id, name, email, phone, address))
+        if self.notification is not None:
+            self.notification.send_sms(phone, f"Welcome {name} to WeCare Store!")
+        return customer_id
+
+    def email_receipt(self, recipient, receipt):
+        self._send_email(recipient, "Purchase Receipt", receipt)
+
+    def _send_email(self, recipient, subject, body):
+        if self.notification is not None:
+            self.notification.send_email(recipient, subject, body)
+
+    def health(self):
+        """Background state worth alerting on; a failing oplog means recovery will stop at a gap"""
+        return {"oplog": self.db.oplog.metrics() if self.db.oplog is not None else None}
+
+    def call(self, method, params):
+        """Dispatch one RPC request by name"""
+        if method not in METHODS:
+            raise StoreError(f"Unknown method {method}")
+        logging.debug(f"Store call {method}")
+        return getattr(self, method)(**params)
@@ -0,0 +1,46 @@
+import pytest
+
+from bulk import ImportResult, valid_rows, validate_row
+
+
+def test_validate_row_builds_products_tuple():
+    row = {"product_id": " P1 ", "name": "Toner", "quantity": "3", "cost_price": "2.5"}
+    assert validate_row(row) == ("P1", "Toner", "", "", "", 3, 2.5, "")
+
+
+@pytest.mark.parametrize("row", [[1, 2], "P1", 7, None])
+def test_validate_row_rejects_non_object(row):
+    with pytest.raises(ValueError, match="row must be a JSON object"):
+        validate_row(row)
+
+
+def test_non_object_jsonl_lines_are_reported(tmp_path):
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text('["P1", 2]\n'
+                        '{"product_id": "P2", "quantity": 1, "cost_price": 4}\n'
+                        '5\n', encoding="utf-8")
+    result = ImportResult()
+    try:
+        rows = list(valid_rows(str(manifest), result))
+        assert [row[0] for row in rows] == ["P2"]
+        assert result.errors == [(1, "row must be a JSON object"), (3, "row must be a JSON object")]
+    finally:
+        result.close()
+
+
+def test_import_into_catalog_rejects_ids_the_ledger_cannot_hold(tmp_path):
+    from catalog import ProductCatalog
+    from journal import ProductJournal
+    from bulk import import_into_catalog
+
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text('{"product_id": "SERUM-2026-VITAMIN-C", "quantity": 1, "cost_price": 4}\n'
+                        '{"product_id": "P2", "quantity": 1, "cost_price": 4}\n', encoding="utf-8")
+    catalog = ProductCatalog()
+    result = import_into_catalog(catalog, ProductJournal(str(tmp_path / "products.journal")), str(manifest))
+    try:
+        assert result.imported == 1 and catalog.get("P2") is not None
+        assert catalog.get("SERUM-2026-VITAMIN-C") is None
+        assert "longer than 16 bytes" in result.errors[0][1]
+    finally:
+        result.close()
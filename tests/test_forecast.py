@@ -0,0 +1,36 @@
+from forecast import Forecast
+
+
+def test_partial_first_day_does_not_seed_the_level():
+    forecast = Forecast()
+    # A launch-day rush, then a steady 4 a day
+    forecast.observe(100, 40)
+    for day in range(101, 106):
+        forecast.observe(day, 4)
+    level, variance = forecast.at(106)
+    assert level == 4.0 and variance == 0.0
+
+
+def test_started_day_is_an_estimate_until_a_day_completes():
+    forecast = Forecast()
+    forecast.observe(100, 6)
+    assert forecast.at(100)[0] == 6.0
+    assert forecast.at(101)[0] == 6.0
+    # Day 101 went by without a sale
+    assert forecast.at(102)[0] == 0.0
+
+
+def test_first_complete_day_seeds_the_level():
+    forecast = Forecast()
+    forecast.observe(100, 30)
+    forecast.observe(101, 5)
+    assert forecast.at(102)[0] == 5.0
+    assert forecast.at(103)[0] == 4.0
+
+
+def test_state_round_trips_through_a_row():
+    forecast = Forecast()
+    forecast.observe(100, 30)
+    restored = Forecast.from_row(forecast.as_row())
+    restored.observe(101, 5)
+    assert restored.at(102)[0] == 5.0
@@ -0,0 +1,75 @@
+import os
+
+from catalog import ProductCatalog, read_snapshot_seq
+from journal import ProductJournal
+
+
+class Till:
+    """One console process: the products snapshot plus the shared journal"""
+
+    def __init__(self, folder):
+        self.products_file = os.path.join(folder, "products.txt")
+        self.journal = ProductJournal(os.path.join(folder, "products.journal"), compact_threshold=3,
+                                      reload=self.reload,
+                                      snapshot_seq=lambda: read_snapshot_seq(self.products_file))
+        with self.journal.lock():
+            catalog = ProductCatalog.from_file(self.products_file)
+            self.catalog = self.journal.replay(catalog, catalog.snapshot_seq)
+
+    def reload(self, catalog):
+        catalog.replace(ProductCatalog.from_file(self.products_file))
+        return catalog.snapshot_seq
+
+    def write_snapshot(self, products, seq):
+        with open(self.products_file, "w") as file:
+            file.write(f"# seq={seq}\n")
+            for p in products.values():
+                file.write(f"{p['id']}, {p['name']}, {p['brand']}, {p['quantity']}, "
+                           f"{p['cost_price']}, {p['origin']}\n")
+
+    def sell(self, pid, qty):
+        with self.journal.transaction(self.catalog):
+            self.catalog.adjust_quantity(pid, -qty)
+            self.journal.append(pid, -qty)
+        self.journal.sync()
+        if self.journal.pending >= self.journal.compact_threshold:
+            self.journal.compact(self.catalog, self.write_snapshot, background=False)
+
+    def refresh(self):
+        with self.journal.transaction(self.catalog):
+            pass
+
+    def quantity(self, pid):
+        return self.catalog[pid]['quantity']
+
+
+def test_till_loaded_before_the_journal_existed_sees_compacted_sales(tmp_path):
+    (tmp_path / "products.txt").write_text("P1, Toner, Acme, 50, 2.0, Nepal\n")
+    a, b = Till(str(tmp_path)), Till(str(tmp_path))
+    for _ in range(5):
+        a.sell("P1", 2)
+
+    b.refresh()
+    assert b.quantity("P1") == 40
+
+    # b has seen three records now, so this sale compacts the journal
+    b.sell("P1", 1)
+    assert ProductCatalog.from_file(str(tmp_path / "products.txt"))["P1"]["quantity"] == 39
+    a.refresh()
+    assert a.quantity("P1") == 39
+    a.journal.close()
+    b.journal.close()
+
+
+def test_reload_when_snapshot_is_ahead_of_the_journal(tmp_path):
+    (tmp_path / "products.txt").write_text("P1, Toner, Acme, 50, 2.0, Nepal\n")
+    a, b = Till(str(tmp_path)), Till(str(tmp_path))
+    for _ in range(3):
+        a.sell("P1", 2)
+    # The compacted journal is empty, so only the snapshot header shows b is behind
+    b.sell("P1", 1)
+    assert b.quantity("P1") == 43
+    a.refresh()
+    assert a.quantity("P1") == 43
+    a.journal.close()
+    b.journal.close()
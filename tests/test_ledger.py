@@ -0,0 +1,18 @@
+import pytest
+
+from ledger import SalesLedger
+
+
+def test_long_product_id_is_refused_not_truncated(tmp_path):
+    ledger = SalesLedger(str(tmp_path / "sales.ledger"))
+    with pytest.raises(ValueError, match="longer than 16 bytes"):
+        ledger.append_sale("anna", [("P1", 1, 0, 2.0), ("SERUM-2026-VITAMIN-C", 1, 0, 2.0)])
+    assert ledger.record_count() == 0
+
+
+def test_ids_up_to_16_bytes_round_trip(tmp_path):
+    ledger = SalesLedger(str(tmp_path / "sales.ledger"))
+    ledger.append_sale("a-very-long-staff-name", [("SERUM-2026-VIT-C", 2, 0, 4.0), ("crème-é", 1, 0, 2.0)])
+    records = list(ledger.records())
+    assert [record[3] for record in records] == ["SERUM-2026-VIT-C", "crème-é"]
+    assert records[0][2] == "a-very-long-staf"
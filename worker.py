@@ -0,0 +1,87 @@
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TkExecutor:
+    """Runs blocking work off the Tk thread and hands the results back to it
+
+    Tk may only be touched from the thread running mainloop, so workers put
+    finished calls on a queue that the Tk thread drains with root.after.
+    Work submitted under a key supersedes earlier work with the same key:
+    if the earlier call has not started it is cancelled, and if it has, its
+    result is dropped, so a superseded search never overwrites a newer one.
+    on_busy(True/False) is called as the first call starts and the last
+    one finishes, for a busy indicator.
+    """
+
+    def __init__(self, root, workers=4, poll_ms=25, on_busy=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy = on_busy
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tk-worker")
+        self._done = queue.SimpleQueue()
+        self._latest = {}
+        self._pending = 0
+        self._after = None
+        self._closed = False
+
+    def submit(self, fn, *args, on_done=None, on_error=None, key=None):
+        """Run fn(*args) on a worker; on_done(result) or on_error(exception) run on the Tk thread
+
+        Must be called from the Tk thread.
+        """
+        if self._closed:
+            return None
+        if key is not None and key in self._latest:
+            self._latest[key].cancel()
+        future = self._pool.submit(fn, *args)
+        if key is not None:
+            self._latest[key] = future
+        self._pending += 1
+        if self._pending == 1 and self.on_busy is not None:
+            self.on_busy(True)
+        future.add_done_callback(lambda f: self._done.put((f, key, on_done, on_error)))
+        self._schedule()
+        return future
+
+    def _schedule(self):
+        if self._after is None and not self._closed:
+            self._after = self.root.after(self.poll_ms, self._drain)
+
+    def _drain(self):
+        self._after = None
+        while True:
+            try:
+                future, key, on_done, on_error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if key is not None:
+                if self._latest.get(key) is not future:
+                    continue
+                del self._latest[key]
+            if future.cancelled():
+                continue
+            error = future.exception()
+            try:
+                if error is None:
+                    if on_done is not None:
+                        on_done(future.result())
+                elif on_error is not None:
+                    on_error(error)
+                else:
+                    logging.error(f"Background task failed: {error}")
+            except Exception as e:
+                logging.error(f"Background task callback failed: {e}")
+        if self._pending:
+            self._schedule()
+        elif self.on_busy is not None:
+            self.on_busy(False)
+
+    def close(self):
+        self._closed = True
+        if self._after is not None:
+            self.root.after_cancel(self._after)
+            self._after = None
+        self._pool.shutdown(wait=True, cancel_futures=True)